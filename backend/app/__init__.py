@@ -4,6 +4,11 @@ from flask import Flask
 from flask_cors import CORS
 
 from .models import db
+from .database import engine_options, register_sqlite_pragmas
+from .instrumentation import metrics_enabled, init_instrumentation
+from .json_provider import FastJSONProvider
+from .compression import init_compression
+from .idempotency import init_idempotency
 
 # Blueprints já existentes
 from .routes.products import products_bp
@@ -13,6 +18,19 @@ from .routes.financial import financial_bp
 from .routes.reports import reports_bp
 from .routes.settings import settings_bp
 from .routes.sales_payments import sales_payments_bp
+from .routes.dashboard import dashboard_bp
+from .routes.jobs import jobs_bp
+from .routes.sync import sync_bp
+from .routes.events import events_bp
+from .rollups import register_rollup_events, rebuild_rollups, rollups_need_backfill
+from .stock import register_stock_events
+from .response_cache import register_cache_events
+from .search import register_search_events
+from .sync import register_sync_events
+from .events import register_push_events
+from .receivables import start_sweep_scheduler
+from .cli import register_commands
+from .migrations import upgrade_schema
 
 # >>> Devoluções (RETURNS) <<<
 # IMPORTANTE: o arquivo app/routes/returns.py deve expor "returns_bp = Blueprint(...)".
@@ -37,9 +55,37 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JSON_SORT_KEYS'] = False
 
+    # jsonify com orjson quando instalado (ver app/json_provider.py)
+    app.json = FastJSONProvider(app)
+
+    # Pool de conexões configurável via env (ver app/database.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url)
+
     # Inicializa o SQLAlchemy
     db.init_app(app)
 
+    # SQLite: WAL, busy_timeout, cache etc. em cada conexão nova
+    with app.app_context():
+        register_sqlite_pragmas(db.engine)
+
+    # Rollups do dashboard acompanham cada flush da sessão
+    register_rollup_events()
+
+    # Snapshot de estoque do /check_stock/ é invalidado nos commits que alteram produtos
+    register_stock_events()
+
+    # Cache de respostas GET: commits invalidam as entradas das tabelas alteradas
+    register_cache_events()
+
+    # Índice de busca em memória (bancos sem FTS5) acompanha os commits
+    register_search_events()
+
+    # Delta-sync: versão por transação nas tabelas sincronizáveis + lápides de exclusão
+    register_sync_events()
+
+    # Canal SSE (/api/events): alterações confirmadas de estoque, vendas, devoluções e parcelas
+    register_push_events()
+
     # CORS para o frontend local
     CORS(app, resources={r"/api/*": {"origins": os.getenv("CORS_ORIGINS", "http://localhost:3000")}})
 
@@ -53,18 +99,48 @@ def create_app():
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
     app.register_blueprint(settings_bp, url_prefix='/api/settings')
     app.register_blueprint(sales_payments_bp, url_prefix="/api")
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
 
     # Devoluções:
     # Use url_prefix explícito aqui para não depender do arquivo returns.py.
     # Se returns.py já definir um url_prefix, não há problema em manter somente aqui.
     app.register_blueprint(returns_bp, url_prefix='/api/returns')
 
+    # Instrumentação opcional (EASYSTOCK_METRICS=1): Server-Timing + /api/_metrics (com EASYSTOCK_METRICS_TOKEN)
+    if metrics_enabled():
+        with app.app_context():
+            init_instrumentation(app, db.engine)
+
+    # Compressão gzip/br das respostas textuais (EASYSTOCK_COMPRESS=0 desliga)
+    init_compression(app)
+
+    # Idempotency-Key nas escritas: reenvio devolve a resposta original sem reexecutar.
+    # Registrado depois da compressão para gravar (e reenviar) o corpo sem compressão.
+    init_idempotency(app)
+
     # ---------------------------
-    # Criação de tabelas (DEV)
+    # Criação de tabelas + migrações
     # ---------------------------
-    # Em produção, prefira migrações (Flask-Migrate/Alembic).
+    # create_all cria tabelas novas; upgrade_schema leva bancos existentes
+    # (colunas/índices novos) à versão atual. EASYSTOCK_AUTO_MIGRATE=0 deixa
+    # as migrações apenas para `flask db-upgrade`.
     with app.app_context():
         os.makedirs(os.path.dirname(db_file), exist_ok=True)
         db.create_all()
+        if os.getenv('EASYSTOCK_AUTO_MIGRATE', '1') != '0':
+            upgrade_schema()
+
+        # Bancos anteriores aos rollups: preenche uma única vez a partir das tabelas base
+        if rollups_need_backfill():
+            rebuild_rollups()
+
+    # Varredura de vencidos em processo (EASYSTOCK_SWEEP_INTERVAL segundos; 0 = só cron/sob demanda)
+    start_sweep_scheduler(app)
+
+    # Comandos de manutenção (flask rollups-rebuild, flask query-counts, ...)
+    register_commands(app)
 
     return app
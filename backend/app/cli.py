@@ -0,0 +1,81 @@
+# backend/app/cli.py
+# ======================================================================================
+# Comandos de manutenção (flask --app run <comando>)
+# ======================================================================================
+from app.models import db
+from app.rollups import rebuild_rollups
+from app.query_counter import count_endpoint_queries
+from app.migrations import upgrade_schema, current_version
+from app.stock import release_expired_reservations
+from app.receivables import run_sweep
+from app.jobs import cleanup_jobs
+from app.response_cache import response_cache
+from app.idempotency import purge_expired
+from app.sync import prune_tombstones
+from app.credits import rebuild_credit_balances
+
+
+def register_commands(app):
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Aplica as migrações de schema pendentes (colunas e índices)."""
+        applied = upgrade_schema()
+        if applied:
+            print(f'Migrações aplicadas: {applied}')
+        print(f'Schema na versão {current_version()}.')
+
+    @app.cli.command('rollups-rebuild')
+    def rollups_rebuild_command():
+        """Recalcula os rollups do dashboard a partir das tabelas base."""
+        rebuild_rollups()
+        print('Rollups do dashboard recalculados.')
+
+    @app.cli.command('query-counts')
+    def query_counts_command():
+        """Mostra quantas instruções SQL cada endpoint de leitura executa."""
+        for path, status, count in count_endpoint_queries(app, db.engine):
+            print(f'{count:5d}  {status}  {path}')
+
+    @app.cli.command('stock-release-expired')
+    def stock_release_expired_command():
+        """Devolve ao estoque as reservas de orçamentos vencidos."""
+        released = release_expired_reservations()
+        db.session.commit()
+        print(f'Reservas vencidas liberadas ({released} produtos).')
+
+    @app.cli.command('financial-sweep')
+    def financial_sweep_command():
+        """Marca parcelas/lançamentos vencidos como VENCIDO e recalcula o aging."""
+        result = run_sweep()
+        print(f"Vencidos: {result['payments']} parcelas, {result['entries']} lançamentos. Aging recalculado.")
+
+    @app.cli.command('jobs-cleanup')
+    def jobs_cleanup_command():
+        """Apaga jobs antigos e marca como failed os que ficaram presos na fila."""
+        deleted, interrupted = cleanup_jobs()
+        print(f'Jobs apagados: {deleted}. Interrompidos: {interrupted}.')
+
+    @app.cli.command('cache-clear')
+    def cache_clear_command():
+        """Esvazia o cache de respostas (backend configurado em EASYSTOCK_RESPONSE_CACHE)."""
+        response_cache.clear()
+        print('Cache de respostas esvaziado.')
+
+    @app.cli.command('idempotency-cleanup')
+    def idempotency_cleanup_command():
+        """Apaga as chaves de idempotência vencidas (EASYSTOCK_IDEMPOTENCY_TTL)."""
+        deleted = purge_expired()
+        print(f'Chaves de idempotência apagadas: {deleted}.')
+
+    @app.cli.command('sync-prune')
+    def sync_prune_command():
+        """Apaga lápides do delta-sync mais velhas que EASYSTOCK_SYNC_TOMBSTONE_DAYS."""
+        deleted = prune_tombstones()
+        print(f'Lápides apagadas: {deleted}.')
+
+    @app.cli.command('credits-rebuild')
+    def credits_rebuild_command():
+        """Confere customers.credit_balance com a soma dos créditos e corrige divergências."""
+        fixed = rebuild_credit_balances()
+        print(f'Saldos de crédito corrigidos: {fixed}.')
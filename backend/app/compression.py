@@ -0,0 +1,119 @@
+# backend/app/compression.py
+# ======================================================================================
+# Compressão das respostas (gzip e, se o pacote `brotli` estiver instalado, br).
+#
+# - A codificação é negociada pelo Accept-Encoding (q-values respeitados; em empate,
+#   br antes de gzip). Só tipos textuais (JSON, NDJSON, CSV, text/*) e corpos a
+#   partir de EASYSTOCK_COMPRESS_MIN_SIZE bytes; imagens, 304, text/event-stream (SSE)
+#   etc. passam direto.
+# - Respostas em streaming (exportações) são comprimidas bloco a bloco, com flush a
+#   cada bloco: o cliente continua recebendo dados à medida que o banco é lido.
+# - ETag forte vira fraca (W/"...") quando o corpo é comprimido — o mesmo recurso
+#   tem bytes diferentes por codificação; If-None-Match usa comparação fraca.
+#
+# EASYSTOCK_COMPRESS=0 desliga; EASYSTOCK_COMPRESS_LEVEL (gzip 1-9, padrão 6);
+# EASYSTOCK_BROTLI_QUALITY (0-11, padrão 5).
+# ======================================================================================
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só gzip
+    brotli = None
+
+COMPRESS_ENABLED = os.getenv('EASYSTOCK_COMPRESS', '1') != '0'
+COMPRESS_MIN_SIZE = int(os.getenv('EASYSTOCK_COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_LEVEL = int(os.getenv('EASYSTOCK_COMPRESS_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('EASYSTOCK_BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'image/svg+xml',
+}
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ''
+    if mimetype == 'text/event-stream':  # SSE: cada evento precisa sair na hora
+        return False
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def _compress_stream(chunks, encoding, source):
+    """chunks: bytes do corpo original; source: iterável original (fechado ao fim)."""
+    try:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            for chunk in chunks:
+                if chunk:
+                    yield compressor.process(chunk) + compressor.flush()
+            yield compressor.finish()
+            return
+
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # cabeçalho gzip
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    """Comprime a resposta se o cliente aceitar e valer a pena. Retorna a resposta."""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or not _compressible(response)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        source = response.response
+        response.response = _compress_stream(response.iter_encoded(), encoding, source)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(_compress(body, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+
+def init_compression(app):
+    """Registra o after_request de compressão (EASYSTOCK_COMPRESS=0 desliga)."""
+    if not COMPRESS_ENABLED:
+        return
+
+    @app.after_request
+    def _compress_after_request(response):
+        return compress_response(response)
@@ -0,0 +1,183 @@
+# backend/app/credits.py
+# ======================================================================================
+# Crédito de cliente: saldo mantido + livro de movimentações + liquidação FIFO atômica.
+#
+# customers.credit_balance guarda a soma de customer_credits.balance do cliente;
+# consultar o saldo é ler uma linha, sem somar o histórico. Toda alteração passa
+# por aqui, na transação de quem chama, e grava uma linha em
+# customer_credit_movements (só INSERT: o livro explica o saldo).
+#
+# Liquidação (liquidate_credit), tudo na mesma transação:
+#   1. UPDATE customers SET credit_balance = credit_balance - :v
+#          WHERE id = :cliente AND credit_balance >= :v
+#      rowcount 0 -> InsufficientCredit. O UPDATE bloqueia a linha do cliente até o
+#      commit (SQLite serializa escritores), então duas liquidações simultâneas
+#      nunca gastam o mesmo saldo: a segunda espera e reavalia o saldo.
+#   2. Créditos com saldo em ordem FIFO (índice parcial ix_customer_credits_open),
+#      abatidos com compare-and-swap: ... WHERE id = :id AND balance = :lido.
+#      Linha alterada por fora (rowcount 0) -> CreditContention; quem chama faz
+#      rollback e o cliente repete a operação.
+# Valores em centavos (int), como em app/money.py.
+# ======================================================================================
+from datetime import datetime
+
+from sqlalchemy import literal_column, select, update
+
+from app.models import db, Customer, CustomerCredit, CustomerCreditMovement, generate_uuid
+from app.money import from_cents, sql_cents
+from app.response_cache import mark_tables_changed
+
+GRANT, LIQUIDATION, OPENING = 'CONCESSAO', 'LIQUIDACAO', 'SALDO_INICIAL'
+FIFO_BATCH = 50  # créditos lidos por consulta durante a liquidação
+
+
+class InsufficientCredit(Exception):
+    """Saldo menor que o valor pedido. `available` em centavos."""
+
+    def __init__(self, available):
+        super().__init__('Saldo de crédito insuficiente.')
+        self.available = available
+
+
+class CreditContention(Exception):
+    """Um crédito mudou entre a leitura e o abatimento; a transação deve ser desfeita."""
+
+    def __init__(self):
+        super().__init__('Créditos do cliente alterados durante a liquidação; tente novamente.')
+
+
+def _mark_changed():
+    mark_tables_changed(Customer.__tablename__, CustomerCredit.__tablename__,
+                        CustomerCreditMovement.__tablename__)
+
+
+def credit_balance(customer_id):
+    """Saldo de crédito do cliente em centavos (None se o cliente não existe)."""
+    table = Customer.__table__
+    return db.session.execute(
+        select(sql_cents(table.c.credit_balance)).where(table.c.id == customer_id)
+    ).scalar()
+
+
+def _adjust_balance(conn, customer_id, delta, guard=False):
+    """Soma `delta` centavos ao saldo; com guard, só se o saldo não ficar negativo."""
+    table = Customer.__table__
+    balance = sql_cents(table.c.credit_balance)
+    stmt = update(table).where(table.c.id == customer_id).values(credit_balance=balance + delta)
+    if guard:
+        stmt = stmt.where(balance >= -delta)
+    if conn.execute(stmt).rowcount != 1:
+        return None
+    return conn.execute(select(balance).where(table.c.id == customer_id)).scalar_one()
+
+
+def grant_credit(customer_id, amount, return_id=None):
+    """Concede `amount` centavos de crédito. Retorna o id do crédito criado."""
+    conn = db.session.connection()
+    credit_id, now = generate_uuid(), datetime.utcnow()
+    conn.execute(CustomerCredit.__table__.insert().values(
+        id=credit_id, customer_id=customer_id, return_id=return_id,
+        amount=from_cents(amount), balance=from_cents(amount), created_at=now,
+    ))
+    balance = _adjust_balance(conn, customer_id, amount)
+    if balance is None:
+        raise LookupError(f'Cliente {customer_id} não encontrado')
+    conn.execute(CustomerCreditMovement.__table__.insert().values(
+        id=generate_uuid(), customer_id=customer_id, credit_id=credit_id, kind=GRANT,
+        amount=from_cents(amount), balance_after=from_cents(balance), reference=return_id, created_at=now,
+    ))
+    _mark_changed()
+    return credit_id
+
+
+def _open_credits(conn, customer_id, after):
+    table = CustomerCredit.__table__
+    # `balance > 0` literal: o planejador só usa o índice parcial se o termo for idêntico
+    stmt = (
+        select(table.c.id, table.c.created_at, sql_cents(table.c.balance).label('balance'))
+        .where(table.c.customer_id == customer_id, table.c.balance > literal_column('0'))
+        .order_by(table.c.created_at, table.c.id)
+        .limit(FIFO_BATCH)
+    )
+    if after is not None:
+        created_at, credit_id = after
+        stmt = stmt.where((table.c.created_at > created_at)
+                          | ((table.c.created_at == created_at) & (table.c.id > credit_id)))
+    return conn.execute(stmt).all()
+
+
+def liquidate_credit(customer_id, amount):
+    """
+    Abate `amount` centavos dos créditos do cliente (FIFO) na transação corrente.
+    Retorna (liquidation_id, [(credit_id, centavos usados)], novo saldo em centavos).
+    Levanta InsufficientCredit ou CreditContention (quem chama faz rollback).
+    """
+    conn = db.session.connection()
+    new_balance = _adjust_balance(conn, customer_id, -amount, guard=True)
+    if new_balance is None:
+        raise InsufficientCredit(credit_balance(customer_id) or 0)
+
+    credits = CustomerCredit.__table__
+    liquidation_id, now = generate_uuid(), datetime.utcnow()
+    running, remaining, after = new_balance + amount, amount, None
+    used, movements = [], []
+    while remaining > 0:
+        rows = _open_credits(conn, customer_id, after)
+        if not rows:  # saldo mantido diverge dos créditos: não abate parcialmente
+            raise CreditContention()
+        for row in rows:
+            use = min(row.balance, remaining)
+            swapped = conn.execute(
+                update(credits)
+                .where(credits.c.id == row.id, sql_cents(credits.c.balance) == row.balance)
+                .values(balance=sql_cents(credits.c.balance) - use)
+            ).rowcount
+            if swapped != 1:
+                raise CreditContention()
+            running -= use
+            remaining -= use
+            used.append((row.id, use))
+            movements.append({
+                'id': generate_uuid(), 'customer_id': customer_id, 'credit_id': row.id,
+                'kind': LIQUIDATION, 'amount': from_cents(-use), 'balance_after': from_cents(running),
+                'reference': liquidation_id, 'created_at': now,
+            })
+            if remaining == 0:
+                break
+        after = (rows[-1].created_at, rows[-1].id)
+
+    conn.execute(CustomerCreditMovement.__table__.insert(), movements)
+    _mark_changed()
+    return liquidation_id, used, new_balance
+
+
+def rebuild_credit_balances():
+    """
+    Recalcula customers.credit_balance a partir de customer_credits e registra a
+    diferença de cada cliente corrigido como SALDO_INICIAL. Retorna quantos mudaram. Faz commit.
+    """
+    customers, credits = Customer.__table__, CustomerCredit.__table__
+    conn = db.session.connection()
+    totals = dict(conn.execute(
+        select(credits.c.customer_id, sql_cents(db.func.sum(credits.c.balance)))
+        .group_by(credits.c.customer_id)
+    ).all())
+    current = conn.execute(select(customers.c.id, sql_cents(customers.c.credit_balance))).all()
+
+    now, movements = datetime.utcnow(), []
+    for customer_id, balance in current:
+        expected = int(totals.get(customer_id) or 0)
+        if expected == (balance or 0):
+            continue
+        conn.execute(update(customers).where(customers.c.id == customer_id)
+                     .values(credit_balance=from_cents(expected)))
+        movements.append({
+            'id': generate_uuid(), 'customer_id': customer_id, 'credit_id': None, 'kind': OPENING,
+            'amount': from_cents(expected - (balance or 0)), 'balance_after': from_cents(expected),
+            'reference': None, 'created_at': now,
+        })
+    if movements:
+        conn.execute(CustomerCreditMovement.__table__.insert(), movements)
+        _mark_changed()
+    db.session.commit()
+    return len(movements)
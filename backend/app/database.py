@@ -0,0 +1,76 @@
+# backend/app/database.py
+# ======================================================================================
+# Configuração do engine SQLAlchemy (pool de conexões + PRAGMAs do SQLite).
+#
+# Pool (via env, valem para qualquer banco):
+#   EASYSTOCK_DB_POOL_SIZE, EASYSTOCK_DB_MAX_OVERFLOW, EASYSTOCK_DB_POOL_TIMEOUT,
+#   EASYSTOCK_DB_POOL_RECYCLE (segundos), EASYSTOCK_DB_PRE_PING (1/0).
+#   pool_pre_ping fica ligado por padrão fora do SQLite (conexões de rede caem).
+#
+# SQLite: cada conexão nova recebe os PRAGMAs abaixo. Em WAL, vários processos
+# (workers do gunicorn/waitress) leem enquanto um escreve; busy_timeout faz o
+# escritor esperar o lock em vez de falhar com "database is locked".
+#   EASYSTOCK_SQLITE_JOURNAL_MODE  (padrão WAL)
+#   EASYSTOCK_SQLITE_SYNCHRONOUS   (padrão NORMAL — seguro em WAL)
+#   EASYSTOCK_SQLITE_BUSY_TIMEOUT  (ms, padrão 5000)
+#   EASYSTOCK_SQLITE_CACHE_SIZE    (padrão -65536 = 64 MiB; negativo = KiB)
+#   EASYSTOCK_SQLITE_MMAP_SIZE     (bytes, padrão 268435456 = 256 MiB)
+# ======================================================================================
+import os
+
+from sqlalchemy import event
+
+_POOL_SETTINGS = (
+    # (variável de ambiente, opção do create_engine)
+    ('EASYSTOCK_DB_POOL_SIZE', 'pool_size'),
+    ('EASYSTOCK_DB_MAX_OVERFLOW', 'max_overflow'),
+    ('EASYSTOCK_DB_POOL_TIMEOUT', 'pool_timeout'),
+    ('EASYSTOCK_DB_POOL_RECYCLE', 'pool_recycle'),
+)
+
+
+def _is_sqlite(database_url):
+    return database_url.startswith('sqlite')
+
+
+def engine_options(database_url):
+    """Monta SQLALCHEMY_ENGINE_OPTIONS a partir das variáveis de ambiente."""
+    options = {}
+    for env_name, option in _POOL_SETTINGS:
+        value = os.getenv(env_name)
+        if value:
+            options[option] = int(value)
+
+    default_pre_ping = '0' if _is_sqlite(database_url) else '1'
+    options['pool_pre_ping'] = os.getenv('EASYSTOCK_DB_PRE_PING', default_pre_ping) == '1'
+
+    if not _is_sqlite(database_url):
+        options.setdefault('pool_recycle', 1800)
+    return options
+
+
+def sqlite_pragmas():
+    """PRAGMAs aplicados a cada conexão SQLite, na ordem."""
+    return [
+        ('journal_mode', os.getenv('EASYSTOCK_SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', os.getenv('EASYSTOCK_SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(os.getenv('EASYSTOCK_SQLITE_BUSY_TIMEOUT', '5000'))),
+        ('cache_size', int(os.getenv('EASYSTOCK_SQLITE_CACHE_SIZE', '-65536'))),
+        ('mmap_size', int(os.getenv('EASYSTOCK_SQLITE_MMAP_SIZE', '268435456'))),
+    ]
+
+
+def register_sqlite_pragmas(engine):
+    """Liga os PRAGMAs no evento 'connect' do engine (não faz nada fora do SQLite)."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,481 @@
+# backend/app/events.py
+# ======================================================================================
+# Eventos de alteração para o canal SSE (GET /api/events, em routes/events.py).
+#
+# Os terminais de PDV consultavam /check_stock/ e a lista de produtos em intervalo
+# fixo; com o canal eles recebem só o que mudou:
+#   stock     {"products": [{id, name, quantity, minStock, lowStock, isActive}], "removed": [ids]}
+#   sales     {"action": "created|updated|deleted", "sales": [{id, status, total, ...}]}
+#   returns   {"action": ..., "returns": [{id, saleId, status, resolution, total, ...}]}
+#   payments  {"action": ..., "payments": [{id, saleId, status, amount, dueDate, ...}]}
+#   reset     {}  -> o cliente perdeu eventos: refaz o delta via GET /api/sync
+#
+# Coleta na sessão, como o cache de respostas e o delta-sync:
+#   - after_flush: objetos ORM (Product, Sale, Return, SalePayment) novos/alterados/
+#     excluídos — cobre update_product, create_return, as rotas de parcelas etc.;
+#   - escritas Core avisam explicitamente: baixas/reentradas de estoque e importação
+#     (stock.mark_stock_changed(ids)), vendas em lote (queue_events);
+#   - before_commit: relê nome/quantidade dos produtos tocados (valor final da
+#     transação, inclusive das baixas condicionais) e monta os eventos;
+#   - after_commit: publica; rollback descarta. Nada é publicado antes do commit.
+# Uma transação gera no máximo um evento por tópico/ação (listas em lotes de
+# EVENT_BATCH itens). A varredura de vencidos (Core) não gera eventos de parcelas.
+#
+# Barramento (EASYSTOCK_EVENTS):
+#   memory (padrão) pub/sub em processo; só os clientes do mesmo worker recebem.
+#   sqlite          log compartilhado em arquivo (EASYSTOCK_EVENTS_FILE): cada worker
+#                   grava o que publica e uma thread por processo (ativa só enquanto
+#                   houver clientes) lê o log a cada EASYSTOCK_EVENTS_POLL segundos e
+#                   repassa aos seus clientes — qualquer worker publica para todos.
+#   off             sem coleta e sem canal (/api/events responde 404).
+# Os últimos EASYSTOCK_EVENTS_BUFFER eventos ficam guardados para a reconexão
+# (Last-Event-ID); quem ficou mais para trás recebe `reset`. Conexões simultâneas por
+# processo: EASYSTOCK_EVENTS_MAX_CLIENTS (padrão: EASYSTOCK_THREADS // 2).
+# ======================================================================================
+import json
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+
+from sqlalchemy import event, select
+
+from app.models import db, Product, Sale, Return, SalePayment
+
+logger = logging.getLogger(__name__)
+
+EVENTS_BACKEND = os.getenv('EASYSTOCK_EVENTS', 'memory').strip().lower()
+EVENTS_BUFFER = int(os.getenv('EASYSTOCK_EVENTS_BUFFER', '1000'))
+EVENTS_POLL = float(os.getenv('EASYSTOCK_EVENTS_POLL', '0.5'))
+# Cada cliente SSE prende uma thread do servidor enquanto conectado: por padrão no
+# máximo metade das threads do worker (EASYSTOCK_THREADS, as mesmas de wsgi.py/gunicorn
+# --threads), para sobrar vaga às demais requisições. 0 = recusa todos (503).
+SERVER_THREADS = int(os.getenv('EASYSTOCK_THREADS', '8'))
+EVENTS_MAX_CLIENTS = int(os.getenv('EASYSTOCK_EVENTS_MAX_CLIENTS', str(SERVER_THREADS // 2)))
+EVENTS_FILE = os.getenv('EASYSTOCK_EVENTS_FILE') or os.path.join(tempfile.gettempdir(), 'easystock-events.db')
+
+TOPICS = ('stock', 'sales', 'returns', 'payments')
+RESET = 'reset'
+EVENT_BATCH = 200            # itens por evento (e por SELECT dos produtos)
+SUBSCRIBER_QUEUE = 1000      # eventos pendentes por cliente antes de virar `reset`
+
+Event = namedtuple('Event', 'id topic data')  # data: JSON já serializado
+
+
+# --------------------------------------------------------------------------------------
+# Backends (log de eventos com id crescente)
+# --------------------------------------------------------------------------------------
+class MemoryLog:
+    """Últimos `size` eventos em processo."""
+
+    shared = False  # publish entrega direto aos clientes deste processo
+
+    def __init__(self, size=EVENTS_BUFFER):
+        self._events = deque(maxlen=size)
+        # ids começam no relógio: após reiniciar, Last-Event-ID antigo cai em `reset`
+        self._last_id = time.time_ns() // 1000
+        self._lock = threading.Lock()
+
+    def append(self, items):
+        with self._lock:
+            appended = []
+            for topic, data in items:
+                self._last_id += 1
+                appended.append(Event(self._last_id, topic, data))
+            self._events.extend(appended)
+            return appended
+
+    def last_id(self):
+        with self._lock:
+            return self._last_id
+
+    def read(self, after, upto):
+        """Eventos com id em (after, upto]; None se parte deles já saiu do buffer."""
+        with self._lock:
+            if not self._events:
+                return [] if after >= self._last_id else None
+            if after < self._events[0].id - 1:
+                return None
+            return [e for e in self._events if after < e.id <= upto]
+
+
+class SQLiteLog:
+    """Log em arquivo SQLite compartilhado pelos workers; uma conexão por thread."""
+
+    shared = True  # a thread de leitura de cada processo entrega aos seus clientes
+
+    def __init__(self, path=EVENTS_FILE, size=EVENTS_BUFFER):
+        self.path = path
+        self.size = size
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, data TEXT NOT NULL,'
+                ' created_at REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def append(self, items):
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT INTO events (topic, data, created_at) VALUES (?, ?, ?)',
+                             [(topic, data, now) for topic, data in items])
+            conn.execute('DELETE FROM events WHERE id <= (SELECT MAX(id) FROM events) - ?', (self.size,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return []
+
+    def last_id(self):
+        return self._conn().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    def read(self, after, upto=None):
+        conn = self._conn()
+        if upto is not None and after >= upto:
+            return []
+        oldest = conn.execute('SELECT MIN(id) FROM events').fetchone()[0]
+        if oldest is not None and after < oldest - 1:
+            return None
+        sql, params = 'SELECT id, topic, data FROM events WHERE id > ?', [after]
+        if upto is not None:
+            sql += ' AND id <= ?'
+            params.append(upto)
+        return [Event(*row) for row in conn.execute(sql + ' ORDER BY id', params)]
+
+
+def _make_log(name):
+    if name in ('off', '0', 'none', ''):
+        return None
+    if name == 'sqlite':
+        return SQLiteLog()
+    if name != 'memory':
+        logger.warning('EASYSTOCK_EVENTS=%r desconhecido; usando memory', name)
+    return MemoryLog()
+
+
+# --------------------------------------------------------------------------------------
+# Barramento
+# --------------------------------------------------------------------------------------
+class Subscriber:
+    """Fila de um cliente SSE; `lagging` indica que eventos foram descartados."""
+
+    def __init__(self, topics):
+        self.topics = frozenset(topics)
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self.lagging = False
+
+    def offer(self, ev):
+        if ev.topic not in self.topics:
+            return
+        try:
+            self.queue.put_nowait(ev)
+        except queue.Full:
+            self.lagging = True
+
+    def drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class EventBus:
+    """Pub/sub entre as transações confirmadas e os clientes SSE deste processo."""
+
+    def __init__(self, log, max_clients=EVENTS_MAX_CLIENTS, poll=EVENTS_POLL):
+        self.log = log
+        self.max_clients = max_clients
+        self.poll = poll
+        self._subscribers = set()
+        # id do último evento entregue aos clientes (sqlite: acertado ao ligar a leitura)
+        self._position = log.last_id() if log is not None and not log.shared else 0
+        self._lock = threading.Lock()
+        self._poller = None
+
+    @property
+    def enabled(self):
+        return self.log is not None
+
+    @property
+    def position(self):
+        with self._lock:
+            return self._position
+
+    def publish(self, items):
+        """items: [(tópico, dict)]. Nunca levanta: falha do log só perde os eventos."""
+        if not self.enabled or not items:
+            return
+        payload = [(topic, json.dumps(data, separators=(',', ':'), default=str)) for topic, data in items]
+        try:
+            if self.log.shared:
+                self.log.append(payload)
+                return
+            with self._lock:
+                self._dispatch(self.log.append(payload))
+        except sqlite3.Error:
+            logger.exception('Falha ao publicar %d evento(s)', len(payload))
+
+    def subscribe(self, topics, last_id=None):
+        """
+        Registra um cliente. Retorna (Subscriber, eventos a reenviar | None = reset)
+        ou (None, None) se o limite de clientes do processo foi atingido.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None, None
+            if self.log.shared and self._poller is None:
+                self._position = self.log.last_id()
+                self._poller = threading.Thread(target=self._poll_loop, name='easystock-events', daemon=True)
+                self._poller.start()
+
+            replay = []
+            if last_id is not None:
+                replay = None if last_id > self._position else self.log.read(last_id, self._position)
+                if replay is not None:
+                    replay = [e for e in replay if e.topic in topics]
+            subscriber = Subscriber(topics)
+            self._subscribers.add(subscriber)
+            return subscriber, replay
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _dispatch(self, events):
+        for ev in events:
+            for subscriber in self._subscribers:
+                subscriber.offer(ev)
+            self._position = ev.id
+
+    def _poll_loop(self):
+        while True:
+            time.sleep(self.poll)
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+                try:
+                    events = self.log.read(self._position)
+                    if events is None:  # ficou mais de EVENTS_BUFFER eventos para trás
+                        self._position = self.log.last_id()
+                        for subscriber in self._subscribers:
+                            subscriber.lagging = True
+                    else:
+                        self._dispatch(events)
+                except sqlite3.Error:
+                    logger.exception('Falha ao ler o log de eventos')
+
+
+event_bus = EventBus(_make_log(EVENTS_BACKEND))
+
+
+# --------------------------------------------------------------------------------------
+# Resumos publicados
+# --------------------------------------------------------------------------------------
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _money(value):
+    return float(value) if value is not None else None
+
+
+def _get(obj, attr):
+    return obj.get(attr) if isinstance(obj, dict) else getattr(obj, attr, None)
+
+
+def sale_summary(sale):
+    """Venda (ORM ou dict de colunas) -> item do evento `sales`."""
+    return {
+        'id': _get(sale, 'id'),
+        'status': _get(sale, 'status'),
+        'total': _money(_get(sale, 'total')),
+        'customerId': _get(sale, 'customer_id'),
+        'customerName': _get(sale, 'customer_name'),
+        'createdAt': _iso(_get(sale, 'created_at')),
+    }
+
+
+def return_summary(ret):
+    return {
+        'id': ret.id,
+        'saleId': ret.sale_id,
+        'customerId': ret.customer_id,
+        'status': ret.status,
+        'resolution': ret.resolution,
+        'total': _money(ret.total),
+        'createdAt': _iso(ret.created_at),
+    }
+
+
+def payment_summary(payment):
+    return {
+        'id': payment.id,
+        'saleId': payment.sale_id,
+        'status': payment.status,
+        'amount': _money(payment.amount),
+        'dueDate': _iso(payment.due_date),
+        'paymentMethod': payment.payment_method,
+    }
+
+
+# (modelo, tópico, serializador)
+TRACKED = (
+    (Sale, 'sales', sale_summary),
+    (Return, 'returns', return_summary),
+    (SalePayment, 'payments', payment_summary),
+)
+
+
+# --------------------------------------------------------------------------------------
+# Coleta na sessão
+# --------------------------------------------------------------------------------------
+def _pending(session):
+    return session.info.setdefault('events_pending', {
+        'products': set(), 'removed': set(), 'created_sales': set(), 'items': {},
+    })
+
+
+def _queue(session, topic, action, items):
+    bucket = _pending(session)['items'].setdefault((topic, action), {})
+    for item in items:
+        bucket[item['id']] = item  # a última versão do objeto na transação vence
+
+
+def queue_events(topic, action, items, session=None):
+    """Enfileira itens de um tópico para publicar no commit (escritas via Core)."""
+    if event_bus.enabled and items:
+        session = session or db.session()
+        if topic == 'sales' and action == 'created':
+            _pending(session)['created_sales'].update(item['id'] for item in items)
+        _queue(session, topic, action, items)
+
+
+def note_products_changed(product_ids, session=None):
+    """Produtos cujo estoque a transação corrente alterou via Core."""
+    if event_bus.enabled:
+        _pending(session or db.session())['products'].update(product_ids)
+
+
+def _after_flush(session, flush_context):
+    # new/dirty/deleted ainda refletem o estado anterior ao flush; ids já preenchidos
+    pending = _pending(session)
+    for obj in session.new:
+        if isinstance(obj, Sale):
+            pending['created_sales'].add(obj.id)
+    for obj in session.new:
+        if isinstance(obj, Product):
+            pending['products'].add(obj.id)
+        elif isinstance(obj, SalePayment) and obj.sale_id in pending['created_sales']:
+            continue  # parcelas geradas com a venda já vão no evento da venda
+        else:
+            for model, topic, summary in TRACKED:
+                if isinstance(obj, model):
+                    _queue(session, topic, 'created', [summary(obj)])
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Product):
+            pending['products'].add(obj.id)
+            continue
+        for model, topic, summary in TRACKED:
+            if isinstance(obj, model):
+                _queue(session, topic, 'updated', [summary(obj)])
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            pending['removed'].add(obj.id)
+            continue
+        for model, topic, _summary in TRACKED:
+            if isinstance(obj, model):
+                item = {'id': obj.id}
+                if model is not Sale:
+                    item['saleId'] = obj.sale_id
+                _queue(session, topic, 'deleted', [item])
+
+
+def _stock_rows(session, product_ids):
+    conn = session.connection()
+    ids, rows = sorted(product_ids), []
+    for start in range(0, len(ids), EVENT_BATCH):
+        rows += conn.execute(
+            select(Product.id, Product.name, Product.quantity, Product.min_stock, Product.is_active)
+            .where(Product.id.in_(ids[start:start + EVENT_BATCH]))
+        ).all()
+    return [{
+        'id': r.id,
+        'name': r.name,
+        'quantity': int(r.quantity or 0),
+        'minStock': int(r.min_stock or 0),
+        'lowStock': int(r.quantity or 0) <= int(r.min_stock or 0),
+        'isActive': bool(r.is_active),
+    } for r in rows]
+
+
+def _batches(items):
+    for start in range(0, len(items), EVENT_BATCH):
+        yield items[start:start + EVENT_BATCH]
+
+
+def _before_commit(session):
+    session.flush()  # o after_flush coleta o que ainda estava pendente
+    pending = session.info.pop('events_pending', None)
+    if not pending:
+        return
+
+    outbox = []
+    removed = sorted(pending['removed'])
+    products = _stock_rows(session, pending['products'] - pending['removed']) if pending['products'] else []
+    if products or removed:
+        outbox.append(('stock', {'products': products[:EVENT_BATCH], 'removed': removed}))
+        outbox += [('stock', {'products': batch, 'removed': []}) for batch in _batches(products[EVENT_BATCH:])]
+
+    for topic in TOPICS[1:]:
+        for action in ('created', 'updated', 'deleted'):
+            items = list(pending['items'].get((topic, action), {}).values())
+            outbox += [(topic, {'action': action, topic: batch}) for batch in _batches(items)]
+    session.info['events_outbox'] = outbox
+
+
+def _after_commit(session):
+    session.info.pop('events_pending', None)
+    event_bus.publish(session.info.pop('events_outbox', None))
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('events_pending', None)
+        session.info.pop('events_outbox', None)
+
+
+_SESSION_EVENTS = (
+    ('after_flush', _after_flush),
+    ('before_commit', _before_commit),
+    ('after_commit', _after_commit),
+    ('after_soft_rollback', _after_soft_rollback),
+)
+
+
+def register_push_events():
+    """Liga a coleta de eventos na sessão do Flask-SQLAlchemy (idempotente; nada se EASYSTOCK_EVENTS=off)."""
+    if not event_bus.enabled:
+        return
+    for name, fn in _SESSION_EVENTS:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
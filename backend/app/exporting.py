@@ -0,0 +1,110 @@
+# backend/app/exporting.py
+# ======================================================================================
+# Exportação em streaming (CSV / NDJSON).
+#
+# As rotas /export montam um SELECT só com as colunas necessárias (sem hidratar
+# objetos ORM) e o resultado é percorrido com yield_per — no Postgres isso usa
+# cursor no servidor; no SQLite, o próprio cursor é lido em blocos. Cada bloco é
+# convertido e enviado ao cliente por um Response em streaming: a memória fica
+# constante e o primeiro byte sai imediatamente.
+# ======================================================================================
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+
+from flask import Response, request, stream_with_context
+
+from app.models import db
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+YIELD_PER = 1000
+
+_MIMETYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def requested_format():
+    """Formato pedido em ?format= (padrão csv). Levanta ValueError se inválido."""
+    fmt = (request.args.get('format') or 'csv').strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Formato inválido. Use um de: {list(EXPORT_FORMATS)}')
+    return fmt
+
+
+def requested_period():
+    """
+    Período opcional em ?start=YYYY-MM-DD&end=YYYY-MM-DD -> (inicio, fim_exclusivo).
+    Qualquer um pode ser None. Levanta ValueError se inválido.
+    """
+    def parse(value):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value[:10], '%Y-%m-%d')
+        except ValueError:
+            raise ValueError('Datas inválidas')
+
+    start = parse(request.args.get('start'))
+    end = parse(request.args.get('end'))
+    if end is not None:
+        end = end + timedelta(days=1)  # incluir o dia final
+    return start, end
+
+
+def _csv_line(values):
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def _csv_chunks(result, fields):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for partition in result.partitions():
+        for row in partition:
+            writer.writerow(['' if v is None else _plain(v) for v in row])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+
+
+def _ndjson_chunks(result, fields):
+    for partition in result.partitions():
+        yield ''.join(
+            json.dumps({f: _plain(v) for f, v in zip(fields, row)}, ensure_ascii=False) + '\n'
+            for row in partition
+        )
+
+
+def export_response(stmt, fields, fmt, filename):
+    """
+    stmt:   SELECT com as colunas na mesma ordem de `fields`
+    fields: nomes das colunas no arquivo (cabeçalho CSV / chaves NDJSON)
+    """
+    def generate():
+        # o cabeçalho CSV sai antes de qualquer consulta ao banco
+        if fmt == 'csv':
+            yield _csv_line(fields)
+
+        result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+        try:
+            chunks = _csv_chunks(result, fields) if fmt == 'csv' else _ndjson_chunks(result, fields)
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+        finally:
+            result.close()
+
+    response = Response(stream_with_context(generate()), content_type=_MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    response.headers['X-Accel-Buffering'] = 'no'  # não bufferizar em proxies nginx
+    return response
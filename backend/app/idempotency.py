@@ -0,0 +1,204 @@
+# backend/app/idempotency.py
+# ======================================================================================
+# Idempotency-Key nas requisições de escrita (POST/PUT/PATCH/DELETE em /api/).
+#
+# Lojas com link instável reenviam a mesma venda, devolução, parcela ou liquidação
+# de crédito após um timeout. Com o cabeçalho `Idempotency-Key: <uuid>`:
+#   - a primeira requisição "reserva" a chave (linha processing em idempotency_keys,
+#     em transação própria) e executa normalmente; a resposta (< 500) é gravada;
+#   - reenvios com a mesma chave e o mesmo corpo recebem a resposta original, sem
+#     reexecutar, com o cabeçalho Idempotent-Replayed: true;
+#   - reenvio enquanto a primeira ainda executa -> 409 IDEMPOTENCY_IN_PROGRESS
+#     (Retry-After); mesma chave com outro método/caminho/corpo -> 422;
+#   - respostas 5xx (a transação foi desfeita) liberam a chave para nova tentativa.
+#
+# As chaves valem EASYSTOCK_IDEMPOTENCY_TTL segundos (padrão 24 h); as vencidas são
+# apagadas periodicamente pelo próprio processo e por `flask idempotency-cleanup`.
+# Uma reserva processing mais velha que EASYSTOCK_IDEMPOTENCY_LOCK_SECONDS (processo
+# caiu no meio) pode ser retomada. Corpos acima de EASYSTOCK_IDEMPOTENCY_MAX_BODY
+# (uploads grandes) passam sem idempotência. Sem o cabeçalho nada muda.
+# ======================================================================================
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Response, g, jsonify, request
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.models import db, IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL = int(os.getenv('EASYSTOCK_IDEMPOTENCY_TTL', str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('EASYSTOCK_IDEMPOTENCY_LOCK_SECONDS', '60'))
+IDEMPOTENCY_MAX_BODY = int(os.getenv('EASYSTOCK_IDEMPOTENCY_MAX_BODY', str(1024 * 1024)))
+PURGE_INTERVAL = 300  # segundos entre limpezas automáticas das chaves vencidas
+
+MUTATING_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+MAX_KEY_LENGTH = 255
+
+CLAIMED, REPLAY, IN_PROGRESS, MISMATCH = 'claimed', 'replay', 'in_progress', 'mismatch'
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def request_fingerprint():
+    """sha256 de método, caminho (com query string) e corpo da requisição corrente."""
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.query_string):
+        digest.update(part)
+        digest.update(b'\0')
+    digest.update(request.get_data(cache=True))  # cache: a view ainda lê o corpo
+    return digest.hexdigest()
+
+
+def _stale(row, now):
+    """Chave vencida ou reserva abandonada (processo caiu antes de gravar a resposta)."""
+    if row.expires_at <= now:
+        return True
+    return row.status == 'processing' and row.created_at <= now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+
+
+def claim_key(key, request_hash):
+    """Reserva a chave. Retorna (CLAIMED|REPLAY|IN_PROGRESS|MISMATCH, linha existente ou None)."""
+    table = IdempotencyKey.__table__
+    for _attempt in range(3):
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(table.insert().values(
+                    key=key, request_hash=request_hash, status='processing',
+                    created_at=now, expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL),
+                ))
+            return CLAIMED, None
+        except IntegrityError:
+            pass
+
+        with db.engine.begin() as conn:
+            row = conn.execute(select(table).where(table.c.key == key)).first()
+            if row is None:
+                continue  # apagada entre o INSERT e o SELECT
+            if _stale(row, now):
+                # só apaga a mesma reserva que leu (outro processo pode ter retomado)
+                conn.execute(table.delete().where(table.c.key == key, table.c.created_at == row.created_at))
+                continue
+        if row.request_hash != request_hash:
+            return MISMATCH, row
+        if row.status != 'done':
+            return IN_PROGRESS, row
+        return REPLAY, row
+    return IN_PROGRESS, None
+
+
+def store_response(key, response):
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.key == key).values(
+            status='done',
+            status_code=response.status_code,
+            content_type=response.content_type,
+            response_body=response.get_data(),
+        ))
+
+
+def release_key(key):
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.delete().where(table.c.key == key, table.c.status == 'processing'))
+
+
+def replay_response(row):
+    response = Response(row.response_body or b'', status=row.status_code, content_type=row.content_type)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def purge_expired(now=None):
+    """Apaga as chaves vencidas. Retorna quantas foram apagadas."""
+    table = IdempotencyKey.__table__
+    with db.engine.begin() as conn:
+        return conn.execute(table.delete().where(table.c.expires_at <= (now or datetime.utcnow()))).rowcount
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.monotonic()
+    with _purge_lock:
+        if now - _last_purge < PURGE_INTERVAL:
+            return
+        _last_purge = now
+    try:
+        purge_expired()
+    except SQLAlchemyError:
+        logger.exception('Falha ao apagar chaves de idempotência vencidas')
+
+
+# --------------------------------------------------------------------------------------
+# Hooks da requisição
+# --------------------------------------------------------------------------------------
+def _before_request():
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None or request.method not in MUTATING_METHODS or not request.path.startswith('/api/'):
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return jsonify({'error': f'{IDEMPOTENCY_HEADER} deve ter de 1 a {MAX_KEY_LENGTH} caracteres'}), 400
+    if (request.content_length or 0) > IDEMPOTENCY_MAX_BODY:
+        return None
+
+    _maybe_purge()
+    outcome, row = claim_key(key, request_fingerprint())
+    if outcome == CLAIMED:
+        g.idempotency_key = key
+        return None
+    if outcome == REPLAY:
+        return replay_response(row)
+    if outcome == MISMATCH:
+        return jsonify({
+            'error': 'IDEMPOTENCY_KEY_REUSED',
+            'message': f'{IDEMPOTENCY_HEADER} já usada em outra requisição',
+        }), 422
+    response = jsonify({
+        'error': 'IDEMPOTENCY_IN_PROGRESS',
+        'message': 'Requisição com esta chave ainda em processamento',
+    })
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _after_request(response):
+    key = g.pop('idempotency_key', None)
+    if key is None:
+        return response
+    try:
+        if response.status_code >= 500 or response.is_streamed:
+            release_key(key)
+        else:
+            store_response(key, response)
+    except SQLAlchemyError:
+        logger.exception('Falha ao gravar a resposta da chave de idempotência %s', key)
+    return response
+
+
+def _teardown_request(exc):
+    # after_request não rodou (exceção não tratada): libera a chave para nova tentativa
+    key = g.pop('idempotency_key', None)
+    if key is not None:
+        try:
+            release_key(key)
+        except SQLAlchemyError:
+            logger.exception('Falha ao liberar a chave de idempotência %s', key)
+
+
+def init_idempotency(app):
+    """Registra os hooks de Idempotency-Key (registre depois da compressão: grava o corpo original)."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,235 @@
+# backend/app/instrumentation.py
+# ======================================================================================
+# Instrumentação opcional por requisição (EASYSTOCK_METRICS=1).
+#
+# - Engine: before/after_cursor_execute medem cada instrução SQL e somam no `g`
+#   da requisição corrente (quantidade + tempo de banco).
+# - Flask: sinais request_started/request_finished medem a latência e consolidam
+#   as métricas por endpoint (regra de URL + método).
+# - Cada resposta leva o cabeçalho Server-Timing (db, app e total), visível no
+#   DevTools do navegador.
+# - GET /api/_metrics expõe tudo no formato texto do Prometheus: histogramas de
+#   latência e de instruções por requisição (N+1 aparece como cauda longa), total
+#   de tempo de banco e as instruções mais lentas. As instruções trazem SQL e nomes
+#   de tabelas, então a rota só existe com EASYSTOCK_METRICS_TOKEN definido e exige
+#   `Authorization: Bearer <token>` (sem token: 404; token errado: 401).
+#
+# As métricas são por processo: com vários workers, cada um responde pelas suas.
+# Respostas em streaming (/export) medem até o início do envio.
+# ======================================================================================
+import hmac
+import os
+import threading
+import time
+
+from flask import Response, abort, g, has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SLOW_STATEMENTS_KEPT = int(os.getenv('EASYSTOCK_METRICS_SLOW_STATEMENTS', '10'))
+METRICS_PATH = '/api/_metrics'
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsRegistry:
+    """Agregados por endpoint; protegido por lock (servidores multi-thread)."""
+
+    def __init__(self, slow_kept=SLOW_STATEMENTS_KEPT):
+        self.slow_kept = slow_kept
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._slow = []  # [(segundos, endpoint, sql)], mais lentas primeiro
+
+    def record(self, endpoint, status, seconds, statements, db_seconds, slowest):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'latency': _Histogram(LATENCY_BUCKETS),
+                    'statements': _Histogram(STATEMENT_BUCKETS),
+                    'db_seconds': 0.0,
+                    'errors': 0,
+                }
+            stats['latency'].observe(seconds)
+            stats['statements'].observe(statements)
+            stats['db_seconds'] += db_seconds
+            if status >= 500:
+                stats['errors'] += 1
+
+            if slowest is not None and self.slow_kept > 0:
+                self._slow.append((slowest[0], endpoint, slowest[1]))
+                self._slow.sort(key=lambda s: s[0], reverse=True)
+                del self._slow[self.slow_kept:]
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            slow = list(self._slow)
+
+        lines = []
+
+        def histogram(name, help_text, key):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for endpoint, stats in endpoints:
+                hist = stats[key]
+                labels = _labels(endpoint)
+                for bound, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.total}')
+                lines.append(f'{name}_sum{{{labels}}} {hist.sum}')
+                lines.append(f'{name}_count{{{labels}}} {hist.total}')
+
+        histogram('easystock_request_duration_seconds', 'Latência das requisições.', 'latency')
+        histogram('easystock_request_db_statements', 'Instruções SQL por requisição.', 'statements')
+
+        lines.append('# HELP easystock_request_db_seconds_total Tempo total gasto no banco.')
+        lines.append('# TYPE easystock_request_db_seconds_total counter')
+        for endpoint, stats in endpoints:
+            lines.append(f'easystock_request_db_seconds_total{{{_labels(endpoint)}}} {stats["db_seconds"]}')
+
+        lines.append('# HELP easystock_request_errors_total Respostas 5xx.')
+        lines.append('# TYPE easystock_request_errors_total counter')
+        for endpoint, stats in endpoints:
+            lines.append(f'easystock_request_errors_total{{{_labels(endpoint)}}} {stats["errors"]}')
+
+        lines.append('# HELP easystock_slow_statement_seconds Instruções SQL mais lentas observadas.')
+        lines.append('# TYPE easystock_slow_statement_seconds gauge')
+        for rank, (seconds, endpoint, sql) in enumerate(slow, start=1):
+            lines.append(
+                f'easystock_slow_statement_seconds{{rank="{rank}",{_labels(endpoint)},'
+                f'statement="{_escape(sql)}"}} {seconds}'
+            )
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slow.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _labels(endpoint):
+    method, rule = endpoint
+    return f'method="{method}",endpoint="{_escape(rule)}"'
+
+
+def _compact_sql(statement, limit=300):
+    sql = ' '.join(statement.split())
+    return sql if len(sql) <= limit else sql[:limit] + '...'
+
+
+# --------------------------------------------------------------------------------------
+# Listeners
+# --------------------------------------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_start')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if not has_request_context() or 'metrics_started' not in g:
+        return
+    g.metrics_statements += 1
+    g.metrics_db_seconds += elapsed
+    if g.metrics_slowest is None or elapsed > g.metrics_slowest[0]:
+        g.metrics_slowest = (elapsed, statement)
+
+
+def _on_request_started(sender, **extra):
+    if request.path == METRICS_PATH:
+        return
+    g.metrics_started = time.perf_counter()
+    g.metrics_statements = 0
+    g.metrics_db_seconds = 0.0
+    g.metrics_slowest = None
+
+
+def _on_request_finished(sender, response, **extra):
+    if 'metrics_started' not in g:
+        return
+    elapsed = time.perf_counter() - g.metrics_started
+    db_seconds = g.metrics_db_seconds
+
+    rule = request.url_rule.rule if request.url_rule is not None else '<sem rota>'
+    slowest = g.metrics_slowest
+    if slowest is not None:
+        slowest = (slowest[0], _compact_sql(slowest[1]))
+    sender.extensions['easystock_metrics'].record(
+        (request.method, rule), response.status_code, elapsed, g.metrics_statements, db_seconds, slowest)
+
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={db_seconds * 1000:.2f};desc="{g.metrics_statements} SQL", '
+        f'app;dur={(elapsed - db_seconds) * 1000:.2f}, '
+        f'total;dur={elapsed * 1000:.2f}'
+    )
+
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def metrics_enabled():
+    return os.getenv('EASYSTOCK_METRICS', '0') == '1'
+
+
+def metrics_token():
+    """Token exigido em /api/_metrics; vazio = rota desligada."""
+    return os.getenv('EASYSTOCK_METRICS_TOKEN', '')
+
+
+def init_instrumentation(app, engine):
+    """Liga os listeners no engine e nos sinais do app e, com token, registra /api/_metrics."""
+    registry = MetricsRegistry()
+    app.extensions['easystock_metrics'] = registry
+
+    for name, fn in (('before_cursor_execute', _before_cursor_execute),
+                     ('after_cursor_execute', _after_cursor_execute)):
+        if not event.contains(engine, name, fn):
+            event.listen(engine, name, fn)
+
+    request_started.connect(_on_request_started, app)
+    request_finished.connect(_on_request_finished, app)
+
+    token = metrics_token()
+    if not token:
+        return registry
+    expected = f'Bearer {token}'.encode()
+
+    def metrics():
+        given = request.headers.get('Authorization', '').encode()
+        if not hmac.compare_digest(given, expected):
+            abort(401)
+        return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule(METRICS_PATH, 'metrics', metrics, methods=['GET'])
+    return registry
@@ -0,0 +1,162 @@
+# backend/app/jobs.py
+# ======================================================================================
+# Jobs em segundo plano (importação de CSV, relatórios longos, varredura de vencidos).
+#
+# - Cada job é uma linha na tabela `jobs`: queued -> running -> done | failed, com
+#   parâmetros e resultado em JSON. O cliente acompanha por GET /api/jobs/<id>.
+# - A execução é num pool de threads do próprio processo (EASYSTOCK_JOB_WORKERS,
+#   padrão 2; 0 desliga e os endpoints voltam a responder sempre de forma síncrona).
+#   O pool é por processo: com vários workers, o job roda no worker que o recebeu.
+# - Handlers são registrados por tipo com @job_handler('tipo') e recebem os params
+#   (dict) já dentro de um app_context; o retorno (serializável) vira o resultado.
+# - Uploads são gravados em EASYSTOCK_JOB_DIR antes de enfileirar (o stream da
+#   requisição não sobrevive a ela) e apagados ao fim do job.
+# ======================================================================================
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import update
+
+from app.models import db, Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv('EASYSTOCK_JOB_WORKERS', '2'))
+JOB_DIR = os.getenv('EASYSTOCK_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'easystock-jobs')
+JOB_RETENTION_DAYS = int(os.getenv('EASYSTOCK_JOB_RETENTION_DAYS', '7'))
+
+_HANDLERS = {}
+_lock = threading.Lock()
+
+
+def job_handler(kind):
+    """Registra a função que executa jobs do tipo `kind`."""
+    def decorator(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def jobs_enabled():
+    return JOB_WORKERS > 0
+
+
+def wants_async(exceeds_threshold):
+    """?async=1 força job, ?async=0 força síncrono; sem o parâmetro vale o limite do endpoint."""
+    if not jobs_enabled():
+        return False
+    flag = (request.args.get('async') or '').strip().lower()
+    if flag in ('1', 'true'):
+        return True
+    if flag in ('0', 'false'):
+        return False
+    return bool(exceeds_threshold)
+
+
+# --------------------------------------------------------------------------------------
+# Pool
+# --------------------------------------------------------------------------------------
+def _executor(app):
+    with _lock:
+        pool = app.extensions.get('easystock_jobs')
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix='easystock-job')
+            app.extensions['easystock_jobs'] = pool
+        return pool
+
+
+def _finish(job_id, **values):
+    db.session.execute(
+        update(Job).where(Job.id == job_id).values(finished_at=datetime.utcnow(), **values)
+    )
+    db.session.commit()
+
+
+def _run(app, job_id):
+    with app.app_context():
+        # "reivindica" o job: só roda se ainda estiver na fila
+        claimed = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', started_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = db.session.get(Job, job_id)
+        params = json.loads(job.params or '{}')
+        handler = _HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f'Tipo de job desconhecido: {job.kind}')
+            result = handler(params)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Job %s (%s) falhou', job_id, job.kind)
+            _finish(job_id, status='failed', error=str(e) or e.__class__.__name__)
+        else:
+            _finish(job_id, status='done', result=json.dumps(result, ensure_ascii=False, default=str))
+        finally:
+            upload = params.get('upload')
+            if upload and os.path.exists(upload):
+                os.remove(upload)
+
+
+def submit_job(kind, params=None):
+    """Grava o job (queued), faz commit e o entrega ao pool. Retorna o Job."""
+    if kind not in _HANDLERS:
+        raise LookupError(f'Tipo de job desconhecido: {kind}')
+    job = Job(kind=kind, status='queued', params=json.dumps(params or {}, ensure_ascii=False))
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    _executor(app).submit(_run, app, job.id)
+    return job
+
+
+def save_upload(file_storage, suffix=''):
+    """Copia um upload (werkzeug FileStorage) para JOB_DIR e devolve o caminho."""
+    os.makedirs(JOB_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix='upload-', suffix=suffix, dir=JOB_DIR)
+    with os.fdopen(fd, 'wb') as fh:
+        file_storage.save(fh)
+    return path
+
+
+def accepted_response(job):
+    """202 Accepted com o id do job e a URL de acompanhamento."""
+    status_url = url_for('jobs.get_job', job_id=job.id)
+    response = jsonify({'jobId': job.id, 'status': job.status, 'statusUrl': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
+# --------------------------------------------------------------------------------------
+# Manutenção
+# --------------------------------------------------------------------------------------
+def cleanup_jobs(retention_days=None, stale_hours=24):
+    """
+    Apaga jobs concluídos mais antigos que `retention_days` e marca como failed os
+    que ficaram queued/running por mais de `stale_hours` (processo reiniciado).
+    Retorna (apagados, interrompidos). Faz commit.
+    """
+    now = datetime.utcnow()
+    retention_days = JOB_RETENTION_DAYS if retention_days is None else retention_days
+    interrupted = db.session.execute(
+        update(Job)
+        .where(Job.status.in_(('queued', 'running')), Job.created_at < now - timedelta(hours=stale_hours))
+        .values(status='failed', error='Interrompido (processo reiniciado)', finished_at=now)
+    ).rowcount
+    deleted = Job.query.filter(
+        Job.status.in_(('done', 'failed')), Job.finished_at < now - timedelta(days=retention_days)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted, interrupted
@@ -0,0 +1,52 @@
+# backend/app/json_provider.py
+# ======================================================================================
+# Provider JSON do Flask com orjson (quando instalado).
+#
+# jsonify/app.json.dumps passam a usar orjson, que serializa listas grandes de
+# dicts várias vezes mais rápido que o json da stdlib e já devolve bytes (a
+# resposta não passa por str). Sem orjson, tudo segue no DefaultJSONProvider.
+#
+# Saída equivalente à do provider padrão: datetime/date continuam indo para o
+# `default` do Flask (formato HTTP), Decimal/UUID/dataclass idem; chaves não-str
+# são aceitas. Diferença: caracteres não-ASCII saem em UTF-8 em vez de \uXXXX.
+# sort_keys vem de JSON_SORT_KEYS (chave que o Flask 2.3 deixou de ler).
+# ======================================================================================
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', self.sort_keys)
+
+    def _options(self, pretty=False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # argumentos extras (indent, separators, cls...) só o json da stdlib entende
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def json_backend():
+    return 'orjson' if orjson is not None else 'json'
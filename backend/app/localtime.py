@@ -0,0 +1,30 @@
+# backend/app/localtime.py
+# ======================================================================================
+# Fuso da loja (EASYSTOCK_TIMEZONE, padrão America/Sao_Paulo, igual à UI).
+# "Hoje" para vencimentos, aging e recortes do dashboard vem daqui, e não de
+# date.today() (fuso do servidor, em geral UTC): às 22h em Brasília já é amanhã em
+# UTC e uma parcela que vence hoje viraria VENCIDO antes da hora.
+# ======================================================================================
+import os
+from datetime import datetime, timezone
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+
+
+def local_tz():
+    """Fuso usado para recortar dia/hora (padrão America/Sao_Paulo, igual à UI)."""
+    name = os.getenv('EASYSTOCK_TIMEZONE', 'America/Sao_Paulo')
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(name)
+        except Exception:
+            pass
+    return timezone.utc
+
+
+def local_today():
+    """Data corrente no fuso da loja."""
+    return datetime.now(local_tz()).date()
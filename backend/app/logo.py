@@ -0,0 +1,110 @@
+# backend/app/logo.py
+# ======================================================================================
+# Logo da empresa como binário (company_settings.logo_data) em vez de base64 no JSON.
+#
+# - normalize_logo(): valida o formato pelos bytes iniciais (PNG, JPEG, GIF, WEBP) e
+#   reduz imagens maiores que EASYSTOCK_LOGO_MAX_SIDE (px) ou que
+#   EASYSTOCK_LOGO_TARGET_BYTES, re-codificando uma única vez na gravação (PNG se
+#   houver transparência, JPEG caso contrário). Pillow é dependência obrigatória
+#   (requirements.txt).
+# - EASYSTOCK_LOGO_MAX_PIXELS limita largura × altura declaradas no cabeçalho, antes
+#   de decodificar: um PNG de poucos KiB pode declarar 50000×50000 px e ocupar
+#   gigabytes ao ser carregado (decompression bomb). Acima do limite -> LogoError (400).
+# - O sha256 do conteúdo final é o ETag e entra na URL (?v=) publicada em
+#   /api/settings/company: a URL muda quando o logo muda, então a resposta do
+#   logo pode ser cacheada pelo navegador por tempo indeterminado.
+# ======================================================================================
+import base64
+import binascii
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+LOGO_MAX_BYTES = int(os.getenv('EASYSTOCK_LOGO_MAX_BYTES', str(5 * 1024 * 1024)))    # upload aceito
+LOGO_TARGET_BYTES = int(os.getenv('EASYSTOCK_LOGO_TARGET_BYTES', str(256 * 1024)))   # acima disso, re-codifica
+LOGO_MAX_SIDE = int(os.getenv('EASYSTOCK_LOGO_MAX_SIDE', '512'))
+LOGO_MAX_PIXELS = int(os.getenv('EASYSTOCK_LOGO_MAX_PIXELS', str(25_000_000)))     # ~ 5000 x 5000
+
+_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+class LogoError(ValueError):
+    """Arquivo de logo vazio, grande demais ou em formato não suportado."""
+
+
+def sniff_mimetype(data):
+    for signature, mimetype in _SIGNATURES:
+        if data.startswith(signature):
+            return mimetype
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def decode_data_url(value):
+    """'data:image/png;base64,....' (ou só o base64) -> bytes. Formato antigo de logoBase64."""
+    payload = value.split(',', 1)[1] if value.startswith('data:') else value
+    try:
+        return base64.b64decode(payload, validate=False)
+    except (binascii.Error, ValueError):
+        raise LogoError('Logo em base64 inválido')
+
+
+def _reencode(data):
+    with Image.open(io.BytesIO(data)) as img:
+        # open() só lê o cabeçalho: checa as dimensões antes de alocar os pixels
+        if img.width * img.height > LOGO_MAX_PIXELS:
+            raise LogoError(f'Logo com dimensões grandes demais ({img.width}x{img.height} px)')
+        img.load()
+        too_big = max(img.size) > LOGO_MAX_SIDE
+        if not too_big and len(data) <= LOGO_TARGET_BYTES:
+            return None
+        if too_big:
+            img.thumbnail((LOGO_MAX_SIDE, LOGO_MAX_SIDE))
+
+        out = io.BytesIO()
+        if img.mode in ('RGBA', 'LA', 'P') or 'transparency' in img.info:
+            img.convert('RGBA').save(out, format='PNG', optimize=True)
+            mimetype = 'image/png'
+        else:
+            img.convert('RGB').save(out, format='JPEG', quality=85, optimize=True)
+            mimetype = 'image/jpeg'
+    encoded = out.getvalue()
+    # re-codificar só vale a pena se reduziu
+    if not too_big and len(encoded) >= len(data):
+        return None
+    return encoded, mimetype
+
+
+def normalize_logo(data):
+    """
+    Valida e, se preciso, reduz o logo. Retorna (bytes, mimetype, sha256_hex).
+    Levanta LogoError para conteúdo vazio, grande demais ou que não é imagem.
+    """
+    if not data:
+        raise LogoError('Arquivo de logo vazio')
+    if len(data) > LOGO_MAX_BYTES:
+        raise LogoError(f'Logo maior que o limite de {LOGO_MAX_BYTES // 1024} KiB')
+    mimetype = sniff_mimetype(data)
+    if mimetype is None:
+        raise LogoError('Formato de logo não suportado (use PNG, JPEG, GIF ou WEBP)')
+
+    try:
+        reencoded = _reencode(data)
+    except LogoError:
+        raise
+    except Image.DecompressionBombError:  # limite do próprio Pillow (frames de GIF/WEBP etc.)
+        raise LogoError('Logo com dimensões grandes demais')
+    except (OSError, ValueError):
+        raise LogoError('Não foi possível ler a imagem do logo')
+    if reencoded is not None:
+        data, mimetype = reencoded
+
+    return data, mimetype, hashlib.sha256(data).hexdigest()
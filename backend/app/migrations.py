@@ -0,0 +1,222 @@
+# backend/app/migrations.py
+# ======================================================================================
+# Migrações versionadas do schema.
+#
+# db.create_all() só cria tabelas que ainda não existem: bancos já em uso nunca
+# recebem colunas ou índices novos. Cada migração abaixo é idempotente (checa antes
+# de criar) e é registrada em schema_migrations; upgrade_schema() aplica, em ordem,
+# as versões que faltam. Roda na inicialização (EASYSTOCK_AUTO_MIGRATE=0 desliga)
+# e via `flask db-upgrade`. Funciona em SQLite e Postgres.
+# ======================================================================================
+from datetime import datetime
+
+from sqlalchemy import inspect as sa_inspect, text, Integer
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, SchemaMigration, generate_uuid
+from app.logo import LogoError, decode_data_url, normalize_logo
+from app.search import SPECS as SEARCH_SPECS, sqlite_ddl as search_sqlite_ddl
+
+
+# --------------------------------------------------------------------------------------
+# Helpers
+# --------------------------------------------------------------------------------------
+def _has_column(conn, table, column):
+    return column in {c['name'] for c in sa_inspect(conn).get_columns(table)}
+
+
+def _add_column_if_missing(conn, table, column, ddl):
+    """ddl: tipo + restrições, ex.: "BOOLEAN NOT NULL DEFAULT 1"."""
+    if not _has_column(conn, table, column):
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+
+def _create_indexes(conn, names):
+    """Cria (se não existirem) os índices declarados nos modelos com esses nomes."""
+    wanted = set(names)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in wanted:
+                index.create(conn, checkfirst=True)
+                wanted.discard(index.name)
+    if wanted:
+        raise RuntimeError(f'Índices não declarados nos modelos: {sorted(wanted)}')
+
+
+# --------------------------------------------------------------------------------------
+# Migrações (versão, descrição, função(conn))
+# --------------------------------------------------------------------------------------
+def _m0001_products_is_active(conn):
+    true_literal = 'TRUE' if conn.dialect.name == 'postgresql' else '1'
+    _add_column_if_missing(conn, 'products', 'is_active', f'BOOLEAN NOT NULL DEFAULT {true_literal}')
+
+
+def _m0002_hot_path_indexes(conn):
+    _create_indexes(conn, [
+        'ix_customers_created_at',
+        'ix_customer_interactions_customer_id',
+        'ix_products_is_active_created_at',
+        'ix_products_created_at',
+        'ix_product_history_product_id_changed_at',
+        'ix_sales_status_created_at',
+        'ix_sales_created_at',
+        'ix_sales_customer_id_created_at',
+        'ix_sale_items_sale_id',
+        'ix_sale_items_product_id',
+        'ix_sale_payments_sale_id_due_date',
+        'ix_sale_payments_due_date',
+        'ix_sale_payments_status_due_date',
+        'ix_financial_entries_due_date',
+        'ix_financial_entries_status_due_date',
+        'ix_returns_sale_id',
+        'ix_returns_customer_id',
+        'ix_returns_created_at',
+        'ix_return_items_return_id',
+        'ix_customer_credits_customer_id_created_at',
+    ])
+
+
+# Colunas monetárias que passaram de Float (reais) para inteiro (centavos) — ver app/money.py
+MONEY_COLUMNS = {
+    'products': ('price', 'cost'),
+    'sales': ('subtotal', 'freight', 'total'),
+    'sale_items': ('price',),
+    'sale_payments': ('amount',),
+    'financial_entries': ('amount',),
+    'returns': ('total',),
+    'return_items': ('price',),
+    'customer_credits': ('amount', 'balance'),
+    'sales_hourly_rollup': ('revenue', 'returns_total'),
+    'receivables_rollup': ('amount',),
+}
+
+
+def _m0003_money_to_cents(conn):
+    inspector = sa_inspect(conn)
+    for table, columns in MONEY_COLUMNS.items():
+        if not inspector.has_table(table):
+            continue
+        declared = {c['name']: c['type'] for c in inspector.get_columns(table)}
+        for column in columns:
+            # tabela criada já com o tipo novo (inteiro): nada a converter
+            if column not in declared or isinstance(declared[column], Integer):
+                continue
+            if conn.dialect.name == 'postgresql':
+                conn.execute(text(
+                    f'ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT '
+                    f'USING ROUND({column} * 100)::bigint'))
+            else:
+                # SQLite não altera o tipo declarado; o valor passa a ser centavos
+                # (inteiro exato, lido/normalizado pelo tipo Money)
+                conn.execute(text(f'UPDATE {table} SET {column} = CAST(ROUND({column} * 100) AS INTEGER)'))
+
+
+def _m0004_company_logo_binary(conn):
+    blob = 'BYTEA' if conn.dialect.name == 'postgresql' else 'BLOB'
+    _add_column_if_missing(conn, 'company_settings', 'logo_data', blob)
+    _add_column_if_missing(conn, 'company_settings', 'logo_mime', 'VARCHAR(50)')
+    _add_column_if_missing(conn, 'company_settings', 'logo_hash', 'VARCHAR(64)')
+    if not _has_column(conn, 'company_settings', 'logo_base64'):
+        return
+
+    # logo antigo (data URL em texto) -> binário; a coluna antiga fica vazia
+    rows = conn.execute(text(
+        "SELECT id, logo_base64 FROM company_settings WHERE logo_base64 IS NOT NULL AND logo_base64 != ''"
+    )).all()
+    for row_id, value in rows:
+        try:
+            data, mimetype, digest = normalize_logo(decode_data_url(value))
+        except LogoError:
+            continue
+        conn.execute(
+            text('UPDATE company_settings SET logo_data = :d, logo_mime = :m, logo_hash = :h WHERE id = :id'),
+            {'d': data, 'm': mimetype, 'h': digest, 'id': row_id},
+        )
+    conn.execute(text('UPDATE company_settings SET logo_base64 = NULL'))
+
+
+def _m0005_search_fts(conn):
+    # SQLite: FTS5 + triggers; nos demais bancos a busca usa o índice em memória
+    if conn.dialect.name != 'sqlite':
+        return
+    for spec in SEARCH_SPECS.values():
+        for statement in search_sqlite_ddl(spec):
+            conn.exec_driver_sql(statement)
+
+
+SYNC_TABLES = ('products', 'customers', 'sales', 'financial_entries')
+
+
+def _m0006_sync_versions(conn):
+    timestamp = 'TIMESTAMP' if conn.dialect.name == 'postgresql' else 'DATETIME'
+    for table in SYNC_TABLES:
+        _add_column_if_missing(conn, table, 'sync_version', 'BIGINT NOT NULL DEFAULT 0')
+        _add_column_if_missing(conn, table, 'updated_at', timestamp)
+    _create_indexes(conn, [f'ix_{table}_sync_version' for table in SYNC_TABLES])
+    conn.execute(text(
+        'INSERT INTO sync_state (id, version, pruned_version) '
+        'SELECT 1, 0, 0 WHERE NOT EXISTS (SELECT 1 FROM sync_state WHERE id = 1)'
+    ))
+
+
+def _m0007_customer_credit_balance(conn):
+    _add_column_if_missing(conn, 'customers', 'credit_balance', 'BIGINT NOT NULL DEFAULT 0')
+    _create_indexes(conn, ['ix_customer_credits_open'])
+    conn.execute(text(
+        'UPDATE customers SET credit_balance = COALESCE('
+        '(SELECT SUM(c.balance) FROM customer_credits c WHERE c.customer_id = customers.id), 0)'
+    ))
+    # o livro começa com o saldo já existente de cada cliente
+    now = datetime.utcnow()
+    rows = conn.execute(text('SELECT id, credit_balance FROM customers WHERE credit_balance > 0')).all()
+    if rows:
+        conn.execute(
+            text('INSERT INTO customer_credit_movements '
+                 '(id, customer_id, credit_id, kind, amount, balance_after, reference, created_at) '
+                 "VALUES (:id, :customer_id, NULL, 'SALDO_INICIAL', :cents, :cents, NULL, :now)"),
+            [{'id': generate_uuid(), 'customer_id': r.id, 'cents': int(r.credit_balance), 'now': now}
+             for r in rows],
+        )
+
+
+MIGRATIONS = [
+    (1, 'products.is_active', _m0001_products_is_active),
+    (2, 'índices das consultas principais', _m0002_hot_path_indexes),
+    (3, 'valores monetários em centavos', _m0003_money_to_cents),
+    (4, 'logo da empresa em binário', _m0004_company_logo_binary),
+    (5, 'índices de busca (FTS5) de produtos e clientes', _m0005_search_fts),
+    (6, 'versões de sincronização (delta-sync)', _m0006_sync_versions),
+    (7, 'saldo de crédito mantido por cliente + livro de movimentações', _m0007_customer_credit_balance),
+]
+
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def current_version():
+    return db.session.query(db.func.max(SchemaMigration.version)).scalar() or 0
+
+
+def upgrade_schema():
+    """
+    Aplica as migrações pendentes, cada uma na sua própria transação.
+    Retorna a lista de versões aplicadas nesta chamada.
+    """
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    applied = {v for (v,) in db.session.query(SchemaMigration.version).all()}
+    db.session.commit()
+
+    done = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                migrate(conn)
+                conn.execute(SchemaMigration.__table__.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # outro processo (worker) aplicou a mesma versão em paralelo
+            continue
+        done.append(version)
+    return done
@@ -1,9 +1,12 @@
 # backend/app/models.py
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import json
 import uuid
 from sqlalchemy import text  # para server_default
 
+from app.money import Money  # valores monetários: centavos inteiros no banco
+
 db = SQLAlchemy()
 
 def generate_uuid():
@@ -25,7 +28,18 @@ class Customer(db.Model):
     cpf_cnpj = db.Column(db.String(20), nullable=False, unique=True)
     phone = db.Column(db.String(20), nullable=False)
     address = db.Column(db.String(200), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    # saldo de crédito (soma de customer_credits.balance), mantido por app/credits.py
+    credit_balance = db.Column(Money, nullable=False, default=0, server_default=text('0'))
+
+    # delta-sync (app/sync.py): versão da última escrita e quando ela ocorreu
+    sync_version = db.Column(db.BigInteger, nullable=False, default=0, server_default=text('0'))
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_customers_sync_version', 'sync_version', 'id'),
+    )
 
     def to_dict(self):
         return {
@@ -45,7 +59,7 @@ class CustomerInteraction(db.Model):
     __tablename__ = 'customer_interactions'
 
     id = db.Column(db.String, primary_key=True, default=generate_uuid)
-    customer_id = db.Column(db.String, db.ForeignKey('customers.id'), nullable=False)
+    customer_id = db.Column(db.String, db.ForeignKey('customers.id'), nullable=False, index=True)
     type = db.Column(db.String, nullable=False)
     notes = db.Column(db.Text, nullable=False)
     date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -62,8 +76,8 @@ class Product(db.Model):
     sku = db.Column(db.String, nullable=False, unique=True, default=generate_sku)
     marca = db.Column(db.String, nullable=False)  # obrigatório
     tipo = db.Column(db.String, nullable=True)    # opcional
-    price = db.Column(db.Float, nullable=False)
-    cost = db.Column(db.Float, nullable=False)
+    price = db.Column(Money, nullable=False)
+    cost = db.Column(Money, nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     min_stock = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -71,8 +85,19 @@ class Product(db.Model):
     # Status lógico (ativo/inativo)
     is_active = db.Column(db.Boolean, nullable=False, default=True, server_default=text('1'))
 
+    # delta-sync (app/sync.py): versão da última escrita e quando ela ocorreu
+    sync_version = db.Column(db.BigInteger, nullable=False, default=0, server_default=text('0'))
+    updated_at = db.Column(db.DateTime, nullable=True)
+
     history = db.relationship('ProductHistory', backref='product', lazy=True)
 
+    __table_args__ = (
+        # listagem padrão: ativos ordenados por criação (keyset created_at, id)
+        db.Index('ix_products_is_active_created_at', 'is_active', 'created_at', 'id'),
+        db.Index('ix_products_created_at', 'created_at', 'id'),
+        db.Index('ix_products_sync_version', 'sync_version', 'id'),
+    )
+
 
 # -----------------------------
 # ProductHistory
@@ -87,6 +112,10 @@ class ProductHistory(db.Model):
     old_value = db.Column(db.String, nullable=True)
     new_value = db.Column(db.String, nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_product_history_product_id_changed_at', 'product_id', 'changed_at'),
+    )
+
 
 # -----------------------------
 # Sale
@@ -100,11 +129,11 @@ class Sale(db.Model):
     status = db.Column(db.String, nullable=False)  # QUOTE | COMPLETED | CANCELLED
 
     # Campos financeiros
-    subtotal = db.Column(db.Float, nullable=False, default=0.0)
+    subtotal = db.Column(Money, nullable=False, default=0)
     discount_type = db.Column(db.String, nullable=True)   # 'PERCENT' | 'VALUE' | None
     discount_value = db.Column(db.Float, nullable=False, default=0.0)  # percentual ou valor
-    freight = db.Column(db.Float, nullable=False, default=0.0)
-    total = db.Column(db.Float, nullable=False, default=0.0)
+    freight = db.Column(Money, nullable=False, default=0)
+    total = db.Column(Money, nullable=False, default=0)
 
     # Pagamento (opcional)
     payment_method = db.Column(db.String, nullable=True)  # PIX|DINHEIRO|CARTAO_CREDITO|CARTAO_DEBITO|BOLETO
@@ -115,9 +144,22 @@ class Sale(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # delta-sync (app/sync.py): versão da última escrita e quando ela ocorreu
+    sync_version = db.Column(db.BigInteger, nullable=False, default=0, server_default=text('0'))
+    updated_at = db.Column(db.DateTime, nullable=True)
+
     items = db.relationship('SaleItem', backref='sale', lazy=True)
     payments = db.relationship('SalePayment', backref='sale', lazy=True, order_by='SalePayment.due_date')
 
+    __table_args__ = (
+        # listagens/relatórios: filtro por status + período, ordenação (created_at, id)
+        db.Index('ix_sales_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_sales_created_at', 'created_at', 'id'),
+        # compras do cliente
+        db.Index('ix_sales_customer_id_created_at', 'customer_id', 'created_at'),
+        db.Index('ix_sales_sync_version', 'sync_version', 'id'),
+    )
+
 
 # -----------------------------
 # SaleItem
@@ -126,11 +168,11 @@ class SaleItem(db.Model):
     __tablename__ = 'sale_items'
 
     id = db.Column(db.String, primary_key=True, default=generate_uuid)
-    sale_id = db.Column(db.String, db.ForeignKey('sales.id'), nullable=False)
-    product_id = db.Column(db.String, nullable=False)
+    sale_id = db.Column(db.String, db.ForeignKey('sales.id'), nullable=False, index=True)
+    product_id = db.Column(db.String, nullable=False, index=True)
     product_name = db.Column(db.String, nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(Money, nullable=False)
 
 
 # -----------------------------
@@ -142,9 +184,29 @@ class SalePayment(db.Model):
     id = db.Column(db.String, primary_key=True, default=generate_uuid)
     sale_id = db.Column(db.String, db.ForeignKey('sales.id'), nullable=False)
     due_date = db.Column(db.Date, nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     payment_method = db.Column(db.String, nullable=False)   # mesma enum textual usada em Sale.payment_method
-    status = db.Column(db.String, nullable=False, default='PENDENTE')  # PENDENTE|PAGO|CANCELADO
+    status = db.Column(db.String, nullable=False, default='PENDENTE')  # PENDENTE|VENCIDO|PAGO|CANCELADO
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_sale_payments_sale_id_due_date', 'sale_id', 'due_date'),
+        db.Index('ix_sale_payments_due_date', 'due_date'),
+        db.Index('ix_sale_payments_status_due_date', 'status', 'due_date'),
+    )
+
+
+# -----------------------------
+# StockReservation (estoque separado para orçamentos até valid_until)
+# -----------------------------
+class StockReservation(db.Model):
+    __tablename__ = 'stock_reservations'
+
+    id = db.Column(db.String, primary_key=True, default=generate_uuid)
+    sale_id = db.Column(db.String, db.ForeignKey('sales.id'), nullable=False, index=True)
+    product_id = db.Column(db.String, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
@@ -157,12 +219,23 @@ class FinancialEntry(db.Model):
     id = db.Column(db.String, primary_key=True, default=generate_uuid)
     type = db.Column(db.String, nullable=False)            # RECEITA | DESPESA
     description = db.Column(db.String, nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Money, nullable=False)
     due_date = db.Column(db.Date, nullable=False)
     payment_method = db.Column(db.String, nullable=False)  # PIX|DINHEIRO|...
-    status = db.Column(db.String, nullable=False, default='PENDENTE')
+    status = db.Column(db.String, nullable=False, default='PENDENTE')  # PENDENTE|VENCIDO|PAGO
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # delta-sync (app/sync.py): versão da última escrita e quando ela ocorreu
+    sync_version = db.Column(db.BigInteger, nullable=False, default=0, server_default=text('0'))
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # listagem ordenada por (due_date, id) e filtros de status/vencimento
+        db.Index('ix_financial_entries_due_date', 'due_date', 'id'),
+        db.Index('ix_financial_entries_status_due_date', 'status', 'due_date'),
+        db.Index('ix_financial_entries_sync_version', 'sync_version', 'id'),
+    )
+
 
 # -----------------------------
 # ReportGoals
@@ -189,7 +262,10 @@ class CompanySettings(db.Model):
     phone = db.Column(db.String(20), nullable=False)
     email = db.Column(db.String(100), nullable=False)
 
-    logo_base64 = db.Column(db.Text, nullable=True)
+    # Logo em binário (ver app/logo.py); deferred: só é lido por /company/logo
+    logo_data = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    logo_mime = db.Column(db.String(50), nullable=True)
+    logo_hash = db.Column(db.String(64), nullable=True)
     theme_color = db.Column(db.String(20), nullable=True)
     font_size = db.Column(db.String(10), nullable=True)
 
@@ -203,7 +279,6 @@ class CompanySettings(db.Model):
             'address': self.address,
             'phone': self.phone,
             'email': self.email,
-            'logoBase64': self.logo_base64,
             'themeColor': self.theme_color,
             'fontSize': self.font_size,
             'updatedAt': self.updated_at.isoformat() if self.updated_at else None
@@ -218,16 +293,20 @@ class Return(db.Model):
     __tablename__ = 'returns'
 
     id = db.Column(db.String, primary_key=True, default=generate_uuid)
-    sale_id = db.Column(db.String, db.ForeignKey('sales.id'), nullable=False)
-    customer_id = db.Column(db.String, db.ForeignKey('customers.id'), nullable=False)
+    sale_id = db.Column(db.String, db.ForeignKey('sales.id'), nullable=False, index=True)
+    customer_id = db.Column(db.String, db.ForeignKey('customers.id'), nullable=False, index=True)
 
     reason = db.Column(db.Text, nullable=False)
     resolution = db.Column(db.String, nullable=False, default='REEMBOLSO')  # REEMBOLSO|CREDITO
     status = db.Column(db.String, nullable=False, default='ABERTA')         # ABERTA|CONCLUIDA|CANCELADA
 
-    total = db.Column(db.Float, nullable=False, default=0.0)
+    total = db.Column(Money, nullable=False, default=0)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_returns_created_at', 'created_at', 'id'),
+    )
+
     # Relacionamentos
     sale = db.relationship('Sale', backref='returns')
     customer = db.relationship('Customer', backref='returns')
@@ -238,12 +317,12 @@ class ReturnItem(db.Model):
     __tablename__ = 'return_items'
 
     id = db.Column(db.String, primary_key=True, default=generate_uuid)
-    return_id = db.Column(db.String, db.ForeignKey('returns.id'), nullable=False)
+    return_id = db.Column(db.String, db.ForeignKey('returns.id'), nullable=False, index=True)
 
     product_id = db.Column(db.String, db.ForeignKey('products.id'), nullable=False)
     product_name = db.Column(db.String, nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(Money, nullable=False)
 
     product = db.relationship('Product')
 
@@ -255,10 +334,18 @@ class CustomerCredit(db.Model):
     customer_id = db.Column(db.String, db.ForeignKey('customers.id'), nullable=False)
     return_id = db.Column(db.String, db.ForeignKey('returns.id'), nullable=True)
 
-    amount = db.Column(db.Float, nullable=False)   # valor original concedido
-    balance = db.Column(db.Float, nullable=False)  # saldo disponível
+    amount = db.Column(Money, nullable=False)   # valor original concedido
+    balance = db.Column(Money, nullable=False)  # saldo disponível
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    __table_args__ = (
+        # histórico por cliente
+        db.Index('ix_customer_credits_customer_id_created_at', 'customer_id', 'created_at'),
+        # FIFO da liquidação: só créditos com saldo (parcial; a maioria já foi consumida)
+        db.Index('ix_customer_credits_open', 'customer_id', 'created_at', 'id',
+                 sqlite_where=text('balance > 0'), postgresql_where=text('balance > 0')),
+    )
+
     # Relações úteis
     customer = db.relationship('Customer', backref=db.backref('credits', lazy='dynamic'))
     ret = db.relationship('Return')  # se quiser, pode usar backref('credit', uselist=False)
@@ -272,3 +359,171 @@ class CustomerCredit(db.Model):
             "balance": float(self.balance or 0.0),
             "createdAt": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class CustomerCreditMovement(db.Model):
+    """Livro de movimentações de crédito (só INSERT; ver app/credits.py)."""
+    __tablename__ = 'customer_credit_movements'
+
+    id = db.Column(db.String, primary_key=True, default=generate_uuid)
+    customer_id = db.Column(db.String, db.ForeignKey('customers.id'), nullable=False)
+    credit_id = db.Column(db.String, db.ForeignKey('customer_credits.id'), nullable=True)
+
+    kind = db.Column(db.String, nullable=False)          # CONCESSAO|LIQUIDACAO|SALDO_INICIAL
+    amount = db.Column(Money, nullable=False)            # + concessão, - liquidação
+    balance_after = db.Column(Money, nullable=False)     # saldo do cliente após o movimento
+    reference = db.Column(db.String, nullable=True)      # devolução (concessão) ou id da liquidação
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_customer_credit_movements_customer_id_created_at', 'customer_id', 'created_at', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "creditId": self.credit_id,
+            "kind": self.kind,
+            "amount": float(self.amount or 0.0),
+            "balanceAfter": float(self.balance_after or 0.0),
+            "reference": self.reference,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+# =====================================================================
+# Rollups do Dashboard (mantidos incrementalmente por app/rollups.py)
+# =====================================================================
+
+class SalesHourlyRollup(db.Model):
+    """Vendas concluídas e devoluções agregadas por hora (UTC)."""
+    __tablename__ = 'sales_hourly_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    hour = db.Column(db.Integer, primary_key=True)  # 0..23
+
+    sales_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(Money, nullable=False, default=0)
+    returns_count = db.Column(db.Integer, nullable=False, default=0)
+    returns_total = db.Column(Money, nullable=False, default=0)
+
+
+class ReceivablesRollup(db.Model):
+    """Parcelas de venda e lançamentos financeiros agregados por vencimento/forma/status."""
+    __tablename__ = 'receivables_rollup'
+
+    kind = db.Column(db.String, primary_key=True)            # PARCELA | RECEITA | DESPESA
+    due_date = db.Column(db.Date, primary_key=True)
+    payment_method = db.Column(db.String, primary_key=True)
+    status = db.Column(db.String, primary_key=True)
+
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(Money, nullable=False, default=0)
+
+
+class ReceivablesAging(db.Model):
+    """Em aberto (PENDENTE/VENCIDO) por tipo e faixa de atraso; recalculado por app/receivables.py."""
+    __tablename__ = 'receivables_aging'
+
+    kind = db.Column(db.String, primary_key=True)    # PARCELA | RECEITA | DESPESA
+    bucket = db.Column(db.String, primary_key=True)  # A_VENCER | 0-30 | 31-60 | 61-90 | 90+
+
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(Money, nullable=False, default=0)
+    as_of = db.Column(db.Date, nullable=False)           # "hoje" usado nas faixas
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# =====================================================================
+# Jobs em segundo plano (app/jobs.py)
+# =====================================================================
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String, primary_key=True, default=generate_uuid)
+    kind = db.Column(db.String, nullable=False)                      # import_products_csv | report | ...
+    status = db.Column(db.String, nullable=False, default='queued')  # queued|running|done|failed
+    params = db.Column(db.Text, nullable=True)   # JSON
+    result = db.Column(db.Text, nullable=True)   # JSON
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+# =====================================================================
+# Chaves de idempotência das requisições de escrita (app/idempotency.py)
+# =====================================================================
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(255), primary_key=True)                  # cabeçalho Idempotency-Key
+    request_hash = db.Column(db.String(64), nullable=False)            # sha256 de método + caminho + corpo
+    status = db.Column(db.String, nullable=False, default='processing')  # processing | done
+    status_code = db.Column(db.Integer, nullable=True)
+    content_type = db.Column(db.String, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
+
+# =====================================================================
+# Delta-sync (app/sync.py)
+# =====================================================================
+
+class SyncState(db.Model):
+    """Linha única (id=1): contador de versões e até onde as lápides já foram podadas."""
+    __tablename__ = 'sync_state'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    pruned_version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class SyncTombstone(db.Model):
+    """Registro de exclusão de uma linha sincronizável (lápide)."""
+    __tablename__ = 'sync_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String, nullable=False)
+    row_id = db.Column(db.String, nullable=False)
+    sync_version = db.Column(db.BigInteger, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_sync_version', 'sync_version', 'id'),
+    )
+
+
+# =====================================================================
+# Controle de versão do schema (app/migrations.py)
+# =====================================================================
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String, nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
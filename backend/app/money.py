@@ -0,0 +1,112 @@
+# backend/app/money.py
+# ======================================================================================
+# Dinheiro em centavos inteiros.
+#
+# Colunas monetárias usam o tipo Money: no banco ficam como inteiro (centavos) e,
+# no Python/JSON, continuam aparecendo em reais (float com 2 casas), então a API
+# não muda. Toda conta que pode gerar resto — parcelamento, desconto, abatimento
+# de crédito — é feita aqui em centavos (int), sem arredondamentos sucessivos nem
+# epsilons. SUM() de colunas Money é feito no banco, em inteiros, e exato.
+#
+#   to_cents(12.3)        -> 1230         (aceita float, int, str e Decimal, em reais)
+#   from_cents(1230)      -> 12.3
+#   split_cents(1000, 3)  -> [334, 333, 333]
+#   sql_cents(func.sum(SaleItem.price * SaleItem.quantity))  -> resultado em centavos (int)
+# ======================================================================================
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+from sqlalchemy import literal, type_coerce
+from sqlalchemy.sql import operators
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+_CENT = Decimal('0.01')
+
+
+def to_cents(value):
+    """Valor em reais -> centavos (int), arredondando meio centavo para cima."""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        raise ValueError('Valor monetário inválido')
+    try:
+        # str() evita carregar o erro binário do float (0.1 -> '0.1')
+        amount = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f'Valor monetário inválido: {value!r}')
+    if not amount.is_finite():
+        raise ValueError(f'Valor monetário inválido: {value!r}')
+    return int((amount / _CENT).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Centavos -> reais (float) para serialização."""
+    return int(cents or 0) / 100
+
+
+def split_cents(total_cents, parts):
+    """
+    Divide total em `parts` parcelas inteiras cuja soma é exatamente o total.
+    O resto vai, um centavo por vez, para as primeiras parcelas.
+    """
+    parts = max(1, int(parts or 1))
+    base, remainder = divmod(int(total_cents), parts)
+    return [base + (1 if i < remainder else 0) for i in range(parts)]
+
+
+def percent_of_cents(cents, percent):
+    """percent% de um valor em centavos (percent pode ter casas decimais)."""
+    amount = Decimal(int(cents)) * Decimal(str(percent or 0)) / Decimal(100)
+    return int(amount.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def discount_cents(subtotal_cents, discount_type, discount_value):
+    """Desconto em centavos ('PERCENT' ou 'VALUE'), nunca maior que o subtotal."""
+    if not discount_type or not discount_value:
+        return 0
+    if discount_type == 'PERCENT':
+        discount = percent_of_cents(subtotal_cents, discount_value)
+    elif discount_type == 'VALUE':
+        discount = to_cents(discount_value)
+    else:
+        return 0
+    return max(0, min(discount, subtotal_cents))
+
+
+class Money(TypeDecorator):
+    """Coluna monetária: inteiro (centavos) no banco, reais (float) no Python."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # bancos migrados do Float no SQLite guardam o inteiro como REAL: normaliza
+        return from_cents(int(round(value)))
+
+    def coerce_compared_value(self, op, value):
+        # literais comparados/somados a uma coluna Money também são reais -> centavos;
+        # em multiplicação/divisão (quantidade, percentual) o literal fica como está
+        if op in (operators.mul, operators.truediv, operators.floordiv, operators.mod):
+            return literal(value).type
+        return self
+
+
+class Cents(TypeDecorator):
+    """Resultado de expressão SQL sobre colunas Money lido como centavos (int)."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else int(round(value))
+
+
+def sql_cents(expr):
+    """Marca uma expressão (ex.: SUM(preço * qtd)) para ser lida em centavos inteiros."""
+    return type_coerce(expr, Cents)
@@ -0,0 +1,118 @@
+# backend/app/pagination.py
+# ======================================================================================
+# Paginação por keyset (cursor) para os endpoints de listagem.
+#
+# Opt-in: só entra em ação quando o cliente envia ?limit= e/ou ?cursor=.
+# Sem esses parâmetros, os endpoints mantêm o comportamento antigo (array completo).
+#
+# O cursor é opaco para o cliente (base64 de [valor_ordenacao, id]) e aponta para a
+# última linha entregue; a próxima página começa estritamente depois dela, usando
+# (coluna_ordenacao, id) como chave — estável mesmo com valores repetidos.
+# ======================================================================================
+import base64
+import json
+from datetime import date, datetime
+
+from flask import request, jsonify
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, raw):
+    if raw is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    if python_type is date:
+        return date.fromisoformat(raw)
+    return raw
+
+
+def encode_cursor(sort_value, row_id) -> str:
+    payload = json.dumps([_encode_value(sort_value), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort_col):
+    """Retorna (valor_ordenacao, id). Levanta ValueError se o cursor for inválido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        sort_raw, row_id = json.loads(raw.decode('utf-8'))
+        return _decode_value(sort_col, sort_raw), row_id
+    except Exception as e:
+        raise ValueError('Cursor inválido') from e
+
+
+def parse_page_args():
+    """
+    Lê ?limit= e ?cursor= da requisição.
+    Retorna None quando a paginação não foi solicitada (compatibilidade com clientes antigos).
+    """
+    raw_limit = request.args.get('limit')
+    cursor = request.args.get('cursor') or None
+    if raw_limit is None and cursor is None:
+        return None
+
+    try:
+        limit = int(raw_limit) if raw_limit not in (None, '') else DEFAULT_PAGE_LIMIT
+    except ValueError:
+        raise ValueError('Parâmetro limit inválido')
+    if limit < 1:
+        raise ValueError('Parâmetro limit deve ser >= 1')
+    return min(limit, MAX_PAGE_LIMIT), cursor
+
+
+def keyset_page(query, sort_col, id_col, limit, cursor=None, descending=True):
+    """
+    Aplica ordenação (sort_col, id_col) + filtro de keyset e retorna (linhas, next_cursor).
+    Busca limit + 1 linhas para saber se existe próxima página sem um COUNT(*).
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_col)
+        if descending:
+            query = query.filter(or_(sort_col < sort_value, and_(sort_col == sort_value, id_col < last_id)))
+        else:
+            query = query.filter(or_(sort_col > sort_value, and_(sort_col == sort_value, id_col > last_id)))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
+
+
+def keyset_response(query, sort_col, id_col, serialize, descending=True):
+    """
+    Atalho para as rotas de listagem:
+      - None  -> paginação não solicitada; a rota segue o fluxo antigo.
+      - (Response, status) -> { "items": [...], "nextCursor": "..." | null }
+    """
+    try:
+        args = parse_page_args()
+        if args is None:
+            return None
+        limit, cursor = args
+        rows, next_cursor = keyset_page(query, sort_col, id_col, limit, cursor, descending)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'items': [serialize(r) for r in rows], 'nextCursor': next_cursor}), 200
@@ -0,0 +1,200 @@
+# backend/app/product_import.py
+# ======================================================================================
+# Importação de produtos via CSV em streaming.
+#
+# - Decodifica o upload incrementalmente (sem carregar o arquivo inteiro na memória).
+# - Processa em lotes: um SELECT ... WHERE sku IN (...) por lote, INSERT/UPDATE via
+#   Core em executemany e commit por lote (o lock de escrita dura um lote, não o
+#   arquivo todo).
+# - Modo "insert" (padrão): SKUs já existentes são ignorados (comportamento antigo).
+#   Modo "upsert": SKUs existentes têm price/cost/quantity atualizados e o
+#   ProductHistory correspondente é gravado em lote.
+# - Linhas inválidas não abortam a importação: entram no relatório de erros.
+# ======================================================================================
+import codecs
+import csv
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, select
+
+from app.models import db, Product, ProductHistory, generate_uuid, generate_sku
+from app.money import to_cents, from_cents
+from app.stock import mark_stock_changed
+from app.sync import sync_stamp
+
+REQUIRED_FIELDS = ['name', 'sku', 'marca', 'tipo', 'cost', 'price', 'quantity', 'minStock']
+UPSERT_FIELDS = ('price', 'cost', 'quantity')
+IMPORT_MODES = ('insert', 'upsert')
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportHeaderError(ValueError):
+    """Cabeçalho do CSV sem as colunas obrigatórias."""
+
+
+def _parse_row(row):
+    """Converte uma linha do CSV nos valores da tabela products (levanta ValueError)."""
+    name = (row.get('name') or '').strip()
+    marca = (row.get('marca') or '').strip()
+    if not name:
+        raise ValueError('name vazio')
+    if not marca:
+        raise ValueError('marca vazia')
+    try:
+        # normaliza para centavos: o valor comparado no upsert é o mesmo que fica gravado
+        cost = from_cents(to_cents(row.get('cost') or 0))
+        price = from_cents(to_cents(row.get('price') or 0))
+    except ValueError:
+        raise ValueError('cost/price inválido')
+    try:
+        quantity = int(row.get('quantity') or 0)
+        min_stock = int(row.get('minStock') or 0)
+    except ValueError:
+        raise ValueError('quantity/minStock inválido')
+
+    return {
+        'name': name,
+        'sku': (row.get('sku') or '').strip(),
+        'marca': marca,
+        'tipo': (row.get('tipo') or '').strip() or None,
+        'cost': cost,
+        'price': price,
+        'quantity': quantity,
+        'min_stock': min_stock,
+    }
+
+
+class ProductImporter:
+    def __init__(self, mode='insert', batch_size=BATCH_SIZE):
+        if mode not in IMPORT_MODES:
+            raise ValueError(f'Modo inválido: {mode}')
+        self.mode = mode
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+        self._batch = []
+
+    # ----------------------------------------------------------------------------------
+    def run(self, binary_stream, encoding='utf-8-sig'):
+        text_stream = codecs.getreader(encoding)(binary_stream)
+        reader = csv.DictReader(text_stream)
+
+        fieldnames = reader.fieldnames or []
+        missing = [f for f in REQUIRED_FIELDS if f not in fieldnames]
+        if missing:
+            raise ImportHeaderError(f'Campos obrigatórios ausentes. Esperado: {REQUIRED_FIELDS}')
+
+        for row in reader:
+            line = reader.line_num
+            try:
+                values = _parse_row(row)
+            except ValueError as e:
+                self._error(line, row.get('sku'), str(e))
+                continue
+            self._batch.append((line, values))
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+
+        if self._batch:
+            self._flush_batch()
+        return self.report()
+
+    def report(self):
+        return {
+            'mode': self.mode,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'errorCount': self.error_count,
+            'errors': self.errors,
+        }
+
+    # ----------------------------------------------------------------------------------
+    def _error(self, line, sku, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'sku': (sku or '').strip() or None, 'error': message})
+
+    def _flush_batch(self):
+        batch, self._batch = self._batch, []
+
+        # SKU único dentro do lote (no modo insert vale a primeira ocorrência; no upsert, a última)
+        by_sku = {}
+        for line, values in batch:
+            if not values['sku']:
+                sku = generate_sku()
+                while sku in by_sku:
+                    sku = generate_sku()
+                values['sku'] = sku
+            if values['sku'] in by_sku:
+                self.skipped += 1
+                if self.mode == 'insert':
+                    continue
+            by_sku[values['sku']] = (line, values)
+
+        existing = {
+            row.sku: row for row in db.session.execute(
+                select(Product.id, Product.sku, Product.price, Product.cost, Product.quantity)
+                .where(Product.sku.in_(list(by_sku)))
+            )
+        }
+
+        now = datetime.now(timezone.utc)
+        inserts, updates, history, written = [], [], [], []
+        for sku, (line, values) in by_sku.items():
+            current = existing.get(sku)
+            if current is None:
+                inserts.append({**values, 'id': generate_uuid(), 'is_active': True, 'created_at': now})
+                written.append((line, sku))
+                continue
+            if self.mode == 'insert':
+                self.skipped += 1
+                continue
+
+            changed = [f for f in UPSERT_FIELDS if str(getattr(current, f)) != str(values[f])]
+            if not changed:
+                self.skipped += 1
+                continue
+            updates.append({'b_id': current.id, **{f: values[f] for f in UPSERT_FIELDS}})
+            written.append((line, sku))
+            for f in changed:
+                history.append({
+                    'id': generate_uuid(),
+                    'product_id': current.id,
+                    'changed_at': now,
+                    'changed_field': f,
+                    'old_value': str(getattr(current, f)),
+                    'new_value': str(values[f]),
+                })
+
+        try:
+            stamp = sync_stamp() if (inserts or updates) else {}
+            if inserts:
+                db.session.execute(Product.__table__.insert(), [{**row, **stamp} for row in inserts])
+            if updates:
+                table = Product.__table__
+                db.session.execute(
+                    table.update()
+                    .where(table.c.id == bindparam('b_id'))
+                    .values({**{f: bindparam(f) for f in UPSERT_FIELDS}, **stamp}),
+                    updates,
+                )
+            if history:
+                db.session.execute(ProductHistory.__table__.insert(), history)
+            if inserts or updates:
+                mark_stock_changed([row['id'] for row in inserts] + [row['b_id'] for row in updates])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # o lote inteiro falhou (ex.: SKU inserido em paralelo): reporta cada linha
+            for line, sku in written:
+                self._error(line, sku, f'Falha ao gravar lote: {e.__class__.__name__}')
+            return
+
+        self.created += len(inserts)
+        self.updated += len(updates)
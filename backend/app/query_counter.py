@@ -0,0 +1,64 @@
+# backend/app/query_counter.py
+# ======================================================================================
+# Contador de instruções SQL por endpoint.
+#
+# Usado para verificar que um endpoint mantém um número fixo de consultas
+# (sem N+1) independentemente do volume de dados:
+#
+#     with QueryCounter(db.engine) as qc:
+#         client.get('/api/sales/')
+#     assert qc.count <= 5
+#
+# ou, de ponta a ponta, via `flask query-counts`.
+# ======================================================================================
+from sqlalchemy import event
+
+# Endpoints de leitura verificados por `flask query-counts`
+DEFAULT_ENDPOINTS = (
+    '/api/sales/?status=ALL',
+    '/api/sales/quotes/',
+    '/api/customers/',
+    '/api/products/',
+    '/api/financial',
+    '/api/returns',
+    '/api/reports/?start=2000-01-01&end=2100-01-01',
+    '/api/dashboard/',
+)
+
+
+class QueryCounter:
+    """Context manager que registra as instruções executadas no engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+
+def count_endpoint_queries(app, engine, paths=DEFAULT_ENDPOINTS):
+    """
+    Executa GET em cada caminho com o test client e retorna
+    [(caminho, status_http, n_instrucoes)]. Cache-Control: no-cache ignora o
+    cache de respostas (conta as consultas de fato).
+    """
+    results = []
+    client = app.test_client()
+    for path in paths:
+        with QueryCounter(engine) as qc:
+            response = client.get(path, headers={'Cache-Control': 'no-cache'})
+        results.append((path, response.status_code, qc.count))
+    return results
@@ -0,0 +1,42 @@
+# backend/app/query_options.py
+# ======================================================================================
+# Perfis de carregamento (eager loading) por endpoint.
+#
+# As relações em models.py são lazy=True: serializar N vendas acessando sale.items e
+# sale.payments gera 1 + 2N consultas. Cada perfil abaixo lista as opções de
+# carregamento que o serializador do endpoint precisa:
+#   - selectinload  -> coleções (um SELECT ... WHERE fk IN (...) por relação)
+#   - joinedload    -> muitos-para-um (LEFT JOIN na própria consulta)
+# Assim a listagem custa um número fixo de consultas, qualquer que seja o tamanho.
+# ======================================================================================
+from sqlalchemy.orm import selectinload, joinedload
+
+from app.models import Sale, Return
+
+PROFILES = {
+    # sale_to_dict: itens + parcelas
+    'sales.list': (
+        selectinload(Sale.items),
+        selectinload(Sale.payments),
+    ),
+    # compras do cliente: apenas itens
+    'customers.purchases': (
+        selectinload(Sale.items),
+    ),
+    # listagem de devoluções: nome do cliente (ou da venda)
+    'returns.list': (
+        joinedload(Return.customer),
+        joinedload(Return.sale),
+    ),
+    # detalhe da devolução: idem + itens
+    'returns.detail': (
+        joinedload(Return.customer),
+        joinedload(Return.sale),
+        selectinload(Return.items),
+    ),
+}
+
+
+def with_profile(query, name):
+    """Aplica à consulta as opções de carregamento do perfil informado."""
+    return query.options(*PROFILES[name])
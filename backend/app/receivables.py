@@ -0,0 +1,244 @@
+# backend/app/receivables.py
+# ======================================================================================
+# Contas a receber/pagar: varredura de vencidos e tabela de aging.
+#
+# - sweep_overdue(): marca como VENCIDO, com um único UPDATE por tabela, as parcelas
+#   (sale_payments) e lançamentos (financial_entries) PENDENTE com vencimento
+#   anterior a hoje. O UPDATE em massa não passa pelo ORM, então as diferenças do
+#   receivables_rollup (PENDENTE -> VENCIDO) são aplicadas aqui mesmo.
+# - refresh_aging(): recalcula receivables_aging (tipo x faixa de atraso) a partir do
+#   receivables_rollup — O(dias), não O(parcelas). Faixas: A_VENCER, 0-30 (1 a 30
+#   dias de atraso), 31-60, 61-90 e 90+. Gravada por upsert em (kind, bucket):
+#   varreduras concorrentes (cron + agendador de cada worker) não colidem na chave.
+# "Hoje" é o dia no fuso da loja (app/localtime.py), o mesmo do dashboard.
+# - run_sweep(): as duas coisas + commit. Roda via `flask financial-sweep` (cron),
+#   pelo agendador em processo (EASYSTOCK_SWEEP_INTERVAL, segundos) e, sob demanda,
+#   por sweep_if_stale() quando a tabela de aging é de outro dia ou ficou velha
+#   (EASYSTOCK_AGING_MAX_AGE, segundos).
+# ======================================================================================
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects import postgresql as pg_dialect
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+
+from app.money import to_cents, from_cents, sql_cents
+from app.models import db, SalePayment, FinancialEntry, ReceivablesRollup, ReceivablesAging
+from app.rollups import RollupDeltas, apply_deltas, receivable_contribution
+from app.jobs import job_handler
+from app.localtime import local_today
+from app.response_cache import mark_tables_changed
+from app.sync import sync_stamp, touch_sales
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('PARCELA', 'RECEITA', 'DESPESA')
+AGING_BUCKETS = ('A_VENCER', '0-30', '31-60', '61-90', '90+')
+OPEN_STATUSES = ('PENDENTE', 'VENCIDO')
+
+SWEEP_INTERVAL = int(os.getenv('EASYSTOCK_SWEEP_INTERVAL', '0'))
+AGING_MAX_AGE = int(os.getenv('EASYSTOCK_AGING_MAX_AGE', '300'))
+
+
+# --------------------------------------------------------------------------------------
+# Varredura de vencidos
+# --------------------------------------------------------------------------------------
+def _sweep_table(conn, model, kind_col, today, deltas, **values):
+    """UPDATE ... SET status='VENCIDO' (+ values) em uma tabela; acumula as diferenças do rollup."""
+    table = model.__table__
+    cond = (table.c.status == 'PENDENTE', table.c.due_date < today)
+    cols = (kind_col, table.c.due_date, table.c.payment_method, table.c.amount)
+    stmt = update(table).where(*cond).values(status='VENCIDO', **values)
+
+    if conn.dialect.update_returning:
+        rows = conn.execute(stmt.returning(*cols)).all()
+    else:
+        # sem RETURNING: lê as linhas afetadas na mesma transação antes do UPDATE
+        rows = conn.execute(select(*cols).where(*cond)).all()
+        conn.execute(stmt)
+
+    for kind, due_date, method, amount in rows:
+        deltas.add(receivable_contribution(kind, due_date, method, 'PENDENTE', amount), sign=-1)
+        deltas.add(receivable_contribution(kind, due_date, method, 'VENCIDO', amount))
+    return len(rows)
+
+
+def sweep_overdue(today=None):
+    """
+    Marca PENDENTE vencidos como VENCIDO (parcelas e lançamentos). Não faz commit.
+    Retorna {'payments': n, 'entries': n}.
+    """
+    today = today or local_today()
+    conn = db.session.connection()
+    deltas = RollupDeltas()
+    # o status das parcelas faz parte do JSON da venda: carimba as vendas afetadas (delta-sync)
+    payments_table = SalePayment.__table__
+    touch_sales(select(payments_table.c.sale_id)
+                .where(payments_table.c.status == 'PENDENTE', payments_table.c.due_date < today))
+    payments = _sweep_table(conn, SalePayment, literal('PARCELA'), today, deltas)
+    entries = _sweep_table(conn, FinancialEntry, FinancialEntry.__table__.c.type, today, deltas, **sync_stamp())
+    apply_deltas(conn, deltas)
+    if payments or entries:
+        mark_tables_changed(SalePayment.__tablename__, FinancialEntry.__tablename__)
+    return {'payments': payments, 'entries': entries}
+
+
+# --------------------------------------------------------------------------------------
+# Aging
+# --------------------------------------------------------------------------------------
+def _bucket_expr(due_date, today):
+    return case(
+        (due_date >= today, 'A_VENCER'),
+        (due_date >= today - timedelta(days=30), '0-30'),
+        (due_date >= today - timedelta(days=60), '31-60'),
+        (due_date >= today - timedelta(days=90), '61-90'),
+        else_='90+',
+    )
+
+
+def refresh_aging(today=None):
+    """Recalcula receivables_aging a partir do rollup (em aberto: PENDENTE/VENCIDO). Não faz commit."""
+    today = today or local_today()
+    bucket = _bucket_expr(ReceivablesRollup.due_date, today)
+    rows = db.session.execute(
+        select(ReceivablesRollup.kind, bucket,
+               func.sum(ReceivablesRollup.count), sql_cents(func.sum(ReceivablesRollup.amount)))
+        .where(ReceivablesRollup.status.in_(OPEN_STATUSES))
+        .group_by(ReceivablesRollup.kind, bucket)
+    ).all()
+    totals = {(kind, b): (count or 0, cents or 0) for kind, b, count, cents in rows}
+
+    # todas as combinações são gravadas (zeradas inclusive): a tabela sempre diz de quando é
+    now = datetime.utcnow()
+    _upsert_aging(db.session.connection(), [
+        {'kind': kind, 'bucket': b, 'count': totals.get((kind, b), (0, 0))[0],
+         'amount': from_cents(totals.get((kind, b), (0, 0))[1]), 'as_of': today, 'refreshed_at': now}
+        for kind in KINDS for b in AGING_BUCKETS
+    ])
+
+
+_AGING_VALUES = ('count', 'amount', 'as_of', 'refreshed_at')
+
+
+def _upsert_aging(conn, rows):
+    """
+    INSERT ... ON CONFLICT (kind, bucket) DO UPDATE em um único comando. O antigo
+    DELETE + INSERT colidia na chave quando duas varreduras rodavam ao mesmo tempo
+    no Postgres (a segunda não enxerga o INSERT ainda não confirmado da primeira).
+    """
+    table = ReceivablesAging.__table__
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite_dialect.insert if dialect == 'sqlite' else pg_dialect.insert
+        stmt = insert(table).values(rows)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=['kind', 'bucket'],
+            set_={c: stmt.excluded[c] for c in _AGING_VALUES},
+        ))
+        return
+
+    # Fallback genérico: UPDATE e, se nada foi afetado, INSERT
+    for row in rows:
+        values = {c: row[c] for c in _AGING_VALUES}
+        res = conn.execute(table.update()
+                           .where(table.c.kind == row['kind'], table.c.bucket == row['bucket'])
+                           .values(**values))
+        if not res.rowcount:
+            conn.execute(table.insert().values(**row))
+
+
+def run_sweep(today=None):
+    """Varredura + aging em uma transação. Retorna o resultado da varredura."""
+    today = today or local_today()
+    try:
+        result = sweep_overdue(today)
+        refresh_aging(today)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
+
+
+@job_handler('financial_sweep')
+def sweep_job(params):
+    return run_sweep()
+
+
+def aging_is_stale(today=None, max_age=None):
+    today = today or local_today()
+    max_age = AGING_MAX_AGE if max_age is None else max_age
+    row = db.session.execute(
+        select(ReceivablesAging.as_of, ReceivablesAging.refreshed_at).limit(1)
+    ).first()
+    if row is None or row.as_of != today:
+        return True
+    return max_age > 0 and row.refreshed_at < datetime.utcnow() - timedelta(seconds=max_age)
+
+
+def sweep_if_stale(today=None):
+    """Roda a varredura se a tabela de aging não estiver em dia (1 SELECT quando está)."""
+    if aging_is_stale(today):
+        run_sweep(today)
+
+
+def aging_summary():
+    """receivables_aging como dicionário para a API."""
+    rows = ReceivablesAging.query.all()
+    kinds = {kind: {'buckets': {b: {'count': 0, 'amount': 0.0} for b in AGING_BUCKETS},
+                    'openCount': 0, 'openAmount': 0.0, 'overdueAmount': 0.0}
+             for kind in KINDS}
+    cents = {kind: [0, 0] for kind in KINDS}  # [em aberto, vencido]
+    as_of = refreshed_at = None
+
+    for r in rows:
+        if r.kind not in kinds:
+            continue
+        kinds[r.kind]['buckets'][r.bucket] = {'count': r.count, 'amount': r.amount}
+        kinds[r.kind]['openCount'] += r.count
+        cents[r.kind][0] += to_cents(r.amount)
+        if r.bucket != 'A_VENCER':
+            cents[r.kind][1] += to_cents(r.amount)
+        as_of, refreshed_at = r.as_of, r.refreshed_at
+
+    for kind, (open_cents, overdue_cents) in cents.items():
+        kinds[kind]['openAmount'] = from_cents(open_cents)
+        kinds[kind]['overdueAmount'] = from_cents(overdue_cents)
+
+    return {
+        'asOf': as_of.isoformat() if as_of else None,
+        'refreshedAt': refreshed_at.isoformat() if refreshed_at else None,
+        'kinds': kinds,
+    }
+
+
+# --------------------------------------------------------------------------------------
+# Agendador em processo (opcional)
+# --------------------------------------------------------------------------------------
+def start_sweep_scheduler(app, interval=None):
+    """
+    Thread daemon que roda run_sweep() a cada `interval` segundos (0 desliga).
+    Com vários workers cada um roda a sua — a varredura é idempotente.
+    """
+    interval = SWEEP_INTERVAL if interval is None else interval
+    if interval <= 0 or app.extensions.get('easystock_sweep_thread'):
+        return None
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    run_sweep()
+                except Exception:
+                    logger.exception('Falha na varredura de vencidos')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=loop, name='easystock-sweep', daemon=True)
+    thread.start()
+    app.extensions['easystock_sweep_thread'] = (thread, stop)
+    return thread
@@ -0,0 +1,354 @@
+# backend/app/response_cache.py
+# ======================================================================================
+# Cache de respostas GET com invalidação disparada pelas escritas.
+#
+# - @cached_view('tabela', ...) guarda o corpo da resposta 200 por endpoint + args
+#   (view_args e query string). Cada entrada lembra a versão das tabelas de que
+#   depende; um commit que altera uma delas incrementa a versão e a entrada deixa
+#   de valer (não há lista de chaves a apagar).
+# - As tabelas alteradas são coletadas na sessão: before_flush (objetos ORM),
+#   do_orm_execute (INSERT/UPDATE/DELETE via session.execute, inclusive
+#   Query.delete()) e mark_tables_changed() para escritas Core em
+#   session.connection(). No after_commit as versões sobem; rollback descarta.
+# - Toda resposta decorada leva ETag forte (sha1 do corpo) e Cache-Control:
+#   no-cache; com If-None-Match igual a API responde 304 sem corpo. Requisição com
+#   Cache-Control: no-cache ignora a entrada guardada (mas renova o cache).
+#
+# Backends (EASYSTOCK_RESPONSE_CACHE):
+#   memory (padrão) LRU em processo limitado a EASYSTOCK_RESPONSE_CACHE_BYTES;
+#                   versões também em processo: um commit só invalida o worker que
+#                   o fez, os demais servem a entrada até o TTL (padrão: 5 s).
+#   sqlite          arquivo compartilhado entre workers (EASYSTOCK_RESPONSE_CACHE_FILE);
+#                   entradas e versões no arquivo, as mais antigas saem primeiro.
+#                   Use este com vários workers (gunicorn -w N); TTL padrão: 300 s.
+#   off             sem cache (ETag/304 continuam).
+# EASYSTOCK_RESPONSE_CACHE_TTL (segundos) limita a idade de qualquer entrada — cobre
+# o que não passa por commit (ex.: mudança de dia) e, no memory, os outros workers.
+# ======================================================================================
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from itertools import chain
+
+from flask import current_app, make_response, request
+from sqlalchemy import event
+
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv('EASYSTOCK_RESPONSE_CACHE', 'memory').strip().lower()
+CACHE_MAX_BYTES = int(os.getenv('EASYSTOCK_RESPONSE_CACHE_BYTES', str(64 * 1024 * 1024)))
+# memory: TTL curto, é o único limite à defasagem entre workers
+CACHE_TTL = float(os.getenv('EASYSTOCK_RESPONSE_CACHE_TTL', '300' if CACHE_BACKEND == 'sqlite' else '5'))
+CACHE_FILE = os.getenv('EASYSTOCK_RESPONSE_CACHE_FILE') or os.path.join(
+    tempfile.gettempdir(), 'easystock-response-cache.db')
+
+# versions: tupla ordenada de (tabela, versão) vista antes de gerar o corpo
+CachedResponse = namedtuple('CachedResponse', 'body etag mimetype versions expires')
+
+
+# --------------------------------------------------------------------------------------
+# Backends
+# --------------------------------------------------------------------------------------
+class MemoryBackend:
+    """LRU em processo; a soma dos corpos não passa de max_bytes."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tables):
+        with self._lock:
+            return tuple((t, self._versions.get(t, 0)) for t in sorted(tables))
+
+    def bump(self, tables):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class SQLiteBackend:
+    """Arquivo SQLite compartilhado pelos workers; uma conexão por thread."""
+
+    def __init__(self, path=CACHE_FILE, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS response_cache ('
+                ' key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT NOT NULL, mimetype TEXT,'
+                ' versions TEXT NOT NULL, expires REAL NOT NULL, size INTEGER NOT NULL,'
+                ' stored_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_stored_at ON response_cache (stored_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_versions (tbl TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def versions(self, tables):
+        tables = sorted(tables)
+        rows = self._conn().execute(
+            f"SELECT tbl, version FROM cache_versions WHERE tbl IN ({','.join('?' * len(tables))})", tables
+        ).fetchall()
+        found = dict(rows)
+        return tuple((t, found.get(t, 0)) for t in tables)
+
+    def bump(self, tables):
+        self._conn().executemany(
+            'INSERT INTO cache_versions (tbl, version) VALUES (?, 1) '
+            'ON CONFLICT(tbl) DO UPDATE SET version = version + 1',
+            [(t,) for t in tables],
+        )
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT body, etag, mimetype, versions, expires FROM response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, etag, mimetype, versions, expires = row
+        return CachedResponse(bytes(body), etag, mimetype,
+                              tuple(tuple(v) for v in json.loads(versions)), expires)
+
+    def set(self, key, entry):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO response_cache '
+            '(key, body, etag, mimetype, versions, expires, size, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, entry.body, entry.etag, entry.mimetype, json.dumps(entry.versions),
+             entry.expires, size, time.time()),
+        )
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # remove as mais antigas até caber
+        excess, victims = total - self.max_bytes, []
+        for old_key, old_size in conn.execute('SELECT key, size FROM response_cache ORDER BY stored_at'):
+            victims.append((old_key,))
+            excess -= old_size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM response_cache WHERE key = ?', victims)
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM response_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM response_cache')
+
+
+class ResponseCache:
+    """Fachada sobre o backend: valida TTL/versões e nunca derruba a requisição."""
+
+    def __init__(self, backend, ttl=CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    @property
+    def enabled(self):
+        return self.backend is not None and self.ttl > 0
+
+    def _safely(self, fn, *args, default=None):
+        try:
+            return fn(*args)
+        except sqlite3.Error:
+            logger.exception('Cache de respostas indisponível')
+            return default
+
+    def versions(self, tables):
+        return self._safely(self.backend.versions, tables)
+
+    def lookup(self, key, tables):
+        entry = self._safely(self.backend.get, key)
+        if entry is None:
+            return None
+        if entry.expires <= time.time() or entry.versions != self.versions(tables):
+            self._safely(self.backend.delete, key)
+            return None
+        return entry
+
+    def store(self, key, entry):
+        if entry.versions is not None:
+            self._safely(self.backend.set, key, entry)
+
+    def invalidate(self, tables):
+        if self.backend is not None and tables:
+            self._safely(self.backend.bump, tables)
+
+    def clear(self):
+        if self.backend is not None:
+            self._safely(self.backend.clear)
+
+
+def _make_backend(name):
+    if name in ('off', '0', 'none', ''):
+        return None
+    if name == 'sqlite':
+        return SQLiteBackend()
+    if name != 'memory':
+        logger.warning('EASYSTOCK_RESPONSE_CACHE=%r desconhecido; usando memory', name)
+    return MemoryBackend()
+
+
+response_cache = ResponseCache(_make_backend(CACHE_BACKEND))
+
+
+# --------------------------------------------------------------------------------------
+# Invalidação (eventos da sessão)
+# --------------------------------------------------------------------------------------
+def _changed(session):
+    return session.info.setdefault('cache_tables', set())
+
+
+def mark_tables_changed(*tables):
+    """Sinaliza que a transação corrente alterou estas tabelas (para escrita via Core)."""
+    _changed(db.session).update(tables)
+
+
+def _before_flush(session, flush_context, instances):
+    tables = {obj.__table__.name for obj in chain(session.new, session.dirty, session.deleted)
+              if hasattr(obj, '__table__')}
+    if tables:
+        _changed(session).update(tables)
+
+
+def _do_orm_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        name = getattr(getattr(state.statement, 'table', None), 'name', None)
+        if name:
+            _changed(state.session).add(name)
+
+
+def _after_commit(session):
+    tables = session.info.pop('cache_tables', None)
+    if tables:
+        response_cache.invalidate(tables)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('cache_tables', None)
+
+
+_SESSION_EVENTS = (
+    ('before_flush', _before_flush),
+    ('do_orm_execute', _do_orm_execute),
+    ('after_commit', _after_commit),
+    ('after_soft_rollback', _after_soft_rollback),
+)
+
+
+def register_cache_events():
+    """Liga a invalidação do response_cache na sessão do Flask-SQLAlchemy (idempotente)."""
+    for name, fn in _SESSION_EVENTS:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# --------------------------------------------------------------------------------------
+# Decorator das rotas
+# --------------------------------------------------------------------------------------
+def _cache_key():
+    args = sorted(request.args.items(multi=True))
+    view_args = sorted((request.view_args or {}).items())
+    return json.dumps([request.endpoint, view_args, args], separators=(',', ':'), default=str)
+
+
+def conditional_response(response, etag):
+    """ETag forte + revalidação obrigatória; 304 se o cliente já tem este corpo."""
+    # comparação fraca: a compressão (app/compression.py) entrega a ETag como W/"..."
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+def cached_view(*tables, when=None):
+    """
+    Cacheia o GET da rota. `tables`: tabelas de que o corpo depende.
+    `when`: função opcional; se retornar False a resposta não é guardada
+    (ex.: relatório de período ainda aberto). Outros métodos passam direto.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            use_cache = response_cache.enabled and (when is None or when())
+            key = _cache_key() if use_cache else None
+            if use_cache and not request.cache_control.no_cache:
+                entry = response_cache.lookup(key, tables)
+                if entry is not None:
+                    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+                    return conditional_response(response, entry.etag)
+
+            # versões lidas antes de gerar: um commit no meio invalida a entrada
+            versions = response_cache.versions(tables) if use_cache else None
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            body = response.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            if use_cache:
+                response_cache.store(key, CachedResponse(
+                    body, etag, response.mimetype, versions, time.time() + response_cache.ttl))
+            return conditional_response(response, etag)
+        return wrapper
+    return decorator
@@ -0,0 +1,258 @@
+# backend/app/rollups.py
+# ======================================================================================
+# Rollups incrementais do Dashboard.
+#
+# As tabelas sales_hourly_rollup e receivables_rollup são mantidas a partir dos
+# próprios caminhos de escrita: a cada flush da sessão calculamos a "contribuição"
+# antiga e a nova de cada Sale / Return / SalePayment / FinancialEntry alterado e
+# aplicamos a diferença (upsert com soma) na mesma transação. Assim o dashboard lê
+# O(dias) linhas em vez de O(vendas).
+#
+# Escritas que não passam pelo ORM (DELETE/UPDATE em massa, inserts via Core) devem
+# chamar apply_deltas() explicitamente ou, em último caso, rebuild_rollups().
+# ======================================================================================
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import event, inspect, select, delete
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.dialects import postgresql as pg_dialect
+
+from app.money import to_cents, from_cents
+from app.models import (
+    db,
+    Sale,
+    Return,
+    SalePayment,
+    FinancialEntry,
+    SalesHourlyRollup,
+    ReceivablesRollup,
+)
+
+HOURLY_KEYS = ('day', 'hour')
+RECEIVABLE_KEYS = ('kind', 'due_date', 'payment_method', 'status')
+
+
+# --------------------------------------------------------------------------------------
+# Contribuições de cada linha para os rollups
+# --------------------------------------------------------------------------------------
+def _utc_naive(dt):
+    if dt is None:
+        dt = datetime.utcnow()
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _hour_key(dt):
+    dt = _utc_naive(dt)
+    return dt.date(), dt.hour
+
+
+def sale_contribution(status, total, created_at):
+    """Venda concluída soma 1 venda + total na hora (UTC) de criação."""
+    if status != 'COMPLETED':
+        return []
+    return [(SalesHourlyRollup, _hour_key(created_at), {'sales_count': 1, 'revenue': to_cents(total)})]
+
+
+def return_contribution(status, total, created_at):
+    """Devolução não cancelada soma 1 devolução + total na hora (UTC) de criação."""
+    if status == 'CANCELADA':
+        return []
+    return [(SalesHourlyRollup, _hour_key(created_at), {'returns_count': 1, 'returns_total': to_cents(total)})]
+
+
+def receivable_contribution(kind, due_date, payment_method, status, amount):
+    if due_date is None:
+        return []
+    if isinstance(due_date, datetime):
+        due_date = due_date.date()
+    key = (kind, due_date, payment_method or 'OUTRO', status or 'PENDENTE')
+    return [(ReceivablesRollup, key, {'count': 1, 'amount': to_cents(amount)})]
+
+
+def _contribution(obj, values):
+    if isinstance(obj, Sale):
+        return sale_contribution(values['status'], values['total'], values['created_at'])
+    if isinstance(obj, Return):
+        return return_contribution(values['status'], values['total'], values['created_at'])
+    if isinstance(obj, SalePayment):
+        return receivable_contribution('PARCELA', values['due_date'], values['payment_method'],
+                                       values['status'], values['amount'])
+    if isinstance(obj, FinancialEntry):
+        return receivable_contribution(values['type'], values['due_date'], values['payment_method'],
+                                       values['status'], values['amount'])
+    return []
+
+
+_TRACKED_FIELDS = {
+    Sale: ('status', 'total', 'created_at'),
+    Return: ('status', 'total', 'created_at'),
+    SalePayment: ('due_date', 'payment_method', 'status', 'amount'),
+    FinancialEntry: ('type', 'due_date', 'payment_method', 'status', 'amount'),
+}
+
+
+def _current_values(obj, fields):
+    return {f: getattr(obj, f) for f in fields}
+
+
+def _previous_values(obj, fields):
+    """Valores como estavam no banco antes das alterações pendentes."""
+    state = inspect(obj)
+    values = {}
+    for f in fields:
+        hist = state.attrs[f].history
+        if hist.deleted:
+            values[f] = hist.deleted[0]
+        elif hist.unchanged:
+            values[f] = hist.unchanged[0]
+        else:
+            values[f] = getattr(obj, f)
+    return values
+
+
+# --------------------------------------------------------------------------------------
+# Acumulação e aplicação das diferenças
+# --------------------------------------------------------------------------------------
+class RollupDeltas:
+    """Acumula diferenças por (tabela, chave) antes de gravá-las (valores em centavos, int)."""
+
+    def __init__(self):
+        self._data = defaultdict(lambda: defaultdict(int))
+
+    def add(self, contributions, sign=1):
+        for model, key, values in contributions:
+            bucket = self._data[(model, key)]
+            for col, val in values.items():
+                bucket[col] += sign * val
+
+    def __bool__(self):
+        return any(any(v for v in cols.values()) for cols in self._data.values())
+
+    def items(self):
+        for (model, key), cols in self._data.items():
+            cols = {c: v for c, v in cols.items() if v}
+            if cols:
+                yield model, key, cols
+
+
+def _key_names(model):
+    return HOURLY_KEYS if model is SalesHourlyRollup else RECEIVABLE_KEYS
+
+
+def _upsert_add(conn, model, key, deltas):
+    table = model.__table__
+    keys = dict(zip(_key_names(model), key))
+    # contadores vão como estão; valores (centavos) passam pelo tipo Money, que espera reais
+    values = {c: (v if c.endswith('count') else from_cents(v)) for c, v in deltas.items()}
+
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite_dialect.insert if dialect == 'sqlite' else pg_dialect.insert
+        stmt = insert(table).values(**keys, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: table.c[c] + stmt.excluded[c] for c in values},
+        )
+        conn.execute(stmt)
+        return
+
+    # Fallback genérico: UPDATE e, se nada foi afetado, INSERT
+    where = [table.c[k] == v for k, v in keys.items()]
+    res = conn.execute(table.update().where(*where).values({c: table.c[c] + v for c, v in values.items()}))
+    if not res.rowcount:
+        conn.execute(table.insert().values(**keys, **values))
+
+
+def apply_deltas(conn, deltas: RollupDeltas):
+    for model, key, cols in deltas.items():
+        _upsert_add(conn, model, key, cols)
+
+
+# --------------------------------------------------------------------------------------
+# Eventos da sessão
+# --------------------------------------------------------------------------------------
+def _before_flush(session, flush_context, instances):
+    deltas = session.info.setdefault('rollup_deltas', RollupDeltas())
+
+    for obj in session.new:
+        fields = _TRACKED_FIELDS.get(type(obj))
+        if fields:
+            deltas.add(_contribution(obj, _current_values(obj, fields)))
+
+    for obj in session.dirty:
+        fields = _TRACKED_FIELDS.get(type(obj))
+        if fields and session.is_modified(obj, include_collections=False):
+            deltas.add(_contribution(obj, _previous_values(obj, fields)), sign=-1)
+            deltas.add(_contribution(obj, _current_values(obj, fields)))
+
+    for obj in session.deleted:
+        fields = _TRACKED_FIELDS.get(type(obj))
+        if fields:
+            deltas.add(_contribution(obj, _previous_values(obj, fields)), sign=-1)
+
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop('rollup_deltas', None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    session.info.pop('rollup_deltas', None)
+
+
+_SESSION_EVENTS = (
+    ('before_flush', _before_flush),
+    ('after_flush', _after_flush),
+    ('after_soft_rollback', _after_soft_rollback),
+)
+
+
+def register_rollup_events():
+    """Liga os listeners na sessão do Flask-SQLAlchemy (idempotente)."""
+    for name, fn in _SESSION_EVENTS:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# --------------------------------------------------------------------------------------
+# Reconstrução completa (backfill de bancos existentes / correção após escrita em massa)
+# --------------------------------------------------------------------------------------
+def rebuild_rollups(batch_size=1000):
+    """Recalcula os rollups a partir das tabelas base. Faz commit ao final."""
+    conn = db.session.connection()
+    conn.execute(delete(SalesHourlyRollup.__table__))
+    conn.execute(delete(ReceivablesRollup.__table__))
+
+    deltas = RollupDeltas()
+    sources = (
+        (select(Sale.status, Sale.total, Sale.created_at).where(Sale.status == 'COMPLETED'),
+         lambda r: sale_contribution(*r)),
+        (select(Return.status, Return.total, Return.created_at),
+         lambda r: return_contribution(*r)),
+        (select(SalePayment.due_date, SalePayment.payment_method, SalePayment.status, SalePayment.amount),
+         lambda r: receivable_contribution('PARCELA', *r)),
+        (select(FinancialEntry.type, FinancialEntry.due_date, FinancialEntry.payment_method,
+                FinancialEntry.status, FinancialEntry.amount),
+         lambda r: receivable_contribution(*r)),
+    )
+    for stmt, contribution in sources:
+        for row in db.session.execute(stmt.execution_options(yield_per=batch_size)):
+            deltas.add(contribution(tuple(row)))
+
+    apply_deltas(conn, deltas)
+    db.session.commit()
+
+
+def rollups_need_backfill() -> bool:
+    """True quando há vendas/lançamentos mas os rollups estão vazios (banco anterior aos rollups)."""
+    has_rollups = (db.session.query(SalesHourlyRollup.day).first() is not None
+                   or db.session.query(ReceivablesRollup.kind).first() is not None)
+    if has_rollups:
+        return False
+    return (db.session.query(Sale.id).first() is not None
+            or db.session.query(SalePayment.id).first() is not None
+            or db.session.query(FinancialEntry.id).first() is not None)
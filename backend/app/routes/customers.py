@@ -11,7 +11,14 @@ from app.models import (
     Sale,
     SaleItem,
     CustomerCredit,   # novo: usado para endpoints de créditos
+    CustomerCreditMovement,
 )
+from app.money import to_cents, from_cents
+from app.pagination import keyset_response
+from app.query_options import with_profile
+from app.serializers import RowSerializer, iso
+from app.search import search_response
+from app.credits import liquidate_credit, InsufficientCredit, CreditContention
 
 customers_bp = Blueprint('customers', __name__, url_prefix='/api/customers')
 
@@ -52,15 +59,37 @@ def is_valid_cpf_cnpj(value):
 # -----------------------------
 # CRUD Clientes
 # -----------------------------
+# Listagem: mesma saída de Customer.to_dict, lida como tupla de colunas
+CUSTOMER_ROW = RowSerializer(
+    ('id', Customer.id),
+    ('name', Customer.name),
+    ('cpfCnpj', Customer.cpf_cnpj),
+    ('phone', Customer.phone),
+    ('address', Customer.address),
+    ('createdAt', Customer.created_at, iso),
+)
+
+
 @customers_bp.route('/', methods=['GET'])
 def list_customers():
     try:
-        customers = Customer.query.order_by(Customer.created_at.desc()).all()
-        return jsonify([c.to_dict() for c in customers]), 200
+        page = keyset_response(CUSTOMER_ROW.select(Customer.query), Customer.created_at, Customer.id, CUSTOMER_ROW)
+        if page is not None:
+            return page
+
+        rows = CUSTOMER_ROW.select(Customer.query).order_by(Customer.created_at.desc()).all()
+        return jsonify(CUSTOMER_ROW.many(rows)), 200
     except SQLAlchemyError as e:
         return jsonify({'error': 'Erro ao buscar clientes', 'details': str(e)}), 500
 
 
+# GET /api/customers/search?q=...&limit=N&cursor=...
+#   Nome, CPF/CNPJ e telefone (com ou sem pontuação), por relevância -> { items, nextCursor }
+@customers_bp.route('/search', methods=['GET'])
+def search_customers():
+    return search_response('customers', CUSTOMER_ROW, Customer.id)
+
+
 @customers_bp.route('/', methods=['POST'])
 def create_customer():
     data = request.get_json() or {}
@@ -183,7 +212,7 @@ def add_interaction(customer_id):
 def list_purchases(customer_id):
     customer = Customer.query.get_or_404(customer_id)
     purchases = (
-        Sale.query
+        with_profile(Sale.query, 'customers.purchases')
         .filter_by(customer_id=customer.id)
         .order_by(Sale.created_at.desc())
         .all()
@@ -199,7 +228,7 @@ def list_purchases(customer_id):
                     'productName': item.product_name,
                     'quantity': int(item.quantity),
                     'price': float(item.price),
-                    'subtotal': float(item.quantity) * float(item.price),
+                    'subtotal': from_cents(int(item.quantity) * to_cents(item.price)),
                 } for item in sale.items
             ]
         } for sale in purchases
@@ -212,9 +241,10 @@ def list_purchases(customer_id):
 @customers_bp.get("/<customer_id>/credits/")
 def get_customer_credits(customer_id):
     """
-    Retorna saldo total e histórico de créditos do cliente.
+    Retorna saldo total (customers.credit_balance, mantido em app/credits.py) e
+    histórico de créditos do cliente.
     """
-    Customer.query.get_or_404(customer_id)
+    customer = Customer.query.get_or_404(customer_id)
 
     credits = (
         CustomerCredit.query
@@ -222,7 +252,7 @@ def get_customer_credits(customer_id):
         .order_by(asc(CustomerCredit.created_at))
         .all()
     )
-    total_balance = float(sum((c.balance or 0.0) for c in credits))
+    total_balance = float(customer.credit_balance or 0.0)
 
     return jsonify({
         "customerId": customer_id,
@@ -238,50 +268,65 @@ def get_customer_credits(customer_id):
     }), 200
 
 
+MOVEMENT_ROW = RowSerializer(
+    ('id', CustomerCreditMovement.id),
+    ('creditId', CustomerCreditMovement.credit_id),
+    ('kind', CustomerCreditMovement.kind),
+    ('amount', CustomerCreditMovement.amount, float),
+    ('balanceAfter', CustomerCreditMovement.balance_after, float),
+    ('reference', CustomerCreditMovement.reference),
+    ('createdAt', CustomerCreditMovement.created_at, iso),
+)
+
+
+@customers_bp.get("/<customer_id>/credits/movements")
+def list_credit_movements(customer_id):
+    """Livro de movimentações de crédito do cliente (mais recentes primeiro; ?limit=&cursor=)."""
+    Customer.query.get_or_404(customer_id)
+    query = MOVEMENT_ROW.select(CustomerCreditMovement.query.filter_by(customer_id=customer_id))
+    page = keyset_response(query, CustomerCreditMovement.created_at, CustomerCreditMovement.id, MOVEMENT_ROW)
+    if page is not None:
+        return page
+    rows = query.order_by(desc(CustomerCreditMovement.created_at), desc(CustomerCreditMovement.id)).all()
+    return jsonify(MOVEMENT_ROW.many(rows)), 200
+
+
 @customers_bp.post("/<customer_id>/credits/liquidate")
 def liquidate_customer_credit(customer_id):
     """
     Liquida (abate) valor do crédito do cliente usando política FIFO.
     Espera JSON: { "amount": number }
+    Atômica (app/credits.py): saldo insuficiente -> 400; crédito alterado por
+    outra operação no meio -> 409 CREDIT_CONTENTION (repetir a requisição).
     """
     Customer.query.get_or_404(customer_id)
     body = request.get_json(silent=True) or {}
-    amount = float(body.get("amount") or 0.0)
+    try:
+        amount = to_cents(body.get("amount"))  # conta em centavos: sem epsilons
+    except ValueError:
+        amount = 0
 
     if amount <= 0:
         return jsonify({"error": "Valor inválido para liquidação."}), 400
 
-    credits = (
-        CustomerCredit.query
-        .filter_by(customer_id=customer_id)
-        .filter(CustomerCredit.balance > 0.0)
-        .order_by(asc(CustomerCredit.created_at))
-        .all()
-    )
-
-    current_balance = float(sum((c.balance or 0.0) for c in credits))
-    if amount > current_balance + 1e-9:
+    try:
+        liquidation_id, used, new_balance = liquidate_credit(customer_id, amount)
+    except InsufficientCredit as e:
+        db.session.rollback()
         return jsonify({
             "error": "Saldo de crédito insuficiente.",
-            "available": current_balance
+            "available": from_cents(e.available)
         }), 400
-
-    remaining = amount
-    used = []
-    for c in credits:
-        if remaining <= 1e-9:
-            break
-        use_now = float(min(c.balance, remaining))
-        c.balance = float(c.balance) - use_now
-        used.append({"creditId": c.id, "used": use_now})
-        remaining -= use_now
+    except CreditContention as e:
+        db.session.rollback()
+        return jsonify({"error": "CREDIT_CONTENTION", "message": str(e)}), 409
 
     db.session.commit()
 
-    new_balance = max(0.0, current_balance - amount)
     return jsonify({
         "ok": True,
         "customerId": customer_id,
-        "used": used,
-        "newBalance": float(new_balance)
+        "liquidationId": liquidation_id,
+        "used": [{"creditId": credit_id, "used": from_cents(cents)} for credit_id, cents in used],
+        "newBalance": from_cents(new_balance)
     }), 200
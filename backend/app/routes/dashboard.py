@@ -0,0 +1,180 @@
+# backend/app/routes/dashboard.py
+# ======================================================================================
+# KPIs do Dashboard servidos a partir dos rollups (app/rollups.py).
+# Uma carga do dashboard lê O(dias) linhas agregadas em vez de baixar todas as
+# vendas, orçamentos, lançamentos e produtos para agregar no navegador.
+# ======================================================================================
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func
+
+from app.models import db, Sale, Product, SalesHourlyRollup, ReceivablesRollup
+from app.money import from_cents, sql_cents
+from app.routes.sales import sale_to_dict
+from app.query_options import with_profile
+from app.localtime import local_tz
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+RECEIVABLE_STATUSES = ('PAGO', 'PENDENTE', 'VENCIDO')
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _parse_day(value, default):
+    if not value:
+        return default
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    except Exception:
+        raise ValueError('Datas inválidas')
+
+
+def _hourly_rows_local(start_day, end_day, tz):
+    """
+    Linhas do rollup horário (UTC) convertidas para (data_local, hora_local).
+    Busca um dia a mais de cada lado para cobrir o deslocamento do fuso.
+    """
+    rows = (
+        db.session.query(
+            SalesHourlyRollup.day,
+            SalesHourlyRollup.hour,
+            SalesHourlyRollup.sales_count,
+            sql_cents(SalesHourlyRollup.revenue),
+            SalesHourlyRollup.returns_count,
+            sql_cents(SalesHourlyRollup.returns_total),
+        )
+        .filter(SalesHourlyRollup.day >= start_day - timedelta(days=1),
+                SalesHourlyRollup.day <= end_day + timedelta(days=1))
+        .all()
+    )
+    for day, hour, sales_count, revenue, returns_count, returns_total in rows:
+        utc_dt = datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc)
+        local_dt = utc_dt.astimezone(tz)
+        if start_day <= local_dt.date() <= end_day:
+            yield local_dt.date(), local_dt.hour, sales_count, revenue, returns_count, returns_total
+
+
+def _effective_status(status, due_date, today):
+    """PENDENTE com vencimento passado conta como VENCIDO (mesma regra da UI)."""
+    if status == 'PENDENTE' and due_date < today:
+        return 'VENCIDO'
+    return status
+
+
+# -----------------------------
+# GET /api/dashboard/?start=YYYY-MM-DD&end=YYYY-MM-DD&day=YYYY-MM-DD
+#   start/end -> série diária e recebíveis por forma/status (padrão: últimos 30 dias)
+#   day       -> série por hora (padrão: hoje)
+# -----------------------------
+@dashboard_bp.route('/', methods=['GET'])
+def get_dashboard():
+    tz = local_tz()
+    today = datetime.now(tz).date()
+
+    try:
+        end_day = _parse_day(request.args.get('end'), today)
+        start_day = _parse_day(request.args.get('start'), end_day - timedelta(days=29))
+        hourly_day = _parse_day(request.args.get('day'), today)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if start_day > end_day:
+        return jsonify({'error': 'Datas inválidas'}), 400
+
+    # Série diária (período) e por hora (dia escolhido).
+    # Valores somados em centavos (int) e convertidos para reais só na resposta.
+    daily = {}
+    d = start_day
+    while d <= end_day:
+        daily[d] = {'date': d.isoformat(), 'salesCount': 0, 'revenue': 0, 'returnsCount': 0, 'returnsTotal': 0}
+        d += timedelta(days=1)
+    hourly = [{'hour': h, 'salesCount': 0, 'revenue': 0} for h in range(24)]
+
+    span_start, span_end = min(start_day, hourly_day, today), max(end_day, hourly_day, today)
+    sales_today = {'count': 0, 'value': 0}
+    for day, hour, sales_count, revenue, returns_count, returns_total in _hourly_rows_local(span_start, span_end, tz):
+        if day in daily:
+            bucket = daily[day]
+            bucket['salesCount'] += sales_count or 0
+            bucket['revenue'] += revenue or 0
+            bucket['returnsCount'] += returns_count or 0
+            bucket['returnsTotal'] += returns_total or 0
+        if day == hourly_day:
+            hourly[hour]['salesCount'] += sales_count or 0
+            hourly[hour]['revenue'] += revenue or 0
+        if day == today:
+            sales_today['count'] += sales_count or 0
+            sales_today['value'] += revenue or 0
+
+    for bucket in daily.values():
+        bucket['revenue'] = from_cents(bucket['revenue'])
+        bucket['returnsTotal'] = from_cents(bucket['returnsTotal'])
+    for bucket in hourly:
+        bucket['revenue'] = from_cents(bucket['revenue'])
+
+    # Recebíveis (parcelas de venda) por forma/status no período de vencimento
+    by_method_status = defaultdict(lambda: {s: 0 for s in RECEIVABLE_STATUSES})
+    installment_rows = (
+        db.session.query(ReceivablesRollup.due_date, ReceivablesRollup.payment_method,
+                         ReceivablesRollup.status, sql_cents(ReceivablesRollup.amount))
+        .filter(ReceivablesRollup.kind == 'PARCELA',
+                ReceivablesRollup.due_date >= start_day,
+                ReceivablesRollup.due_date <= end_day)
+        .all()
+    )
+    for due_date, method, status, amount in installment_rows:
+        status = _effective_status(status, due_date, today)
+        if status in RECEIVABLE_STATUSES:
+            by_method_status[method][status] += amount or 0
+
+    # Contas a receber / a pagar em aberto (lançamentos financeiros)
+    entry_rows = (
+        db.session.query(ReceivablesRollup.kind, ReceivablesRollup.due_date, ReceivablesRollup.status,
+                         ReceivablesRollup.count, sql_cents(ReceivablesRollup.amount))
+        .filter(ReceivablesRollup.kind.in_(('RECEITA', 'DESPESA')),
+                ReceivablesRollup.status != 'PAGO')
+        .all()
+    )
+    total_receivable = total_payable = 0
+    overdue_payable_count = 0
+    for kind, due_date, status, count, amount in entry_rows:
+        if kind == 'RECEITA':
+            total_receivable += amount or 0
+        else:
+            total_payable += amount or 0
+            if _effective_status(status, due_date, today) == 'VENCIDO':
+                overdue_payable_count += count or 0
+
+    open_quotes_count = db.session.query(func.count(Sale.id)).filter(Sale.status == 'QUOTE').scalar()
+    low_stock_count = (
+        db.session.query(func.count(Product.id))
+        .filter(Product.is_active.is_(True), Product.quantity <= Product.min_stock)
+        .scalar()
+    )
+    recent_sales = (
+        with_profile(Sale.query, 'sales.list')
+        .filter_by(status='COMPLETED')
+        .order_by(Sale.created_at.desc())
+        .limit(5)
+        .all()
+    )
+
+    return jsonify({
+        'salesTodayCount': sales_today['count'],
+        'salesTodayValue': from_cents(sales_today['value']),
+        'openQuotesCount': open_quotes_count,
+        'totalReceivable': from_cents(total_receivable),
+        'totalPayable': from_cents(total_payable),
+        'overduePayableCount': overdue_payable_count,
+        'lowStockProductsCount': low_stock_count,
+        'recentSales': [sale_to_dict(s) for s in recent_sales],
+        'daily': list(daily.values()),
+        'hourly': hourly,
+        'receivablesByMethodStatus': {
+            method: {status: from_cents(cents) for status, cents in statuses.items()}
+            for method, statuses in by_method_status.items()
+        },
+    }), 200
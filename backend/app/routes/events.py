@@ -0,0 +1,103 @@
+# backend/app/routes/events.py
+# ======================================================================================
+# GET /api/events – Server-Sent Events com as alterações confirmadas (app/events.py).
+#
+#   ?topics=stock,sales     tópicos desejados (padrão: stock,sales,returns,payments)
+#   Last-Event-ID           (cabeçalho que o EventSource envia ao reconectar, ou
+#                            ?lastEventId=) reenvia o que foi publicado desde então.
+#
+#   id: 1712345678901234
+#   event: stock
+#   data: {"products":[{"id":"...","quantity":3,...}],"removed":[]}
+#
+# `reset` (com id atual) avisa que eventos se perderam (buffer esgotado ou cliente
+# lento): o cliente refaz o delta via GET /api/sync e segue no mesmo stream.
+# Comentários ": ping" a cada EASYSTOCK_EVENTS_HEARTBEAT segundos mantêm a conexão
+# aberta em proxies. Cada cliente ocupa uma thread do servidor enquanto conectado.
+# ======================================================================================
+import os
+import queue
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from app.events import event_bus, RESET, TOPICS
+
+events_bp = Blueprint('events', __name__)
+
+HEARTBEAT_SECONDS = float(os.getenv('EASYSTOCK_EVENTS_HEARTBEAT', '15'))
+RETRY_MS = 3000  # espera sugerida ao EventSource antes de reconectar
+
+
+def _format(event_id, topic, data):
+    return f'id: {event_id}\nevent: {topic}\ndata: {data}\n\n'
+
+
+def _parse_topics():
+    raw = request.args.get('topics')
+    if not raw:
+        return set(TOPICS)
+    topics = {t.strip() for t in raw.split(',') if t.strip()}
+    unknown = topics - set(TOPICS)
+    if unknown or not topics:
+        raise ValueError(f"Tópicos inválidos: {', '.join(sorted(unknown)) or raw}. "
+                         f"Use: {', '.join(TOPICS)}")
+    return topics
+
+
+def _parse_last_event_id():
+    raw = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    if raw in (None, ''):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return -1  # id de outro formato: trata como histórico perdido (reset)
+
+
+def _stream(subscriber, replay):
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        if replay is None:
+            yield _format(event_bus.position, RESET, '{}')
+        else:
+            for ev in replay:
+                yield _format(ev.id, ev.topic, ev.data)
+
+        while True:
+            if subscriber.lagging:
+                subscriber.drain()
+                subscriber.lagging = False
+                yield _format(event_bus.position, RESET, '{}')
+            try:
+                ev = subscriber.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield _format(ev.id, ev.topic, ev.data)
+    finally:
+        # cliente desconectou (GeneratorExit na escrita) ou o servidor encerrou
+        event_bus.unsubscribe(subscriber)
+
+
+@events_bp.route('', methods=['GET'])
+def stream_events():
+    if not event_bus.enabled:
+        abort(404)
+    try:
+        topics = _parse_topics()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    subscriber, replay = event_bus.subscribe(topics, _parse_last_event_id())
+    if subscriber is None:
+        response = jsonify({'error': 'EVENTS_BUSY', 'message': 'Limite de conexões de eventos atingido'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '10'
+        return response
+
+    response = Response(_stream(subscriber, replay), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: não segurar o stream em buffer
+    # o gerador pode nem começar (cliente caiu antes): o close também libera a vaga
+    response.call_on_close(lambda: event_bus.unsubscribe(subscriber))
+    return response
@@ -1,5 +1,11 @@
 from flask import Blueprint, request, jsonify
 from app.models import db, FinancialEntry
+from app.pagination import keyset_response
+from app.exporting import export_response, requested_format, requested_period
+from app.receivables import aging_summary, run_sweep, sweep_if_stale
+from app.jobs import submit_job, accepted_response, wants_async
+from app.serializers import RowSerializer, iso
+from sqlalchemy import select
 from datetime import datetime
 
 financial_bp = Blueprint('financial', __name__)
@@ -26,11 +32,75 @@ def serialize_entry(e: FinancialEntry):
         'createdAt': e.created_at.isoformat() if e.created_at else None
     }
 
+# Listagem: mesma saída de serialize_entry, lida como tupla de colunas
+ENTRY_ROW = RowSerializer(
+    ('id', FinancialEntry.id),
+    ('type', FinancialEntry.type),
+    ('description', FinancialEntry.description),
+    ('amount', FinancialEntry.amount),
+    ('dueDate', FinancialEntry.due_date, iso),
+    ('paymentMethod', FinancialEntry.payment_method),
+    ('status', FinancialEntry.status),
+    ('createdAt', FinancialEntry.created_at, iso),
+)
+
 # GET /api/financial  - Lista todos os lançamentos
+#   ?limit=N&cursor=... -> paginação por (due_date, id), resposta { items, nextCursor }
 @financial_bp.route('', methods=['GET'])
 def list_entries():
-    entries = FinancialEntry.query.order_by(FinancialEntry.due_date).all()
-    return jsonify([serialize_entry(e) for e in entries])
+    page = keyset_response(ENTRY_ROW.select(FinancialEntry.query), FinancialEntry.due_date, FinancialEntry.id,
+                           ENTRY_ROW, descending=False)
+    if page is not None:
+        return page
+
+    rows = ENTRY_ROW.select(FinancialEntry.query).order_by(FinancialEntry.due_date).all()
+    return jsonify(ENTRY_ROW.many(rows))
+
+# GET /api/financial/receivables - Em aberto por tipo (PARCELA/RECEITA/DESPESA) e faixa de atraso
+#   Lido da tabela receivables_aging; se ela for de outro dia (ou velha), roda a varredura antes.
+#   ?refresh=1 força a varredura (com ?async=1, em job: 202 + /api/jobs/<id>).
+@financial_bp.route('/receivables', methods=['GET'])
+def receivables_aging():
+    if request.args.get('refresh') in ('1', 'true'):
+        if wants_async(False):
+            return accepted_response(submit_job('financial_sweep'))
+        run_sweep()
+    else:
+        sweep_if_stale()
+    return jsonify(aging_summary())
+
+# GET /api/financial/export?format=csv|ndjson&type=RECEITA|DESPESA&status=...&start=&end=
+#   (período aplicado sobre o vencimento)
+@financial_bp.route('/export', methods=['GET'])
+def export_entries():
+    try:
+        fmt = requested_format()
+        start, end = requested_period()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    columns = [
+        ('id', FinancialEntry.id),
+        ('type', FinancialEntry.type),
+        ('description', FinancialEntry.description),
+        ('amount', FinancialEntry.amount),
+        ('dueDate', FinancialEntry.due_date),
+        ('paymentMethod', FinancialEntry.payment_method),
+        ('status', FinancialEntry.status),
+        ('createdAt', FinancialEntry.created_at),
+    ]
+    stmt = select(*[c for _, c in columns])
+    if request.args.get('type'):
+        stmt = stmt.where(FinancialEntry.type == request.args['type'].strip().upper())
+    if request.args.get('status'):
+        stmt = stmt.where(FinancialEntry.status == request.args['status'].strip().upper())
+    if start:
+        stmt = stmt.where(FinancialEntry.due_date >= start.date())
+    if end:
+        stmt = stmt.where(FinancialEntry.due_date < end.date())
+    stmt = stmt.order_by(FinancialEntry.due_date, FinancialEntry.id)
+
+    return export_response(stmt, [n for n, _ in columns], fmt, 'financeiro')
 
 # POST /api/financial/ - Adiciona novo lançamento (despesa ou receita)
 @financial_bp.route('/', methods=['POST'])
@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+
+from app.models import db, Job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+# GET /api/jobs/<id> - Estado do job (queued|running|done|failed) e, ao fim, resultado ou erro
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job.to_dict())
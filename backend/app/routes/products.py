@@ -1,10 +1,16 @@
 # backend/app/routes/products.py
 from flask import Blueprint, request, jsonify, Response
 from app.models import db, Product, ProductHistory
+from app.pagination import keyset_response
+from app.response_cache import cached_view
+from app.serializers import RowSerializer, iso_utc
+from app.search import search_response
+from app.product_import import ProductImporter, ImportHeaderError, IMPORT_MODES
+from app.exporting import export_response, requested_format
+from app.jobs import job_handler, submit_job, save_upload, accepted_response, wants_async
 from datetime import datetime, timezone
-from sqlalchemy import inspect as sa_inspect
-import csv
-import io
+from sqlalchemy import inspect as sa_inspect, select
+import os
 
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
 
@@ -59,6 +65,22 @@ def save_product_history(product: Product, original_data: dict):
             )
             db.session.add(history_entry)
 
+# Produto lido como tupla de colunas (listagem, busca e delta-sync);
+# datas sempre em ISO 8601 com offset (+00:00)
+PRODUCT_ROW = RowSerializer(
+    ('id', Product.id),
+    ('name', Product.name),
+    ('sku', Product.sku),
+    ('marca', Product.marca),
+    ('tipo', Product.tipo),
+    ('price', Product.price),
+    ('cost', Product.cost),
+    ('quantity', Product.quantity),
+    ('minStock', Product.min_stock),
+    ('isActive', Product.is_active, bool),
+    ('createdAt', Product.created_at, iso_utc),
+)
+
 def table_has_column(table: str, column: str) -> bool:
     insp = sa_inspect(db.engine)
     cols = [c["name"] for c in insp.get_columns(table)]
@@ -69,8 +91,11 @@ def table_has_column(table: str, column: str) -> bool:
 #   Padrão: apenas ativos
 #   ?include_inactive=1  -> inclui inativos também
 #   ?is_active=0         -> somente inativos
+#   ?limit=N&cursor=...  -> paginação por (created_at, id)
+#   Resposta em cache até o próximo commit em products (ETag/304)
 # ======================================
 @products_bp.route('/', methods=['GET'])
+@cached_view(Product.__tablename__)
 def list_products():
     include_inactive = str(request.args.get('include_inactive', '')).lower() in ('1', 'true', 'yes')
     only_inactive = str(request.args.get('is_active', '')).lower() in ('0', 'false')
@@ -82,24 +107,60 @@ def list_products():
         elif not include_inactive:
             query = query.filter(Product.is_active.is_(True))
 
-    products = query.order_by(Product.created_at.desc()).all()
-    result = [
-        {
-            'id': p.id,
-            'name': p.name,
-            'sku': p.sku,
-            'marca': p.marca,
-            'tipo': p.tipo,
-            'price': p.price,
-            'cost': p.cost,
-            'quantity': p.quantity,
-            'minStock': p.min_stock,
-            'isActive': bool(getattr(p, 'is_active', True)),
-            # Datas sempre em ISO 8601 com offset (+00:00)
-            'createdAt': to_iso_utc(p.created_at),
-        } for p in products
+    page = keyset_response(PRODUCT_ROW.select(query), Product.created_at, Product.id, PRODUCT_ROW)
+    if page is not None:
+        return page
+
+    rows = PRODUCT_ROW.select(query).order_by(Product.created_at.desc()).all()
+    return jsonify(PRODUCT_ROW.many(rows)), 200
+
+# ======================================
+# GET /api/products/search?q=...&limit=N&cursor=...
+#   Busca por prefixo (nome, SKU, marca, tipo), tolerante a erros de
+#   digitação, ordenada por relevância -> { items, nextCursor }.
+#   Padrão: apenas ativos; ?include_inactive=1 inclui inativos.
+# ======================================
+@products_bp.route('/search', methods=['GET'])
+def search_products():
+    include_inactive = str(request.args.get('include_inactive', '')).lower() in ('1', 'true', 'yes')
+    return search_response('products', PRODUCT_ROW, Product.id, active_only=not include_inactive)
+
+# ======================================
+# GET /api/products/export?format=csv|ndjson
+#   Mesmos filtros de ativo/inativo da listagem. O CSV usa o mesmo
+#   cabeçalho aceito por /import_csv (ida e volta sem ajustes).
+# ======================================
+@products_bp.route('/export', methods=['GET'])
+def export_products():
+    try:
+        fmt = requested_format()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    include_inactive = str(request.args.get('include_inactive', '')).lower() in ('1', 'true', 'yes')
+    only_inactive = str(request.args.get('is_active', '')).lower() in ('0', 'false')
+
+    columns = [
+        ('name', Product.name),
+        ('sku', Product.sku),
+        ('marca', Product.marca),
+        ('tipo', Product.tipo),
+        ('cost', Product.cost),
+        ('price', Product.price),
+        ('quantity', Product.quantity),
+        ('minStock', Product.min_stock),
+        ('isActive', Product.is_active),
+        ('createdAt', Product.created_at),
+        ('id', Product.id),
     ]
-    return jsonify(result), 200
+    stmt = select(*[c for _, c in columns])
+    if only_inactive:
+        stmt = stmt.where(Product.is_active.is_(False))
+    elif not include_inactive:
+        stmt = stmt.where(Product.is_active.is_(True))
+    stmt = stmt.order_by(Product.created_at.desc(), Product.id.desc())
+
+    return export_response(stmt, [n for n, _ in columns], fmt, 'produtos')
 
 # =======================================
 # POST /api/products/  (criação de produto)
@@ -247,8 +308,19 @@ def activate_product(product_id):
 # ====================================================
 # POST /api/products/import_csv  (importação via CSV)
 # ====================================================
+# acima deste tamanho o upload é processado em job (202 + /api/jobs/<id>)
+IMPORT_ASYNC_BYTES = int(os.getenv('EASYSTOCK_IMPORT_ASYNC_BYTES', str(1024 * 1024)))
+
 @products_bp.route('/import_csv', methods=['POST'])
 def import_products_csv():
+    """
+    Importa produtos em streaming (lotes com commit por lote).
+      ?mode=insert (padrão) -> ignora SKUs existentes
+      ?mode=upsert          -> atualiza price/cost/quantity dos SKUs existentes (com histórico)
+      ?async=1|0            -> força/impede o processamento em job (padrão: job acima de
+                               EASYSTOCK_IMPORT_ASYNC_BYTES, responde 202 com o id do job)
+    Linhas inválidas não interrompem a importação; voltam em "errors".
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'Nenhum arquivo enviado'}), 400
 
@@ -256,46 +328,40 @@ def import_products_csv():
     if not file.filename.lower().endswith('.csv'):
         return jsonify({'error': 'Formato inválido, envie um arquivo CSV'}), 400
 
-    try:
-        stream = io.StringIO(file.stream.read().decode('utf-8'), newline=None)
-        reader = csv.DictReader(stream)
-
-        required_fields = ['name', 'sku', 'marca', 'tipo', 'cost', 'price', 'quantity', 'minStock']
-        created_count = 0
-        skus_existentes = {p.sku for p in Product.query.with_entities(Product.sku).all()}
-
-        for row in reader:
-            if not all(field in row for field in required_fields):
-                return jsonify({'error': f'Campos obrigatórios ausentes. Esperado: {required_fields}'}), 400
-
-            sku = (row.get('sku') or '').strip() or generate_sku()
-            if sku in skus_existentes:
-                # evita duplicata
-                continue
-
-            product = Product(
-                name=(row.get('name') or '').strip(),
-                sku=sku,
-                marca=(row.get('marca') or '').strip(),
-                tipo=((row.get('tipo') or '').strip() or None),
-                cost=float(row.get('cost') or 0),
-                price=float(row.get('price') or 0),
-                quantity=int(row.get('quantity') or 0),
-                min_stock=int(row.get('minStock') or 0),
-                created_at=datetime.now(timezone.utc)  # ✅ salva UTC-aware
-            )
-
-            db.session.add(product)
-            created_count += 1
-            skus_existentes.add(sku)
+    mode = (request.args.get('mode') or request.form.get('mode') or 'insert').strip().lower()
+    if mode not in IMPORT_MODES:
+        return jsonify({'error': f'Modo inválido. Use um de: {list(IMPORT_MODES)}'}), 400
 
-        db.session.commit()
-        return jsonify({'message': f'{created_count} produtos importados com sucesso.'}), 201
+    # Arquivos grandes (ou ?async=1) viram job: 202 + GET /api/jobs/<id>
+    if wants_async((request.content_length or 0) > IMPORT_ASYNC_BYTES):
+        job = submit_job('import_products_csv', {'upload': save_upload(file, '.csv'), 'mode': mode})
+        return accepted_response(job)
 
+    try:
+        report = ProductImporter(mode=mode).run(file.stream)
+    except ImportHeaderError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Erro ao processar CSV: {str(e)}'}), 500
 
+    return jsonify({'message': _import_message(mode, report), **report}), 201
+
+
+def _import_message(mode, report):
+    message = f"{report['created']} produtos importados com sucesso."
+    if mode == 'upsert':
+        message += f" {report['updated']} atualizados."
+    return message
+
+
+@job_handler('import_products_csv')
+def import_products_csv_job(params):
+    """Versão em job da importação: lê o CSV salvo em disco; o resultado é o mesmo relatório."""
+    with open(params['upload'], 'rb') as fh:
+        report = ProductImporter(mode=params['mode']).run(fh)
+    return {'message': _import_message(params['mode'], report), **report}
+
 # ======================================================
 # GET /api/products/<id>/history  (histórico do produto)
 # ======================================================
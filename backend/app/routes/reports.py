@@ -1,11 +1,21 @@
+import os
 from datetime import datetime, timedelta
 
-from app.models import db, Sale, Product, FinancialEntry, ReportGoals
+from app.models import db, Sale, SaleItem, Product, FinancialEntry, ReportGoals
+from app.localtime import local_today
+from app.money import from_cents, sql_cents
+from app.receivables import sweep_if_stale
+from app.jobs import job_handler, submit_job, accepted_response, wants_async
+from app.response_cache import cached_view
 from flask import Blueprint, request, jsonify
+from sqlalchemy import func
 from flask_cors import cross_origin
 
 reports_bp = Blueprint('reports', __name__)
 
+# períodos maiores que isto (dias) são gerados em job
+REPORT_ASYNC_DAYS = int(os.getenv('EASYSTOCK_REPORT_ASYNC_DAYS', '366'))
+
 
 # Função auxiliar para obter (ou criar) as metas do mês
 def get_or_create_goals():
@@ -17,8 +27,41 @@ def get_or_create_goals():
     return goals
 
 
+def current_goals():
+    """Metas salvas, ou zeradas se ainda não houver. Só leitura: os GETs em cache
+    não podem fazer commit (o commit em report_goals invalidaria a própria resposta)."""
+    return ReportGoals.query.first() or ReportGoals(monthly_revenue=0.0, monthly_profit=0.0)
+
+
+# Tabelas lidas por build_report (qualquer commit nelas invalida o relatório em cache)
+REPORT_TABLES = (
+    Sale.__tablename__, SaleItem.__tablename__, Product.__tablename__,
+    FinancialEntry.__tablename__, ReportGoals.__tablename__,
+)
+
+
+def _closed_period():
+    """Só períodos encerrados (fim antes de hoje, no fuso da loja) vão para o cache."""
+    try:
+        return datetime.strptime(request.args.get('end') or '', '%Y-%m-%d').date() < local_today()
+    except ValueError:
+        return False
+
+
+@reports_bp.before_request
+def _sweep_before_report():
+    # Varredura de vencidos (escrita) fora da view em cache: roda também quando o
+    # relatório sai do cache, e o commit dela invalida as entradas (financial_entries).
+    if request.endpoint == 'reports.generate_report':
+        sweep_if_stale()
+
+
 # GET /api/reports/?start=YYYY-MM-DD&end=YYYY-MM-DD
+#   Períodos maiores que EASYSTOCK_REPORT_ASYNC_DAYS (ou ?async=1) viram job:
+#   202 com o id do job; o relatório sai em GET /api/jobs/<id> -> result.
+#   Períodos encerrados ficam em cache (ETag/304) até um commit em REPORT_TABLES.
 @reports_bp.route('/', methods=['GET'])
+@cached_view(*REPORT_TABLES, when=_closed_period)
 def generate_report():
     start_date = request.args.get('start')
     end_date = request.args.get('end')
@@ -29,52 +72,86 @@ def generate_report():
     except Exception:
         return jsonify({'error': 'Datas inválidas'}), 400
 
-    # Dados de vendas
-    sales = Sale.query.filter(
-        Sale.status == 'COMPLETED',
-        Sale.created_at >= start_dt,
-        Sale.created_at < end_dt
-    ).all()
-
-    # Resumo financeiro
-    total_revenue = sum(s.total for s in sales)
-    all_items = [item for sale in sales for item in sale.items]
-    total_cost = sum(Product.query.filter_by(id=item.product_id).first().cost * item.quantity for item in all_items)
+    if wants_async((end_dt - start_dt).days > REPORT_ASYNC_DAYS):
+        return accepted_response(submit_job('report', {'start': start_date, 'end': end_date}))
+
+    return jsonify(build_report(start_dt, end_dt))
+
+
+@job_handler('report')
+def report_job(params):
+    sweep_if_stale()
+    start_dt = datetime.strptime(params['start'], '%Y-%m-%d')
+    end_dt = datetime.strptime(params['end'], '%Y-%m-%d') + timedelta(days=1)
+    return build_report(start_dt, end_dt)
+
+
+def build_report(start_dt, end_dt):
+    """Relatório do período [start_dt, end_dt) como dicionário (usado pela rota e pelo job)."""
+    # Vendas concluídas no período (subquery reutilizada pelos agregados abaixo)
+    period_sales = (
+        db.session.query(Sale.id)
+        .filter(
+            Sale.status == 'COMPLETED',
+            Sale.created_at >= start_dt,
+            Sale.created_at < end_dt
+        )
+        .subquery()
+    )
+
+    # Resumo financeiro: receita e quantidade de vendas em um único SELECT.
+    # Somas em centavos inteiros (exatas); conversão para reais só na resposta.
+    sales_count, total_revenue = (
+        db.session.query(func.count(Sale.id), sql_cents(func.sum(Sale.total)))
+        .filter(Sale.id.in_(db.session.query(period_sales.c.id)))
+        .one()
+    )
+    total_revenue = total_revenue or 0
+
+    # Lucratividade por produto: sale_items JOIN products, agrupado por produto
+    product_rows = (
+        db.session.query(
+            SaleItem.product_id,
+            func.min(SaleItem.product_name),
+            func.sum(SaleItem.quantity),
+            sql_cents(func.sum(SaleItem.price * SaleItem.quantity)),
+            sql_cents(func.sum(Product.cost * SaleItem.quantity)),
+        )
+        .join(Product, Product.id == SaleItem.product_id)
+        .filter(SaleItem.sale_id.in_(db.session.query(period_sales.c.id)))
+        .group_by(SaleItem.product_id)
+        .all()
+    )
+
+    profit_by_product = {}
+    total_cost = 0
+    for product_id, product_name, quantity_sold, revenue, cost in product_rows:
+        total_cost += cost or 0
+        profit_by_product[product_id] = {
+            'productId': product_id,
+            'productName': product_name,
+            'quantitySold': int(quantity_sold or 0),
+            'totalRevenue': from_cents(revenue or 0),
+            'totalProfit': from_cents((revenue or 0) - (cost or 0))
+        }
+
     total_profit = total_revenue - total_cost
-    average_ticket = total_revenue / len(sales) if sales else 0
+    average_ticket = total_revenue / sales_count / 100 if sales_count else 0
 
     summary = {
-        'totalRevenue': total_revenue,
-        'totalProfit': total_profit,
-        'totalCost': total_cost,
-        'salesCount': len(sales),
+        'totalRevenue': from_cents(total_revenue),
+        'totalProfit': from_cents(total_profit),
+        'totalCost': from_cents(total_cost),
+        'salesCount': sales_count,
         'averageTicket': average_ticket
     }
 
-    # Lucratividade por produto
-    profit_by_product = {}
-    for item in all_items:
-        product = Product.query.get(item.product_id)
-        if not product:
-            continue
-        if item.product_id not in profit_by_product:
-            profit_by_product[item.product_id] = {
-                'productId': item.product_id,
-                'productName': item.product_name,
-                'quantitySold': 0,
-                'totalRevenue': 0,
-                'totalProfit': 0
-            }
-        entry = profit_by_product[item.product_id]
-        entry['quantitySold'] += item.quantity
-        entry['totalRevenue'] += item.price * item.quantity
-        entry['totalProfit'] += (item.price - product.cost) * item.quantity
-
     # Mais vendidos por valor e por quantidade
     best_sellers_by_value = sorted(profit_by_product.values(), key=lambda p: p['totalRevenue'], reverse=True)
     best_sellers_by_quantity = sorted(profit_by_product.values(), key=lambda p: p['quantitySold'], reverse=True)
 
-    # Clientes inadimplentes
+    # Clientes inadimplentes (status VENCIDO mantido pela varredura de app/receivables.py,
+    # que quem chama roda antes: _sweep_before_report / report_job)
     overdue_entries = FinancialEntry.query.filter(
         FinancialEntry.status == 'VENCIDO'
     ).order_by(FinancialEntry.due_date).all()
@@ -86,21 +163,28 @@ def generate_report():
         'saleId': entry.id
     } for entry in overdue_entries]
 
-    # Estoque de baixa rotatividade: produtos não vendidos no período
-    sold_product_ids = {item.product_id for item in all_items}
-    unsold_products = Product.query.filter(~Product.id.in_(sold_product_ids)).all()
+    # Estoque de baixa rotatividade: produtos com saldo e não vendidos no período
+    sold_product_ids = (
+        db.session.query(SaleItem.product_id)
+        .filter(SaleItem.sale_id.in_(db.session.query(period_sales.c.id)))
+    )
+    unsold_products = (
+        Product.query
+        .filter(Product.quantity > 0, ~Product.id.in_(sold_product_ids))
+        .all()
+    )
 
     stock_efficiency = [{
         'productId': p.id,
         'productName': p.name,
         'sku': p.sku,
         'quantityInStock': p.quantity
-    } for p in unsold_products if p.quantity > 0]
+    } for p in unsold_products]
 
     # Metas atuais
-    goals = get_or_create_goals()
+    goals = current_goals()
 
-    return jsonify({
+    return {
         'summary': summary,
         'profitByProduct': list(profit_by_product.values()),
         'bestSellersByValue': best_sellers_by_value,
@@ -111,7 +195,7 @@ def generate_report():
             'monthlyRevenue': goals.monthly_revenue,
             'monthlyProfit': goals.monthly_profit
         }
-    })
+    }
 
 
 # POST /api/reports/goals - Salva metas mensais
@@ -127,8 +211,9 @@ def set_goals():
     return jsonify({'message': 'Metas atualizadas com sucesso'})
 @reports_bp.route('/goals/', methods=['GET'])
 @cross_origin()
+@cached_view(ReportGoals.__tablename__)
 def get_goals():
-    goals = get_or_create_goals()
+    goals = current_goals()
     return jsonify({
         'monthlyRevenue': goals.monthly_revenue,
         'monthlyProfit': goals.monthly_profit
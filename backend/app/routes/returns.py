@@ -7,12 +7,17 @@ from app.models import (
     db,
     Sale,
     SaleItem,
-    Product,
     FinancialEntry,
     Return,
     ReturnItem,
-    CustomerCredit,   # novo: usamos para gerar créditos quando resolution = CREDITO
 )
+from app.money import to_cents, from_cents
+from app.pagination import keyset_response
+from app.query_options import with_profile
+from app.stock import restock
+from app.credits import grant_credit
+from app.exporting import export_response, requested_format, requested_period
+from sqlalchemy import select
 
 returns_bp = Blueprint("returns", __name__, url_prefix="/api/returns")
 
@@ -21,8 +26,8 @@ returns_bp = Blueprint("returns", __name__, url_prefix="/api/returns")
 # Helpers
 # -----------------------------
 def _calc_total(items):
-    """items: [{price, quantity}] -> soma total"""
-    return float(sum((float(i["price"]) * int(i["quantity"])) for i in items))
+    """items: [{price, quantity}] -> soma total (em centavos, retornada em reais)"""
+    return from_cents(sum(to_cents(i["price"]) * int(i["quantity"]) for i in items))
 
 
 def _get_sold_quantities(sale):
@@ -89,39 +94,77 @@ def _create_financial_expense_for_return(ret_obj):
     db.session.add(entry)
 
 
+def _return_summary(r):
+    """Linha da listagem de devoluções."""
+    # nome do cliente via relação, ou fallback via venda
+    customer_name = None
+    try:
+        customer_name = r.customer.name if r.customer else None
+    except Exception:
+        customer_name = None
+    if not customer_name and r.sale:
+        customer_name = getattr(r.sale, "customer_name", None)
+
+    return {
+        "id": r.id,
+        "saleId": r.sale_id,
+        "customerId": r.customer_id,
+        "customerName": customer_name,
+        "createdAt": r.created_at.isoformat() if r.created_at else None,
+        "resolution": r.resolution,   # "REEMBOLSO" | "CREDITO"
+        "status": r.status,           # "ABERTA" | "CONCLUIDA" | "CANCELADA"
+        "total": float(r.total or 0.0),
+    }
+
+
 # -----------------------------
 # Endpoints
 # -----------------------------
 @returns_bp.get("")
 def list_returns():
-    rs = Return.query.order_by(Return.created_at.desc()).all()
-    data = []
-    for r in rs:
-        # nome do cliente via relação, ou fallback via venda
-        customer_name = None
-        try:
-            customer_name = r.customer.name if r.customer else None
-        except Exception:
-            customer_name = None
-        if not customer_name and r.sale:
-            customer_name = getattr(r.sale, "customer_name", None)
-
-        data.append({
-            "id": r.id,
-            "saleId": r.sale_id,
-            "customerId": r.customer_id,
-            "customerName": customer_name,
-            "createdAt": r.created_at.isoformat() if r.created_at else None,
-            "resolution": r.resolution,   # "REEMBOLSO" | "CREDITO"
-            "status": r.status,           # "ABERTA" | "CONCLUIDA" | "CANCELADA"
-            "total": float(r.total or 0.0),
-        })
-    return jsonify(data), 200
+    q = with_profile(Return.query, 'returns.list')
+    page = keyset_response(q, Return.created_at, Return.id, _return_summary)
+    if page is not None:
+        return page
+
+    rs = q.order_by(Return.created_at.desc()).all()
+    return jsonify([_return_summary(r) for r in rs]), 200
+
+
+@returns_bp.get("/export")
+def export_returns():
+    """?format=csv|ndjson&status=...&start=YYYY-MM-DD&end=YYYY-MM-DD"""
+    try:
+        fmt = requested_format()
+        start, end = requested_period()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    columns = [
+        ("id", Return.id),
+        ("saleId", Return.sale_id),
+        ("customerId", Return.customer_id),
+        ("createdAt", Return.created_at),
+        ("resolution", Return.resolution),
+        ("status", Return.status),
+        ("reason", Return.reason),
+        ("total", Return.total),
+    ]
+    stmt = select(*[c for _, c in columns])
+    if request.args.get("status"):
+        stmt = stmt.where(Return.status == request.args["status"].strip().upper())
+    if start:
+        stmt = stmt.where(Return.created_at >= start)
+    if end:
+        stmt = stmt.where(Return.created_at < end)
+    stmt = stmt.order_by(Return.created_at.desc(), Return.id.desc())
+
+    return export_response(stmt, [n for n, _ in columns], fmt, "devolucoes")
 
 
 @returns_bp.get("/<rid>")
 def get_return(rid):
-    r = Return.query.get_or_404(rid)
+    r = with_profile(Return.query, 'returns.detail').filter(Return.id == rid).first_or_404()
 
     customer_name = None
     try:
@@ -147,7 +190,7 @@ def get_return(rid):
             "productName": it.product_name,
             "quantity": int(it.quantity),
             "price": float(it.price),
-            "subtotal": float(it.price) * int(it.quantity),
+            "subtotal": from_cents(to_cents(it.price) * int(it.quantity)),
         } for it in r.items]
     }), 200
 
@@ -155,7 +198,7 @@ def get_return(rid):
 @returns_bp.post("")
 def create_return():
     """
-    Cria uma devolução. Se resolution == "CREDITO", gera CustomerCredit com amount=balance=total
+    Cria uma devolução. Se resolution == "CREDITO", gera crédito (app/credits.py) com amount=balance=total
     e marca a devolução como CONCLUIDA (sem criar despesa financeira).
     Se resolution == "REEMBOLSO", cria uma DESPESA no financeiro e deixa status "ABERTA" (ou conforme seu fluxo).
     """
@@ -206,11 +249,8 @@ def create_return():
             price=float(it["price"]),
         ))
 
-    # reentrada de estoque
-    for it in items:
-        product = Product.query.get(str(it["productId"]))
-        if product:
-            product.quantity = int(product.quantity or 0) + int(it["quantity"])
+    # reentrada de estoque (UPDATE quantity = quantity + :q, sem ler/gravar no Python)
+    restock(items)
 
     # financeiro / crédito
     if resolution == "REEMBOLSO":
@@ -221,15 +261,14 @@ def create_return():
             db.session.rollback()
             return jsonify({"error": "Não é possível gerar crédito: venda sem cliente vinculado."}), 400
 
-        db.session.add(
-            CustomerCredit(
-                id=str(uuid4()),
-                customer_id=sale.customer_id,
-                return_id=rid,
-                amount=float(total),
-                balance=float(total),
-            )
-        )
+        # crédito + saldo mantido do cliente + livro (app/credits.py); o INSERT via
+        # Core referencia a devolução, então ela vai ao banco antes
+        db.session.flush()
+        try:
+            grant_credit(sale.customer_id, to_cents(total), return_id=rid)
+        except LookupError:
+            db.session.rollback()
+            return jsonify({"error": "Não é possível gerar crédito: cliente da venda não encontrado."}), 400
         # devoluções em CRÉDITO são concluídas imediatamente
         ret.status = "CONCLUIDA"
 
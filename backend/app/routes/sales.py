@@ -1,11 +1,37 @@
 # backend/app/routes/sales.py
 # ======================================================================================
-# Rotas de Vendas (Sales) – criação, listagem, edição, conversão de orçamentos
-# e utilitário de validação de estoque para uso em tempo real no formulário.
+# Rotas de Vendas (Sales) – criação, listagem, edição, conversão de orçamentos,
+# ingestão em lote dos PDVs offline e utilitário de validação de estoque para uso
+# em tempo real no formulário.
 # ======================================================================================
 
-from flask import Blueprint, request, jsonify
-from app.models import db, Sale, SaleItem, Product, Customer, SalePayment
+import hashlib
+import json
+import os
+from collections import OrderedDict, namedtuple
+
+from flask import Blueprint, request, jsonify, make_response
+from app.models import db, Sale, SaleItem, Product, Customer, SalePayment, generate_uuid
+from app.money import to_cents, from_cents, split_cents, discount_cents
+from app.pagination import keyset_response
+from app.query_options import with_profile
+from app.response_cache import mark_tables_changed
+from app.sync import sync_stamp
+from app.events import queue_events, sale_summary
+from app.rollups import RollupDeltas, apply_deltas, sale_contribution, receivable_contribution
+from app.exporting import export_response, requested_format, requested_period
+from app.stock import (
+    InsufficientStock,
+    aggregate_quantities,
+    deduct_stock_atomic,
+    lock_stock_snapshot,
+    try_deduct,
+    reserve_for_quote,
+    release_reservations,
+    release_expired_reservations,
+    stock_cache,
+)
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, date, timezone
 
@@ -15,16 +41,11 @@ sales_bp = Blueprint('sales', __name__)
 # Helpers (cálculo, normalização, utilitários)
 # --------------------------------------------------------------------------------------
 def compute_totals(items, discount_type, discount_value, freight):
-    """Calcula subtotal/total considerando desconto e frete."""
-    subtotal = sum((float(i.get('price', 0)) * int(i.get('quantity', 0))) for i in items)
-    discount = 0.0
-    if discount_type and discount_value:
-        if discount_type == 'PERCENT':
-            discount = min(subtotal * (float(discount_value) / 100.0), subtotal)
-        elif discount_type == 'VALUE':
-            discount = min(float(discount_value), subtotal)
-    total = max(subtotal - discount + float(freight or 0), 0.0)
-    return subtotal, discount, total
+    """Calcula subtotal/total considerando desconto e frete (conta em centavos, retorna reais)."""
+    subtotal = sum(to_cents(i.get('price', 0)) * int(i.get('quantity', 0)) for i in items)
+    discount = discount_cents(subtotal, discount_type, discount_value)
+    total = max(subtotal - discount + to_cents(freight), 0)
+    return from_cents(subtotal), from_cents(discount), from_cents(total)
 
 
 def add_months_safe(d: date, months: int) -> date:
@@ -96,35 +117,37 @@ def parse_due_date(value) -> date:
             return datetime.utcnow().date()
 
 
-def generate_payments_for_sale(sale: Sale, method: str, installments: int):
+def payment_schedule(total, created_at, method, installments):
     """
-    Gera parcelas simples com base no total da venda.
+    Parcelas simples com base no total da venda: [(vencimento, valor, status)].
     - PIX/DINHEIRO/DÉBITO: parcela única vencendo no dia (PAGO se 1x).
     - Crédito/boletos/transferência: parcelas mensais a partir do mês atual.
+    `method` já normalizado (normalize_method).
     """
     installments = max(1, int(installments or 1))
-    method = normalize_method(method)
-
-    created_local_date = (sale.created_at or datetime.utcnow()).date()
-    total = float(sale.total or 0)
 
-    base = round(total / installments, 2)
-    amounts = [base] * installments
-    diff = round(total - sum(amounts), 2)
-    if diff != 0:
-        amounts[-1] = round(amounts[-1] + diff, 2)
+    created_local_date = (created_at or datetime.utcnow()).date()
+    amounts = split_cents(to_cents(total), installments)
 
+    schedule = []
     for i in range(installments):
         if method in ('PIX', 'DINHEIRO', 'CARTAO_DEBITO'):
             due = created_local_date
         else:
             due = add_months_safe(created_local_date, i)
         status = 'PAGO' if (installments == 1 and method in ('PIX', 'DINHEIRO', 'CARTAO_DEBITO')) else 'PENDENTE'
+        schedule.append((due, from_cents(amounts[i]), status))
+    return schedule
 
+
+def generate_payments_for_sale(sale: Sale, method: str, installments: int):
+    """Gera as parcelas da venda (ver payment_schedule)."""
+    method = normalize_method(method)
+    for due, amount, status in payment_schedule(sale.total, sale.created_at, method, installments):
         db.session.add(SalePayment(
             sale_id=sale.id,
             due_date=due,
-            amount=amounts[i],
+            amount=amount,
             payment_method=method,
             status=status
         ))
@@ -154,17 +177,16 @@ def sale_to_dict(sale: Sale):
         } for p in real_payments
     ]
 
-    total_non_credit = round(sum(float(p.amount or 0)
-                                 for p in real_payments
-                                 if normalize_method(p.payment_method) != 'CREDITO'), 2)
-    sale_total = round(float(sale.total or 0), 2)
-    credit_used = round(max(0.0, sale_total - total_non_credit), 2)
+    total_non_credit = sum(to_cents(p.amount)
+                           for p in real_payments
+                           if normalize_method(p.payment_method) != 'CREDITO')
+    credit_used = max(0, to_cents(sale.total) - total_non_credit)
 
     if credit_used > 0:
         payments_list.append({
             'id': None,
             'dueDate': (created_at.isoformat() if created_at else datetime.utcnow().date().isoformat()),
-            'amount': credit_used,
+            'amount': from_cents(credit_used),
             'paymentMethod': 'CREDITO DO CLIENTE',
             'status': 'PAGO',
             'isCredit': True,
@@ -194,11 +216,20 @@ def sale_to_dict(sale: Sale):
             } for i in sale.items
         ],
         'payments': payments_list,
-        'creditUsedAmount': credit_used,
+        'creditUsedAmount': from_cents(credit_used),
         'usedCustomerCredit': bool(credit_used > 0),
     }
 
 
+def clear_payments(sale: Sale):
+    """
+    Remove as parcelas da venda pelo ORM (e não com DELETE em massa) para que os
+    rollups do dashboard enxerguem cada parcela removida.
+    """
+    for p in SalePayment.query.filter_by(sale_id=sale.id).all():
+        db.session.delete(p)
+
+
 def payment_to_dict(p: SalePayment):
     return {
         'id': p.id,
@@ -212,15 +243,27 @@ def payment_to_dict(p: SalePayment):
 # --------------------------------------------------------------------------------------
 # Validação/abate de estoque (para conversão e vendas diretas COMPLETED)
 # --------------------------------------------------------------------------------------
-def compute_insufficient_items(sale_items):
+# item avulso do /check_stock/ (mesmos atributos de SaleItem usados na validação)
+StockCheckItem = namedtuple('StockCheckItem', 'product_id product_name quantity')
+
+
+def compute_insufficient_items(sale_items, snapshot=None):
     """
     Retorna itens com estoque insuficiente:
     [{ productId, productName, available, requested }]
     - available = 0 quando o produto não for encontrado.
+    snapshot: {product_id: (nome, quantidade)}; se omitido, um único SELECT ... IN (...).
     """
+    if snapshot is None:
+        ids = list({item.product_id for item in sale_items})
+        rows = db.session.execute(
+            select(Product.id, Product.name, Product.quantity).where(Product.id.in_(ids))
+        ).all() if ids else []
+        snapshot = {r.id: (r.name, int(r.quantity or 0)) for r in rows}
+
     insuff = []
     for item in sale_items:
-        product = Product.query.get(item.product_id)
+        product = snapshot.get(item.product_id)
         if not product:
             insuff.append({
                 'productId': item.product_id,
@@ -229,51 +272,103 @@ def compute_insufficient_items(sale_items):
                 'requested': int(item.quantity)
             })
             continue
-        if product.quantity < int(item.quantity):
+        name, available = product
+        if available < int(item.quantity):
             insuff.append({
                 'productId': item.product_id,
-                'productName': item.product_name or product.name,
-                'available': int(product.quantity),
+                'productName': item.product_name or name,
+                'available': available,
                 'requested': int(item.quantity)
             })
     return insuff
 
 
-def deduct_stock(sale_items):
-    """Abate do estoque a quantidade vendida (assume validação prévia)."""
-    for item in sale_items:
-        product = Product.query.get(item.product_id)
-        if product:
-            product.quantity -= int(item.quantity)
+def out_of_stock_response(items):
+    return jsonify({
+        'error': 'OUT_OF_STOCK',
+        'message': 'Estoque insuficiente para um ou mais itens',
+        'items': items
+    }), 409
 
 
 # --------------------------------------------------------------------------------------
 # Rotas
 # --------------------------------------------------------------------------------------
+def requested_statuses():
+    """
+    Interpreta ?status=: vazio -> ['COMPLETED']; ALL -> None (sem filtro);
+    'A' ou 'A,B' -> lista de status.
+    """
+    status_param = (request.args.get('status') or '').strip().upper()
+    if not status_param:
+        return ['COMPLETED']
+    if status_param == 'ALL':
+        return None
+    return [s.strip() for s in status_param.split(',') if s.strip()]
+
+
 @sales_bp.route('/', methods=['GET'])
 def list_sales():
-    """Lista vendas com filtro opcional via ?status=..."""
-    status_param = (request.args.get('status') or '').strip().upper()
+    """Lista vendas com filtro opcional via ?status=... e paginação opcional via ?limit=&cursor=."""
+    statuses = requested_statuses()
 
-    q = Sale.query
-    if status_param:
-        if status_param == 'ALL':
-            pass
-        elif ',' in status_param:
-            statuses = [s.strip() for s in status_param.split(',') if s.strip()]
-            q = q.filter(Sale.status.in_(statuses))
-        else:
-            q = q.filter_by(status=status_param)
-    else:
-        q = q.filter_by(status='COMPLETED')
+    q = with_profile(Sale.query, 'sales.list')
+    if statuses is not None:
+        q = q.filter(Sale.status.in_(statuses))
+
+    page = keyset_response(q, Sale.created_at, Sale.id, sale_to_dict)
+    if page is not None:
+        return page
 
     sales = q.order_by(Sale.created_at.desc()).all()
     return jsonify([sale_to_dict(s) for s in sales]), 200
 
 
+# GET /api/sales/export?format=csv|ndjson&status=...&start=YYYY-MM-DD&end=YYYY-MM-DD
+@sales_bp.route('/export', methods=['GET'])
+def export_sales():
+    """Exporta vendas (uma linha por venda) em streaming."""
+    try:
+        fmt = requested_format()
+        start, end = requested_period()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    columns = [
+        ('id', Sale.id),
+        ('createdAt', Sale.created_at),
+        ('status', Sale.status),
+        ('customerId', Sale.customer_id),
+        ('customerName', Sale.customer_name),
+        ('subtotal', Sale.subtotal),
+        ('discountType', Sale.discount_type),
+        ('discountValue', Sale.discount_value),
+        ('freight', Sale.freight),
+        ('total', Sale.total),
+        ('paymentMethod', Sale.payment_method),
+        ('installments', Sale.installments),
+    ]
+    stmt = select(*[c for _, c in columns])
+    statuses = requested_statuses()
+    if statuses is not None:
+        stmt = stmt.where(Sale.status.in_(statuses))
+    if start:
+        stmt = stmt.where(Sale.created_at >= start)
+    if end:
+        stmt = stmt.where(Sale.created_at < end)
+    stmt = stmt.order_by(Sale.created_at.desc(), Sale.id.desc())
+
+    return export_response(stmt, [n for n, _ in columns], fmt, 'vendas')
+
+
 @sales_bp.route('/quotes/', methods=['GET'])
 def list_quotes():
-    quotes = Sale.query.filter_by(status='QUOTE').order_by(Sale.created_at.desc()).all()
+    q = with_profile(Sale.query, 'sales.list').filter_by(status='QUOTE')
+    page = keyset_response(q, Sale.created_at, Sale.id, sale_to_dict)
+    if page is not None:
+        return page
+
+    quotes = q.order_by(Sale.created_at.desc()).all()
     return jsonify([sale_to_dict(q) for q in quotes]), 200
 
 
@@ -333,33 +428,42 @@ def add_transaction():
         db.session.flush()  # pega o ID
 
         # Itens
+        sale_items = []
         for item in items:
-            db.session.add(SaleItem(
+            sale_item = SaleItem(
                 sale_id=sale.id,
                 product_id=item['productId'],
                 product_name=item.get('ProductName') or item['productName'],
                 quantity=int(item['quantity']),
                 price=float(item['price'])
-            ))
+            )
+            db.session.add(sale_item)
+            sale_items.append(sale_item)
+
+        # Reservas de orçamentos vencidos voltam ao estoque antes da baixa
+        release_expired_reservations()
 
-        # Vendas diretas: valida estoque imediatamente
+        # Vendas diretas: baixa atômica (UPDATE condicional); falta de estoque -> 409
         if status == 'COMPLETED':
-            insuff = compute_insufficient_items(sale.items)
-            if insuff:
+            try:
+                deduct_stock_atomic(sale_items)
+            except InsufficientStock as e:
                 db.session.rollback()
-                return jsonify({
-                    'error': 'OUT_OF_STOCK',
-                    'message': 'Estoque insuficiente para um ou mais itens',
-                    'items': insuff
-                }), 409
-
-            deduct_stock(sale.items)
+                return out_of_stock_response(e.items)
 
             method = normalize_method(sale.payment_method or 'PIX')
             installments = sale.installments or 1
-            SalePayment.query.filter_by(sale_id=sale.id).delete()
+            clear_payments(sale)
             generate_payments_for_sale(sale, method, installments)
 
+        # Orçamento com holdStock: separa o estoque até valid_until
+        elif status == 'QUOTE' and data.get('holdStock'):
+            try:
+                reserve_for_quote(sale, sale_items, sale.valid_until)
+            except InsufficientStock as e:
+                db.session.rollback()
+                return out_of_stock_response(e.items)
+
         db.session.commit()
         return jsonify({'message': 'Transação registrada com sucesso', 'id': sale.id}), 201
 
@@ -397,19 +501,33 @@ def update_quote(id):
             base = sale.created_at if sale.created_at.tzinfo else sale.created_at.replace(tzinfo=timezone.utc)
             sale.valid_until = base + timedelta(days=10)
 
+        # Reserva existente é desfeita e, se ainda desejada, refeita com os novos itens
+        held = release_reservations(sale.id)
+        hold_stock = bool(data.get('holdStock', held))
+
         # Substitui itens
         SaleItem.query.filter_by(sale_id=sale.id).delete()
+        sale_items = []
         for item in items:
-            db.session.add(SaleItem(
+            sale_item = SaleItem(
                 sale_id=sale.id,
                 product_id=item['productId'],
                 product_name=item.get('ProductName') or item['productName'],
                 quantity=int(item['quantity']),
                 price=float(item['price'])
-            ))
+            )
+            db.session.add(sale_item)
+            sale_items.append(sale_item)
 
-        # Observação: não bloqueamos orçamento por estoque aqui,
+        # Observação: sem holdStock não bloqueamos orçamento por estoque aqui,
         # pois a checagem em tempo real deve ser feita no front usando /check_stock/.
+        if hold_stock:
+            try:
+                reserve_for_quote(sale, sale_items, sale.valid_until)
+            except InsufficientStock as e:
+                db.session.rollback()
+                return out_of_stock_response(e.items)
+
         db.session.commit()
         return jsonify({'message': 'Orçamento atualizado com sucesso'}), 200
 
@@ -427,8 +545,11 @@ def delete_transaction(id):
     try:
         sale = Sale.query.get_or_404(id)
 
+        # Orçamento com estoque separado: devolve a reserva
+        release_reservations(sale.id)
+
         # Apaga parcelas e itens vinculados (evita falha por FK)
-        SalePayment.query.filter_by(sale_id=sale.id).delete(synchronize_session=False)
+        clear_payments(sale)
         SaleItem.query.filter_by(sale_id=sale.id).delete(synchronize_session=False)
 
         db.session.delete(sale)
@@ -453,21 +574,22 @@ def convert_quote_to_sale(id):
     if sale.valid_until:
         vu = sale.valid_until if sale.valid_until.tzinfo else sale.valid_until.replace(tzinfo=timezone.utc)
         if now > vu:
+            # reserva de orçamento vencido volta ao estoque
+            if release_reservations(sale.id):
+                db.session.commit()
             return jsonify({'error': 'Orçamento expirado', 'code': 'QUOTE_EXPIRED'}), 422
 
     body = request.get_json(silent=True) or {}
 
-    # 1) Valida estoque (sem abater ainda) – retorna 409 com lista se faltar
-    insuff = compute_insufficient_items(sale.items)
-    if insuff:
-        return jsonify({
-            'error': 'OUT_OF_STOCK',
-            'message': 'Estoque insuficiente para um ou mais itens',
-            'items': insuff
-        }), 409
-
-    # 2) Estoque ok → abate
-    deduct_stock(sale.items)
+    # Baixa atômica do estoque. O que estava reservado para este orçamento volta ao
+    # saldo e é baixado de novo na mesma transação (ninguém "rouba" no meio).
+    # Falta de estoque -> 409 com a lista de itens; nada é confirmado.
+    try:
+        release_reservations(sale.id)
+        deduct_stock_atomic(sale.items)
+    except InsufficientStock as e:
+        db.session.rollback()
+        return out_of_stock_response(e.items)
 
     # =========================
     # MODO A: payments[] explícitos
@@ -476,7 +598,7 @@ def convert_quote_to_sale(id):
         payments_in = body.get('payments') or []
 
         try:
-            SalePayment.query.filter_by(sale_id=sale.id).delete()
+            clear_payments(sale)
 
             allowed_methods = {'PIX', 'DINHEIRO', 'CARTAO_CREDITO', 'CARTAO_DEBITO', 'BOLETO', 'TRANSFERENCIA', 'CREDITO'}
             allowed_status = {'PENDENTE', 'PAGO', 'CANCELADO', 'VENCIDO'}
@@ -564,7 +686,7 @@ def convert_quote_to_sale(id):
         sale.payment_method = method
         sale.installments = installments
 
-        SalePayment.query.filter_by(sale_id=sale.id).delete()
+        clear_payments(sale)
         generate_payments_for_sale(sale, method, installments)
 
         db.session.commit()
@@ -598,6 +720,10 @@ def check_stock():
       - 200 + { "ok": true,  "items": [] } se tudo OK
       - 200 + { "ok": false, "items": [ { productId, productName, available, requested }, ... ] }
     Observação: status 200 para facilitar uso no front (sem try/catch por status).
+
+    Os saldos vêm de um snapshot em cache (TTL curto, invalidado em cada commit que
+    altera produtos). A resposta leva ETag: reenviando o mesmo carrinho com
+    If-None-Match, a API responde 304 enquanto nada relevante mudar.
     """
     data = request.get_json(silent=True) or {}
     raw_items = data.get('items') or []
@@ -605,25 +731,283 @@ def check_stock():
     if not isinstance(raw_items, list) or not raw_items:
         return jsonify({'ok': True, 'items': []}), 200
 
-    # Convertendo em objetos "fake" para reusar compute_insufficient_items
-    class FakeItem:
-        def __init__(self, pid, qty):
-            self.product_id = pid
-            self.product_name = None
-            self.quantity = qty
-
-    fake_list = []
+    check_items = []
     for it in raw_items:
         try:
             pid = it.get('productId')
             qty = int(it.get('quantity') or 0)
             if not pid or qty <= 0:
                 continue
-            fake_list.append(FakeItem(pid, qty))
+            check_items.append(StockCheckItem(str(pid), None, qty))
         except Exception:
             continue
 
-    insuff = compute_insufficient_items(fake_list)
-    if insuff:
-        return jsonify({'ok': False, 'items': insuff}), 200
-    return jsonify({'ok': True, 'items': []}), 200
+    snapshot = stock_cache.get_many(item.product_id for item in check_items)
+    insuff = compute_insufficient_items(check_items, snapshot)
+
+    # ETag = carrinho + saldos dos produtos envolvidos
+    fingerprint = json.dumps(
+        [[i.product_id, i.quantity, snapshot.get(i.product_id, (None, None))[1]] for i in check_items],
+        separators=(',', ':')
+    )
+    etag = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    response = make_response(jsonify({'ok': not insuff, 'items': insuff}), 200)
+    response.set_etag(etag)
+    return response
+
+
+# --------------------------------------------------------------------------------------
+# Ingestão em lote (POST /api/sales/bulk) – sincronização dos PDVs offline
+# --------------------------------------------------------------------------------------
+# Os terminais guardam as vendas offline e reenviam centenas de uma vez. Em vez de um
+# POST /api/sales/ por venda (flush para pegar o id, item a item, checagem por item),
+# o lote é gravado em blocos de EASYSTOCK_BULK_SALES_CHUNK vendas, um commit por bloco:
+#   1. uma única consulta IN (...) traz o saldo de todos os produtos do bloco;
+#   2. as vendas são alocadas, na ordem enviada, contra esse saldo — a que não couber
+#      é recusada (OUT_OF_STOCK) sem afetar as demais;
+#   3. a baixa agregada do bloco é um executemany condicional (try_deduct); se outro
+#      escritor consumiu o saldo no meio tempo, o bloco é realocado com saldo novo;
+#   4. vendas, itens e parcelas entram via Core em executemany e os rollups recebem
+#      as diferenças explicitamente (apply_deltas), já que não há flush do ORM.
+BULK_SALES_MAX = int(os.getenv('EASYSTOCK_BULK_SALES_MAX', '5000'))
+BULK_SALES_CHUNK = int(os.getenv('EASYSTOCK_BULK_SALES_CHUNK', '500'))
+BULK_STOCK_ATTEMPTS = 3
+
+
+class BulkSaleError(ValueError):
+    """Venda do lote com dados inválidos (vira resultado INVALID, não aborta o lote)."""
+
+
+def _parse_sale_timestamp(value, now):
+    """createdAt do PDV (ISO 8601; sem offset = UTC). Ausente -> agora."""
+    if not value:
+        return now
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise BulkSaleError(f'createdAt inválido: {value!r}')
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def parse_bulk_sale(data, now):
+    """
+    Valida uma venda do lote (mesmo formato de POST /api/sales/, status padrão
+    COMPLETED) e monta as linhas de sales, sale_items e sale_payments.
+    Levanta BulkSaleError.
+    """
+    if not isinstance(data, dict):
+        raise BulkSaleError('Venda deve ser um objeto')
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise BulkSaleError('Venda/Orçamento sem itens')
+    status = data.get('status') or 'COMPLETED'
+    if status not in ('COMPLETED', 'QUOTE'):
+        raise BulkSaleError(f'Status inválido no lote: {status}')
+    if data.get('holdStock'):
+        raise BulkSaleError('holdStock não é suportado no lote; use POST /api/sales/')
+
+    sale_id = generate_uuid()
+    item_rows = []
+    for item in items:
+        try:
+            if not item.get('productId'):
+                raise KeyError('productId')
+            quantity = int(item['quantity'])
+            item_rows.append({
+                'id': generate_uuid(),
+                'sale_id': sale_id,
+                'product_id': str(item['productId']),
+                'product_name': item.get('ProductName') or item.get('productName'),
+                'quantity': quantity,
+                'price': from_cents(to_cents(item['price'])),
+            })
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise BulkSaleError('Item inválido: productId, quantity e price são obrigatórios')
+        if quantity <= 0:
+            raise BulkSaleError('Quantidade do item deve ser > 0')
+
+    try:
+        discount_value = float(data.get('discountValue', 0) or 0)
+        freight = float(data.get('freight', 0) or 0)
+        installments = int(data['installments']) if data.get('installments') is not None else None
+        subtotal, _discount_calc, total = compute_totals(items, data.get('discountType'), discount_value, freight)
+    except (TypeError, ValueError):
+        raise BulkSaleError('Valores da venda inválidos')
+
+    created_at = _parse_sale_timestamp(data.get('createdAt'), now)
+    sale_row = {
+        'id': sale_id,
+        'customer_id': data.get('customerId'),
+        'customer_name': data.get('customerName', 'Consumidor Final'),
+        'status': status,
+        'subtotal': subtotal,
+        'discount_type': data.get('discountType'),
+        'discount_value': discount_value,
+        'freight': freight,
+        'total': total,
+        'payment_method': data.get('paymentMethod'),
+        'installments': installments,
+        'valid_until': (created_at + timedelta(days=10)) if status == 'QUOTE' else None,
+        'created_at': created_at,
+    }
+
+    payment_rows = []
+    if status == 'COMPLETED':
+        method = normalize_method(data.get('paymentMethod') or 'PIX')
+        for due, amount, pay_status in payment_schedule(total, created_at, method, installments or 1):
+            payment_rows.append({
+                'id': generate_uuid(),
+                'sale_id': sale_id,
+                'due_date': due,
+                'amount': amount,
+                'payment_method': method,
+                'status': pay_status,
+            })
+    return sale_row, item_rows, payment_rows
+
+
+def _allocate(parsed, snapshot):
+    """
+    Aloca as vendas do bloco, em ordem, contra o saldo do snapshot.
+    Retorna (aceitas, {posição: itens em falta}, baixa agregada por produto).
+    """
+    remaining = {pid: qty for pid, (_name, qty) in snapshot.items()}
+    accepted, rejected, total = [], {}, {}
+    for entry in parsed:
+        pos, sale, items, _payments = entry
+        for row in items:  # nome ausente no payload vem do cadastro
+            if not row['product_name']:
+                row['product_name'] = snapshot.get(row['product_id'], ('',))[0] or ''
+        if sale['status'] != 'COMPLETED':
+            accepted.append(entry)
+            continue
+
+        requested = aggregate_quantities(
+            StockCheckItem(r['product_id'], r['product_name'], r['quantity']) for r in items
+        )
+        shortages = [
+            {'productId': pid, 'productName': req['name'],
+             'available': max(remaining.get(pid, 0), 0), 'requested': req['quantity']}
+            for pid, req in requested.items() if remaining.get(pid, 0) < req['quantity']
+        ]
+        if shortages:
+            rejected[pos] = shortages
+            continue
+        for pid, req in requested.items():
+            remaining[pid] -= req['quantity']
+            total.setdefault(pid, {'quantity': 0, 'name': req['name']})['quantity'] += req['quantity']
+        accepted.append(entry)
+    return accepted, rejected, OrderedDict(sorted(total.items()))
+
+
+def _insert_sales(accepted):
+    """INSERTs em executemany + diferenças dos rollups (na transação corrente)."""
+    sales = [sale for _pos, sale, _items, _payments in accepted]
+    items = [row for _pos, _sale, rows, _payments in accepted for row in rows]
+    payments = [row for _pos, _sale, _items, rows in accepted for row in rows]
+    if not sales:
+        return
+
+    stamp = sync_stamp()
+    db.session.execute(Sale.__table__.insert(), [{**sale, **stamp} for sale in sales])
+    db.session.execute(SaleItem.__table__.insert(), items)
+    if payments:
+        db.session.execute(SalePayment.__table__.insert(), payments)
+
+    deltas = RollupDeltas()
+    for s in sales:
+        deltas.add(sale_contribution(s['status'], s['total'], s['created_at']))
+    for p in payments:
+        deltas.add(receivable_contribution('PARCELA', p['due_date'], p['payment_method'], p['status'], p['amount']))
+    apply_deltas(db.session.connection(), deltas)
+    mark_tables_changed(Sale.__tablename__, SaleItem.__tablename__, SalePayment.__tablename__)
+    queue_events('sales', 'created', [sale_summary(s) for s in sales])
+
+
+def ingest_sales_chunk(parsed):
+    """
+    Grava um bloco de vendas já validadas (parse_bulk_sale) em uma transação.
+    parsed: [(posição, venda, itens, parcelas)]. Retorna {posição: resultado}.
+    """
+    product_ids = {row['product_id'] for _pos, _sale, items, _payments in parsed for row in items}
+    for _attempt in range(BULK_STOCK_ATTEMPTS):
+        snapshot = lock_stock_snapshot(product_ids)
+        accepted, rejected, requested = _allocate(parsed, snapshot)
+        if try_deduct(requested):
+            break
+    else:
+        db.session.rollback()
+        return {pos: {'result': 'FAILED', 'error': 'Estoque alterado durante a gravação; reenvie a venda'}
+                for pos, *_rest in parsed}
+
+    _insert_sales(accepted)
+    db.session.commit()
+
+    outcome = {pos: {'result': 'CREATED', 'id': sale['id']} for pos, sale, _items, _payments in accepted}
+    for pos, items in rejected.items():
+        outcome[pos] = {'result': 'OUT_OF_STOCK', 'error': 'Estoque insuficiente para um ou mais itens',
+                        'items': items}
+    return outcome
+
+
+@sales_bp.route('/bulk', methods=['POST'])
+def add_transactions_bulk():
+    """
+    POST body: { "sales": [ {...}, ... ] } (ou o array diretamente). Cada venda segue o
+    formato de POST /api/sales/, com status padrão COMPLETED, createdAt opcional (hora
+    da venda no PDV) e clientId opcional (devolvido no resultado).
+    Retorna 200 + { created, outOfStock, invalid, failed, results } — um resultado por
+    venda, na ordem enviada: CREATED (com id) | OUT_OF_STOCK (com items) | INVALID | FAILED.
+    """
+    data = request.get_json(silent=True)
+    sales = data.get('sales') if isinstance(data, dict) else data
+    if not isinstance(sales, list) or not sales:
+        return jsonify({'error': 'Informe a lista de vendas em "sales"'}), 400
+    if len(sales) > BULK_SALES_MAX:
+        return jsonify({'error': f'Lote acima do limite de {BULK_SALES_MAX} vendas'}), 413
+
+    now = datetime.now(timezone.utc)
+    results = [None] * len(sales)
+    parsed = []
+    for pos, raw in enumerate(sales):
+        try:
+            parsed.append((pos, *parse_bulk_sale(raw, now)))
+        except BulkSaleError as e:
+            results[pos] = {'result': 'INVALID', 'error': str(e)}
+
+    # Reservas de orçamentos vencidos voltam ao estoque antes da baixa
+    if parsed:
+        release_expired_reservations()
+
+    for start in range(0, len(parsed), BULK_SALES_CHUNK):
+        chunk = parsed[start:start + BULK_SALES_CHUNK]
+        try:
+            outcome = ingest_sales_chunk(chunk)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            outcome = {pos: {'result': 'FAILED', 'error': 'Erro ao salvar transação', 'details': str(e)}
+                       for pos, *_rest in chunk}
+        for pos, result in outcome.items():
+            results[pos] = result
+
+    counts = {'CREATED': 0, 'OUT_OF_STOCK': 0, 'INVALID': 0, 'FAILED': 0}
+    for pos, (raw, result) in enumerate(zip(sales, results)):
+        counts[result['result']] += 1
+        result['index'] = pos
+        if isinstance(raw, dict) and raw.get('clientId') is not None:
+            result['clientId'] = raw['clientId']
+
+    return jsonify({
+        'created': counts['CREATED'],
+        'outOfStock': counts['OUT_OF_STOCK'],
+        'invalid': counts['INVALID'],
+        'failed': counts['FAILED'],
+        'results': results,
+    }), 200
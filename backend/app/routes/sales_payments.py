@@ -10,6 +10,7 @@ from app.models import (
     SalePayment,
     FinancialEntry,
 )
+from app.money import to_cents, from_cents, split_cents
 
 sales_payments_bp = Blueprint("sales_payments", __name__, url_prefix="/api/sales")
 
@@ -56,16 +57,10 @@ def _add_months(d: date, months: int) -> date:
 
 def _split_amount(amount: float, installments: int):
     """
-    Divide um valor em N parcelas (duas casas), ajustando a última para fechar.
-    Retorna lista de floats com soma == amount.
+    Divide um valor em N parcelas (em centavos inteiros; o resto vai para as primeiras).
+    Retorna lista de valores em reais cuja soma é exatamente amount.
     """
-    if installments <= 1:
-        return [round(float(amount), 2)]
-    base = round(float(amount) / installments, 2)
-    parts = [base] * (installments - 1)
-    last = round(float(amount) - sum(parts), 2)
-    parts.append(last)
-    return parts
+    return [from_cents(c) for c in split_cents(to_cents(amount), installments)]
 
 
 def _default_status_for(method: str, provided: str | None) -> str:
@@ -176,7 +171,7 @@ def create_sale_payments(sale_id):
 
                 if installments <= 1:
                     normalized.append({
-                        "amount": round(amount, 2),
+                        "amount": from_cents(to_cents(amount)),
                         "method": method,
                         "due_date": due_date,
                         "status": status,
@@ -216,7 +211,7 @@ def create_sale_payments(sale_id):
 
             if installments <= 1:
                 normalized.append({
-                    "amount": round(amount, 2),
+                    "amount": from_cents(to_cents(amount)),
                     "method": method,
                     "due_date": first_due,
                     "status": status,
@@ -1,30 +1,69 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response, url_for
 from app.models import db, CompanySettings
+from app.logo import LogoError, decode_data_url, normalize_logo
+from app.response_cache import cached_view
 
 settings_bp = Blueprint('settings', __name__, url_prefix='/api/settings')
 
+
+def company_to_dict(settings):
+    data = settings.to_dict()
+    # o hash na URL muda junto com o logo: o navegador pode guardar a imagem indefinidamente
+    data['logoUrl'] = url_for('settings.company_logo', v=settings.logo_hash) if settings.logo_hash else None
+    return data
+
+
+def _apply_logo(settings, data):
+    """
+    Multipart: arquivo 'logo' substitui; campo removeLogo=1 apaga.
+    JSON (formato antigo): logoBase64 com data URL substitui; '' ou null apaga;
+    chave ausente mantém o logo atual.
+    """
+    upload = request.files.get('logo')
+    if upload is not None and upload.filename:
+        raw = upload.read()
+    elif str(data.get('removeLogo', '')).lower() in ('1', 'true'):
+        raw = None
+    elif 'logoBase64' in data:
+        raw = decode_data_url(data['logoBase64']) if data['logoBase64'] else None
+    else:
+        return
+
+    if raw is None:
+        settings.logo_data = settings.logo_mime = settings.logo_hash = None
+        return
+    settings.logo_data, settings.logo_mime, settings.logo_hash = normalize_logo(raw)
+
+
+# GET  /api/settings/company - dados da empresa; o logo vem só como logoUrl
+# POST /api/settings/company - JSON ou multipart/form-data (arquivo em 'logo')
 @settings_bp.route('/company', methods=['GET', 'POST'])
+@cached_view(CompanySettings.__tablename__)
 def company_settings():
     if request.method == 'GET':
         settings = CompanySettings.query.first()
         if not settings:
             return jsonify({}), 200
 
-        return jsonify(settings.to_dict()), 200
+        return jsonify(company_to_dict(settings)), 200
 
     if request.method == 'POST':
-        data = request.get_json()
+        data = request.form if request.mimetype == 'multipart/form-data' else (request.get_json() or {})
 
         settings = CompanySettings.query.first()
         if not settings:
             settings = CompanySettings()
 
+        try:
+            _apply_logo(settings, data)
+        except LogoError as e:
+            return jsonify({'error': str(e)}), 400
+
         settings.name = data.get('name', '')
         settings.cnpj = data.get('cnpj', '')
         settings.address = data.get('address', '')
         settings.phone = data.get('phone', '')
         settings.email = data.get('email', '')
-        settings.logo_base64 = data.get('logoBase64', '')
         settings.theme_color = data.get('themeColor', 'petroleo')
         settings.font_size = data.get('fontSize', 'base')
 
@@ -32,3 +71,28 @@ def company_settings():
         db.session.commit()
 
         return jsonify({'message': 'Configurações salvas com sucesso'}), 200
+
+
+# GET /api/settings/company/logo[?v=<hash>] - imagem do logo (binário)
+#   ETag = sha256 do conteúdo. Com ?v= igual ao hash atual a resposta é imutável
+#   (Cache-Control de um ano); sem ele, o navegador revalida com If-None-Match.
+@settings_bp.route('/company/logo', methods=['GET'])
+def company_logo():
+    row = db.session.query(
+        CompanySettings.logo_data, CompanySettings.logo_mime, CompanySettings.logo_hash
+    ).filter(CompanySettings.logo_hash.isnot(None)).first()
+    if row is None:
+        return jsonify({'error': 'Logo não cadastrado'}), 404
+
+    data, mimetype, digest = row
+    if request.if_none_match.contains(digest):
+        response = make_response('', 304)
+    else:
+        response = make_response(bytes(data))
+        response.mimetype = mimetype
+    response.set_etag(digest)
+    if request.args.get('v') == digest:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,167 @@
+# backend/app/routes/sync.py
+# ======================================================================================
+# GET /api/sync – delta-sync das listas do frontend (versões em app/sync.py).
+#
+#   { "version": V,
+#     "changes": { "products": [...], "customers": [...], "sales": [...], "financialEntries": [...] },
+#     "deleted": { "products": [ids], "customers": [ids], "sales": [ids], "financialEntries": [ids] },
+#     "nextCursor": "..." | null }
+#
+# - Sem ?since: carga completa (todas as linhas, sem exclusões).
+# - ?since=<V anterior>: só as linhas alteradas e as exclusões com versão em (since, V].
+# - V é lido antes das consultas; terminada a paginação, a próxima chamada usa since=V.
+# - ?limit=N (padrão 500, máx. 5000) limita as linhas por página; enquanto houver
+#   nextCursor o cliente pede ?cursor=... (since e V seguem dentro do cursor).
+# - Os itens têm o mesmo formato das listagens (GET /api/products/, /api/sales/, ...).
+# - since anterior à poda das lápides -> 410 SYNC_RESET_REQUIRED (refazer a carga completa).
+# ======================================================================================
+import base64
+import json
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, or_
+
+from app.models import Product, Customer, Sale, FinancialEntry, SyncTombstone
+from app.query_options import with_profile
+from app.sync import current_version, pruned_version
+from app.routes.products import PRODUCT_ROW
+from app.routes.customers import CUSTOMER_ROW
+from app.routes.financial import ENTRY_ROW
+from app.routes.sales import sale_to_dict
+
+sync_bp = Blueprint('sync', __name__)
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 5000
+
+# (chave no JSON, modelo, serializador por tupla de colunas | None = ORM + sale_to_dict)
+SYNC_SOURCES = (
+    ('products', Product, PRODUCT_ROW),
+    ('customers', Customer, CUSTOMER_ROW),
+    ('sales', Sale, None),
+    ('financialEntries', FinancialEntry, ENTRY_ROW),
+)
+TABLE_KEYS = {model.__tablename__: key for key, model, _ in SYNC_SOURCES}
+TOMBSTONES = len(SYNC_SOURCES)  # índice da "fonte" de exclusões, depois das tabelas
+
+
+def _encode_cursor(since, until, source, after):
+    last_version, last_id = after or (None, None)
+    payload = json.dumps([since, until, source, last_version, last_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Retorna (since, until, fonte, (versão, id) | None). Levanta ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        since, until, source, last_version, last_id = json.loads(raw.decode('utf-8'))
+        after = (int(last_version), last_id) if last_version is not None else None
+        return (int(since) if since is not None else None), int(until), int(source), after
+    except Exception as e:
+        raise ValueError('Cursor inválido') from e
+
+
+def _window(query, version_col, id_col, since, until, after):
+    """Linhas com versão em (since, until], depois de `after`, em ordem (versão, id)."""
+    query = query.filter(version_col <= until)
+    if since is not None:
+        query = query.filter(version_col > since)
+    if after is not None:
+        last_version, last_id = after
+        query = query.filter(or_(version_col > last_version,
+                                 and_(version_col == last_version, id_col > last_id)))
+    return query.order_by(version_col, id_col)
+
+
+def _read_source(source, since, until, after, limit):
+    """Retorna (chave, itens, (versão, id) da última linha | None, nº de linhas lidas)."""
+    if source == TOMBSTONES:
+        query = SyncTombstone.query.with_entities(
+            SyncTombstone.table_name, SyncTombstone.row_id, SyncTombstone.sync_version, SyncTombstone.id)
+        rows = _window(query, SyncTombstone.sync_version, SyncTombstone.id, since, until, after).limit(limit).all()
+        last = (rows[-1].sync_version, rows[-1].id) if rows else None
+        return None, [(r.table_name, r.row_id) for r in rows], last, len(rows)
+
+    key, model, serializer = SYNC_SOURCES[source]
+    if serializer is None:
+        query = with_profile(model.query, 'sales.list')
+        rows = _window(query, model.sync_version, model.id, since, until, after).limit(limit).all()
+        last = (rows[-1].sync_version, rows[-1].id) if rows else None
+        return key, [sale_to_dict(s) for s in rows], last, len(rows)
+
+    query = model.query.with_entities(*serializer.columns, model.sync_version, model.id)
+    rows = _window(query, model.sync_version, model.id, since, until, after).limit(limit).all()
+    last = (rows[-1][-2], rows[-1][-1]) if rows else None
+    return key, [serializer(r[:-2]) for r in rows], last, len(rows)
+
+
+def _parse_sync_args():
+    """Retorna (since, until, fonte inicial, after, limit). Levanta ValueError."""
+    try:
+        limit = int(request.args.get('limit') or DEFAULT_SYNC_LIMIT)
+    except ValueError:
+        raise ValueError('Parâmetro limit inválido')
+    if limit < 1:
+        raise ValueError('Parâmetro limit deve ser >= 1')
+    limit = min(limit, MAX_SYNC_LIMIT)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        since, until, source, after = _decode_cursor(cursor)
+        return since, until, source, after, limit
+
+    raw_since = request.args.get('since')
+    since = None
+    if raw_since not in (None, ''):
+        try:
+            since = int(raw_since)
+        except ValueError:
+            raise ValueError('Parâmetro since inválido')
+        if since < 0:
+            raise ValueError('Parâmetro since deve ser >= 0')
+    return since, current_version(), 0, None, limit
+
+
+@sync_bp.route('', methods=['GET'])
+def sync_changes():
+    try:
+        since, until, source, after, limit = _parse_sync_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if since is not None and since < pruned_version():
+        return jsonify({
+            'error': 'SYNC_RESET_REQUIRED',
+            'message': 'Histórico de exclusões já podado; refaça a carga completa (sem since)',
+        }), 410
+
+    changes = {key: [] for key, _model, _serializer in SYNC_SOURCES}
+    deleted = {key: [] for key, _model, _serializer in SYNC_SOURCES}
+    last_source = TOMBSTONES if since is not None else TOMBSTONES - 1  # carga completa: sem lápides
+
+    remaining, next_cursor = limit, None
+    while source <= last_source:
+        if remaining == 0:
+            next_cursor = _encode_cursor(since, until, source, after)
+            break
+        key, items, last, count = _read_source(source, since, until, after, remaining)
+        if key is None:
+            for table_name, row_id in items:
+                if table_name in TABLE_KEYS:
+                    deleted[TABLE_KEYS[table_name]].append(row_id)
+        else:
+            changes[key].extend(items)
+
+        if count == remaining:  # página cheia: a fonte pode ter mais linhas
+            after, remaining = last, 0
+            continue
+        remaining -= count
+        source, after = source + 1, None
+
+    return jsonify({
+        'version': until,
+        'changes': changes,
+        'deleted': deleted,
+        'nextCursor': next_cursor,
+    }), 200
@@ -0,0 +1,445 @@
+# backend/app/search.py
+# ======================================================================================
+# Busca ranqueada de produtos e clientes (/api/products/search, /api/customers/search).
+#
+# SQLite: duas tabelas FTS5 por entidade, mantidas por triggers (valem também para
+# escritas Core, como a importação de CSV):
+#   <tabela>_fts      unicode61 sem acentos + índice de prefixo: busca principal,
+#                     cada termo vira "termo"* (E entre termos), ordem por bm25
+#                     com pesos por coluna.
+#   <tabela>_fts_tri  tokenizer trigram, mesmo rowid: tolerância a erro de
+#                     digitação. Só é consultada quando a busca por prefixo não
+#                     enche a página; os candidatos (OU dos trigramas) são
+#                     filtrados por similaridade (trigramas em comum / do termo).
+# A ligação com a tabela base é pela coluna `ref` (id), não pelo rowid — VACUUM
+# pode renumerar rowids de tabelas sem INTEGER PRIMARY KEY.
+#
+# Outros bancos (Postgres): índice de trigramas em memória por processo, carregado
+# na primeira busca, atualizado pelos commits ORM deste processo e recarregado a
+# cada EASYSTOCK_SEARCH_INDEX_TTL segundos (escritas em massa e outros workers).
+#
+# CPF/CNPJ e telefone são indexados só com dígitos; termos como "123.456" idem.
+# ======================================================================================
+import base64
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+from itertools import chain
+
+from flask import jsonify, request
+from sqlalchemy import event, select, text
+
+from app.models import db, Product, Customer
+from app.pagination import MAX_PAGE_LIMIT
+
+SEARCH_PAGE_LIMIT = 20
+FUZZY_MIN_SIMILARITY = 0.5      # fração dos trigramas do termo presentes na palavra
+FUZZY_CANDIDATES = 200          # candidatos lidos da tabela trigram por página
+INDEX_TTL = float(os.getenv('EASYSTOCK_SEARCH_INDEX_TTL', '300'))
+
+_DIGIT_NOISE = '.-/() +'
+
+# campo: (coluna FTS, expressão SQL sobre {row}, peso no bm25, só dígitos?)
+SearchField = namedtuple('SearchField', 'name expr weight digits')
+SearchSpec = namedtuple('SearchSpec', 'table model fields active_column')
+
+
+def _digits_sql(column):
+    expr = '{row}.' + column
+    for ch in _DIGIT_NOISE:
+        expr = f"replace({expr}, '{ch}', '')"
+    return expr
+
+
+SPECS = {
+    'products': SearchSpec('products', Product, (
+        SearchField('name', '{row}.name', 5.0, False),
+        SearchField('sku', '{row}.sku', 8.0, False),
+        SearchField('marca', '{row}.marca', 2.0, False),
+        SearchField('tipo', "coalesce({row}.tipo, '')", 1.0, False),
+    ), 'is_active'),
+    'customers': SearchSpec('customers', Customer, (
+        SearchField('name', '{row}.name', 5.0, False),
+        SearchField('cpf_cnpj', _digits_sql('cpf_cnpj'), 8.0, True),
+        SearchField('phone', _digits_sql('phone'), 4.0, True),
+    ), None),
+}
+
+
+# --------------------------------------------------------------------------------------
+# Normalização dos termos
+# --------------------------------------------------------------------------------------
+def fold(value):
+    """minúsculas e sem acentos (mesma regra do remove_diacritics do FTS5)."""
+    value = unicodedata.normalize('NFKD', str(value or '').lower())
+    return ''.join(ch for ch in value if not unicodedata.combining(ch))
+
+
+def only_digits(value):
+    return ''.join(ch for ch in str(value or '') if ch.isdigit())
+
+
+def parse_terms(query):
+    """'Camiseta 123.456-7' -> ['camiseta', '1234567']; termos sem letras/dígitos somem."""
+    terms = []
+    for raw in (query or '').split():
+        if re.fullmatch(r'[\d.\-/()+]+', raw):
+            term = only_digits(raw)
+        else:
+            term = ' '.join(re.findall(r'\w+', fold(raw)))
+        if term:
+            terms.append(term)
+    return terms
+
+
+def _trigrams(value):
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def similarity(term, text_value):
+    """Maior fração dos trigramas de `term` presentes em uma palavra de text_value."""
+    wanted = _trigrams(term)
+    if not wanted:
+        return 0.0
+    words = re.findall(r'\w+', text_value)
+    return max((len(wanted & _trigrams(w)) / len(wanted) for w in words), default=0.0)
+
+
+def _fts_quote(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+# --------------------------------------------------------------------------------------
+# SQLite FTS5 (DDL usada pela migração 5)
+# --------------------------------------------------------------------------------------
+def _fts_names(spec):
+    return f'{spec.table}_fts', f'{spec.table}_fts_tri'
+
+
+def _ref_match(fts, row):
+    # linha do FTS com ref = id da linha base (frase exata, via índice do FTS)
+    return (f"SELECT rowid FROM {fts} WHERE {fts} MATCH "
+            f"'ref : \"' || replace({row}.id, '\"', '\"\"') || '\"'")
+
+
+def sqlite_ddl(spec):
+    """Instruções que criam as tabelas FTS5, os triggers e populam o índice."""
+    fts, tri = _fts_names(spec)
+    cols = ', '.join(f.name for f in spec.fields)
+    exprs = lambda row: ', '.join(f.expr.format(row=row) for f in spec.fields)  # noqa: E731
+    watched = ', '.join(sorted({'id'} | {re.search(r'\{row\}\.(\w+)', f.expr).group(1) for f in spec.fields}))
+
+    insert_rows = (
+        f"INSERT INTO {fts} (ref, {cols}) VALUES (new.id, {exprs('new')}); "
+        f"INSERT INTO {tri} (rowid, {cols}) VALUES (last_insert_rowid(), {exprs('new')}); "
+    )
+    delete_rows = (
+        f"DELETE FROM {tri} WHERE rowid IN ({_ref_match(fts, 'old')}); "
+        f"DELETE FROM {fts} WHERE rowid IN ({_ref_match(fts, 'old')}); "
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"ref, {cols}, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {tri} USING fts5({cols}, tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {spec.table} BEGIN {insert_rows}END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {spec.table} BEGIN {delete_rows}END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {watched} ON {spec.table} "
+        f"BEGIN {delete_rows}{insert_rows}END",
+        f"DELETE FROM {fts}",
+        f"DELETE FROM {tri}",
+        f"INSERT INTO {fts} (rowid, ref, {cols}) SELECT rowid, id, {exprs(spec.table)} FROM {spec.table}",
+        f"INSERT INTO {tri} (rowid, {cols}) SELECT rowid, {cols} FROM {fts}",
+    ]
+
+
+def _active_sql(spec, active_only):
+    return f' AND b.{spec.active_column} = 1' if active_only and spec.active_column else ''
+
+
+def _sqlite_prefix(spec, terms, limit, offset, active_only):
+    fts, _ = _fts_names(spec)
+    columns = ' '.join(f.name for f in spec.fields)
+    match = '{%s} : (%s)' % (columns, ' AND '.join(_fts_quote(t) + '*' for t in terms))
+    weights = ', '.join(['0.0'] + [str(f.weight) for f in spec.fields])
+    rows = db.session.execute(text(
+        f'SELECT b.id FROM {fts} f JOIN {spec.table} b ON b.id = f.ref '
+        f'WHERE {fts} MATCH :match{_active_sql(spec, active_only)} '
+        f'ORDER BY bm25({fts}, {weights}), b.id LIMIT :limit OFFSET :offset'
+    ), {'match': match, 'limit': limit, 'offset': offset}).all()
+    return [r[0] for r in rows]
+
+
+def _sqlite_fuzzy(spec, terms, limit, active_only):
+    """Candidatos da tabela trigram -> [(id, {campo: texto})] na ordem do bm25."""
+    fts, tri = _fts_names(spec)
+    grams = sorted(set(chain.from_iterable(_trigrams(t) for t in terms)))
+    if not grams:
+        return []
+    names = [f.name for f in spec.fields]
+    rows = db.session.execute(text(
+        f"SELECT b.id, {', '.join('t.' + n for n in names)} FROM {tri} t "
+        f'JOIN {fts} f ON f.rowid = t.rowid JOIN {spec.table} b ON b.id = f.ref '
+        f'WHERE {tri} MATCH :match{_active_sql(spec, active_only)} '
+        f'ORDER BY bm25({tri}) LIMIT :limit'
+    ), {'match': ' OR '.join(_fts_quote(g) for g in grams), 'limit': limit}).all()
+    return [(r[0], dict(zip(names, r[1:]))) for r in rows]
+
+
+def _rank_fuzzy(spec, terms, candidates):
+    """Mantém quem tem todos os termos parecidos com alguma palavra; ordena pela nota."""
+    scored = []
+    for row_id, values in candidates:
+        score = 0.0
+        for term in terms:
+            sims = [(f.weight, similarity(term, fold(values.get(f.name)))) for f in spec.fields]
+            if max(sim for _, sim in sims) < FUZZY_MIN_SIMILARITY:
+                break
+            score += max(weight * sim for weight, sim in sims)
+        else:
+            scored.append((-score, row_id))
+    return [row_id for _, row_id in sorted(scored)]
+
+
+def _sqlite_search(spec, terms, limit, offset, active_only):
+    # limit + 1 para saber se há próxima página
+    wanted = limit + 1
+    ids = _sqlite_prefix(spec, terms, wanted, offset, active_only)
+    if len(ids) >= wanted or not any(len(t) >= 3 for t in terms):
+        return ids
+
+    # a página passa do fim dos acertos por prefixo: completa com os aproximados
+    # (quem já casou por prefixo fica de fora da parte aproximada)
+    if ids or not offset:
+        prefix_total = offset + len(ids)
+    else:
+        prefix_total = len(_sqlite_prefix(spec, terms, offset, 0, active_only))
+    prefix_ids = set(_sqlite_prefix(spec, terms, prefix_total, 0, active_only)) if prefix_total else set()
+    candidates = [c for c in _sqlite_fuzzy(spec, terms, FUZZY_CANDIDATES + prefix_total, active_only)
+                  if c[0] not in prefix_ids]
+    fuzzy = _rank_fuzzy(spec, terms, candidates)
+    fuzzy_offset = max(0, offset - prefix_total)
+    return ids + fuzzy[fuzzy_offset:fuzzy_offset + wanted - len(ids)]
+
+
+# --------------------------------------------------------------------------------------
+# Índice em memória (bancos sem FTS5)
+# --------------------------------------------------------------------------------------
+class MemoryIndex:
+    """Trigramas com padding de início de palavra ('  c', ' ca', 'cam'...) -> ids."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.docs = {}                  # id -> (textos normalizados por campo, ativo)
+        self.postings = defaultdict(set)
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _grams(value):
+        grams = set()
+        for word in re.findall(r'\w+', value):
+            padded = '  ' + word + ' '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    @staticmethod
+    def _query_grams(term):
+        padded = '  ' + term  # sem o espaço final: o termo é prefixo
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def _normalize(self, values):
+        return tuple(only_digits(values[f.name]) if f.digits else fold(values[f.name]) for f in self.spec.fields)
+
+    def put(self, row_id, values, active=True):
+        self.remove(row_id)
+        texts = self._normalize(values)
+        self.docs[row_id] = (texts, active)
+        for gram in self._grams(' '.join(texts)):
+            self.postings[gram].add(row_id)
+
+    def remove(self, row_id):
+        doc = self.docs.pop(row_id, None)
+        if doc is not None:
+            for gram in self._grams(' '.join(doc[0])):
+                self.postings[gram].discard(row_id)
+
+    def load(self):
+        spec = self.spec
+        model = spec.model
+        columns = [getattr(model, 'id')] + [getattr(model, f.name) for f in spec.fields]
+        if spec.active_column:
+            columns.append(getattr(model, spec.active_column))
+        self.docs.clear()
+        self.postings.clear()
+        for row in db.session.execute(select(*columns).execution_options(yield_per=5000)):
+            values = dict(zip([f.name for f in spec.fields], row[1:1 + len(spec.fields)]))
+            self.put(row[0], values, bool(row[-1]) if spec.active_column else True)
+        self.loaded_at = time.monotonic()
+
+    def search(self, terms, limit, offset, active_only):
+        scored = None
+        for term in terms:
+            grams = self._query_grams(term)
+            counts = Counter(chain.from_iterable(self.postings.get(g, ()) for g in grams))
+            needed = math.ceil(len(grams) * FUZZY_MIN_SIMILARITY)
+            term_scores = {}
+            for row_id, hits in counts.items():
+                if hits < needed or (scored is not None and row_id not in scored):
+                    continue
+                texts, active = self.docs[row_id]
+                if active_only and not active:
+                    continue
+                best = 0.0
+                for f, value in zip(self.spec.fields, texts):
+                    if any(w.startswith(term) for w in value.split()):
+                        best = max(best, 2.0 * f.weight)    # prefixo vale mais que aproximado
+                    else:
+                        sim = similarity(term, value)
+                        if sim >= FUZZY_MIN_SIMILARITY:
+                            best = max(best, sim * f.weight)
+                if best:
+                    term_scores[row_id] = best + (scored or {}).get(row_id, 0.0)
+            scored = term_scores
+            if not scored:
+                return []
+        ranked = sorted(scored.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [row_id for row_id, _ in ranked[offset:offset + limit + 1]]
+
+
+_memory_indexes = {}
+_memory_lock = threading.Lock()
+
+
+def _memory_index(spec):
+    with _memory_lock:
+        index = _memory_indexes.get(spec.table)
+        if index is None:
+            index = _memory_indexes[spec.table] = MemoryIndex(spec)
+    with index.lock:
+        if index.loaded_at is None or time.monotonic() - index.loaded_at > INDEX_TTL:
+            index.load()
+    return index
+
+
+def _pending(session):
+    return session.info.setdefault('search_changes', {})
+
+
+def _after_flush(session, flush_context):
+    # valores lidos aqui (ids já gerados); no after_commit a sessão não emite SQL
+    if not _memory_indexes:
+        return
+    for obj in chain(session.new, session.dirty, session.deleted):
+        spec = SPECS.get(getattr(obj, '__tablename__', None))
+        if spec is None:
+            continue
+        if obj in session.deleted:
+            _pending(session)[(spec.table, obj.id)] = None
+            continue
+        values = {f.name: getattr(obj, f.name) for f in spec.fields}
+        active = bool(getattr(obj, spec.active_column)) if spec.active_column else True
+        _pending(session)[(spec.table, obj.id)] = (values, active)
+
+
+def _do_orm_execute(state):
+    if not _memory_indexes or not (state.is_insert or state.is_update or state.is_delete):
+        return
+    name = getattr(getattr(state.statement, 'table', None), 'name', None)
+    if name in SPECS:
+        _pending(state.session)[(name, None)] = 'reload'
+
+
+def _after_commit(session):
+    changes = session.info.pop('search_changes', None)
+    if not changes:
+        return
+    for (table, row_id), change in changes.items():
+        index = _memory_indexes.get(table)
+        if index is None:
+            continue
+        with index.lock:
+            if change == 'reload':
+                index.loaded_at = None   # recarrega na próxima busca
+            elif change is None:
+                index.remove(row_id)
+            else:
+                index.put(row_id, *change)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('search_changes', None)
+
+
+_SESSION_EVENTS = (
+    ('after_flush', _after_flush),
+    ('do_orm_execute', _do_orm_execute),
+    ('after_commit', _after_commit),
+    ('after_soft_rollback', _after_soft_rollback),
+)
+
+
+def register_search_events():
+    """Mantém os índices em memória (bancos sem FTS5) em dia com os commits (idempotente)."""
+    for name, fn in _SESSION_EVENTS:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def search_ids(table, query, limit=SEARCH_PAGE_LIMIT, offset=0, active_only=False):
+    """Ids na ordem de relevância; até limit + 1 (o excedente indica próxima página)."""
+    spec = SPECS[table]
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return _sqlite_search(spec, terms, limit, offset, active_only)
+    return _memory_index(spec).search(terms, limit, offset, active_only)
+
+
+def _encode_offset(offset):
+    return base64.urlsafe_b64encode(json.dumps({'o': offset}).encode('utf-8')).decode('ascii')
+
+
+def _decode_offset(cursor):
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['o'])
+    except Exception as e:
+        raise ValueError('Cursor inválido') from e
+    if offset < 0:
+        raise ValueError('Cursor inválido')
+    return offset
+
+
+def search_response(table, serializer, id_col, active_only=False):
+    """
+    GET ?q=...&limit=N&cursor=... -> { "items": [...], "nextCursor": "..." | null }.
+    Os itens vêm do serializador (app/serializers.py) na ordem de relevância.
+    """
+    try:
+        raw_limit = request.args.get('limit')
+        limit = int(raw_limit) if raw_limit else SEARCH_PAGE_LIMIT
+        if limit < 1:
+            raise ValueError('Parâmetro limit deve ser >= 1')
+        limit = min(limit, MAX_PAGE_LIMIT)
+        cursor = request.args.get('cursor')
+        offset = _decode_offset(cursor) if cursor else 0
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    ids = search_ids(table, request.args.get('q', ''), limit, offset, active_only)
+    next_cursor = _encode_offset(offset + limit) if len(ids) > limit else None
+    ids = ids[:limit]
+
+    rows = serializer.select(SPECS[table].model.query).filter(id_col.in_(ids)).all() if ids else []
+    by_id = {getattr(r, id_col.key): r for r in rows}
+    items = [serializer(by_id[i]) for i in ids if i in by_id]
+    return jsonify({'items': items, 'nextCursor': next_cursor}), 200
@@ -0,0 +1,55 @@
+# backend/app/serializers.py
+# ======================================================================================
+# Serializadores por tupla de colunas para as listagens grandes.
+#
+# Em vez de hidratar um objeto ORM por linha (identity map, estado, atributos) e
+# montar o dict atributo a atributo, a consulta lê só as colunas necessárias
+# (query.with_entities) e cada linha vira dict com um zip sobre nomes e
+# conversores pré-calculados. A saída é idêntica à dos to_dict correspondentes.
+#
+#     PRODUCT_ROW = RowSerializer(('id', Product.id), ('createdAt', Product.created_at, iso_utc))
+#     rows = PRODUCT_ROW.select(Product.query).all()
+#     [PRODUCT_ROW(r) for r in rows]
+#
+# As linhas mantêm os atributos com o nome das colunas (row.created_at), então a
+# paginação por keyset (app/pagination.py) funciona sem mudanças.
+# ======================================================================================
+from datetime import timezone
+
+
+def iso(value):
+    """date/datetime -> isoformat(); None fica None."""
+    return value.isoformat() if value is not None else None
+
+
+def iso_utc(value):
+    """datetime -> ISO 8601 com offset UTC (naïve é tratado como UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.isoformat() + '+00:00'
+    return value.astimezone(timezone.utc).isoformat()
+
+
+class RowSerializer:
+    """Campos: (nome_json, coluna) ou (nome_json, coluna, conversor)."""
+
+    def __init__(self, *fields):
+        self.names = tuple(f[0] for f in fields)
+        self.columns = tuple(f[1] for f in fields)
+        self.converters = tuple((i, f[2]) for i, f in enumerate(fields) if len(f) > 2 and f[2] is not None)
+
+    def select(self, query):
+        """Troca as entidades da query pelas colunas do serializador (filtros/ordem mantidos)."""
+        return query.with_entities(*self.columns)
+
+    def __call__(self, row):
+        if not self.converters:
+            return dict(zip(self.names, row))
+        values = list(row)
+        for i, convert in self.converters:
+            values[i] = convert(values[i])
+        return dict(zip(self.names, values))
+
+    def many(self, rows):
+        return [self(r) for r in rows]
@@ -0,0 +1,337 @@
+# backend/app/stock.py
+# ======================================================================================
+# Ledger de estoque: baixa, reentrada e reservas atômicas.
+#
+# Em vez de ler product.quantity no Python e gravar de volta (dois checkouts
+# simultâneos passariam na checagem e venderiam o mesmo item), a baixa é um UPDATE
+# condicional:
+#     UPDATE products SET quantity = quantity - :q WHERE id = :id AND quantity >= :q
+# e a falta de estoque é detectada pelo rowcount. Correto com vários workers
+# (SQLite serializa escritores; no Postgres a linha fica bloqueada até o commit).
+#
+# Quando o driver informa rowcount confiável para executemany (SQLite), todos os
+# itens vão em uma única instrução; caso contrário, uma instrução por produto.
+#
+# Reservas (StockReservation) seguram estoque de orçamentos até valid_until: a
+# quantidade sai de products.quantity na reserva e volta ao liberar/expirar.
+#
+# stock_cache guarda um snapshot (nome, quantidade) por produto com TTL curto para
+# a checagem consultiva de /check_stock/. Qualquer commit que altere produtos
+# (ORM ou as baixas/reentradas abaixo) invalida o cache deste processo; entre
+# processos, o TTL limita a defasagem. Baixas reais nunca usam o cache.
+# ======================================================================================
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import chain
+
+from sqlalchemy import bindparam, event, select
+
+from app.models import db, Product, StockReservation
+from app.events import note_products_changed
+from app.response_cache import mark_tables_changed
+from app.sync import sync_stamp
+
+STOCK_CACHE_TTL = float(os.getenv('EASYSTOCK_STOCK_CACHE_TTL', '2'))  # segundos; 0 desliga
+
+
+class InsufficientStock(Exception):
+    """Um ou mais itens sem saldo. `items` segue o formato de compute_insufficient_items."""
+
+    def __init__(self, items):
+        super().__init__('Estoque insuficiente para um ou mais itens')
+        self.items = items
+
+
+def _utc_naive(dt):
+    if dt is None:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def aggregate_quantities(sale_items):
+    """
+    Soma quantidades por produto (o mesmo produto pode aparecer em várias linhas).
+    Retorna OrderedDict product_id -> {'quantity', 'name'} ordenado por id, para que
+    transações concorrentes bloqueiem as linhas sempre na mesma ordem.
+    """
+    totals = {}
+    for item in sale_items:
+        qty = int(item.quantity)
+        if qty <= 0:
+            continue
+        entry = totals.setdefault(str(item.product_id), {'quantity': 0, 'name': item.product_name})
+        entry['quantity'] += qty
+    return OrderedDict(sorted(totals.items()))
+
+
+def find_shortages(requested):
+    """
+    requested: product_id -> {'quantity', 'name'}.
+    Uma única consulta IN (...) e retorna [{productId, productName, available, requested}].
+    """
+    if not requested:
+        return []
+    rows = db.session.execute(
+        select(Product.id, Product.name, Product.quantity).where(Product.id.in_(list(requested)))
+    ).all()
+    found = {r.id: r for r in rows}
+
+    shortages = []
+    for pid, req in requested.items():
+        row = found.get(pid)
+        if row is None:
+            shortages.append({'productId': pid, 'productName': req['name'],
+                              'available': 0, 'requested': req['quantity']})
+        elif int(row.quantity) < req['quantity']:
+            shortages.append({'productId': pid, 'productName': req['name'] or row.name,
+                              'available': int(row.quantity), 'requested': req['quantity']})
+    return shortages
+
+
+def _decrement(requested, stamp):
+    """Executa as baixas condicionais; retorna True se todas foram aplicadas."""
+    table = Product.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam('b_id'), table.c.quantity >= bindparam('b_qty'))
+        .values(quantity=table.c.quantity - bindparam('b_qty'), **stamp)
+    )
+    params = [{'b_id': pid, 'b_qty': req['quantity']} for pid, req in requested.items()]
+
+    mark_stock_changed(requested)
+    conn = db.session.connection()
+    if len(params) > 1 and conn.dialect.supports_sane_multi_rowcount:
+        return conn.execute(stmt, params).rowcount == len(params)
+
+    for p in params:
+        if conn.execute(stmt, p).rowcount != 1:
+            return False
+    return True
+
+
+def _increment(quantities):
+    """quantities: product_id -> quantidade a devolver ao estoque."""
+    params = [{'b_id': pid, 'b_qty': int(qty)} for pid, qty in sorted(quantities.items()) if int(qty) > 0]
+    if not params:
+        return
+    mark_stock_changed(p['b_id'] for p in params)
+    table = Product.__table__
+    db.session.connection().execute(
+        table.update()
+        .where(table.c.id == bindparam('b_id'))
+        .values(quantity=table.c.quantity + bindparam('b_qty'), **sync_stamp()),
+        params,
+    )
+
+
+# --------------------------------------------------------------------------------------
+# Snapshot em cache (checagem consultiva do formulário de venda)
+# --------------------------------------------------------------------------------------
+class StockSnapshotCache:
+    """product_id -> (nome, quantidade), com TTL curto e invalidação no commit."""
+
+    def __init__(self, ttl=STOCK_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, product_ids):
+        """
+        Retorna {product_id: (nome, quantidade)}; produtos inexistentes ficam de fora
+        (e também são lembrados no cache). O que falta vem em um único SELECT ... IN (...).
+        """
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            generation = self._generation
+            for pid in set(product_ids):
+                entry = self._entries.get(pid)
+                if entry is not None and entry[0] > now:
+                    if entry[1] is not None:
+                        found[pid] = entry[1]
+                else:
+                    missing.append(pid)
+
+        if missing:
+            rows = db.session.execute(
+                select(Product.id, Product.name, Product.quantity).where(Product.id.in_(missing))
+            ).all()
+            fresh = dict.fromkeys(missing)
+            fresh.update({r.id: (r.name, int(r.quantity or 0)) for r in rows})
+            found.update({pid: value for pid, value in fresh.items() if value is not None})
+            if self.ttl > 0:
+                with self._lock:
+                    # invalidado durante a consulta: não guarda o que pode estar velho
+                    if generation == self._generation:
+                        expires = now + self.ttl
+                        for pid, value in fresh.items():
+                            self._entries[pid] = (expires, value)
+        return found
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+stock_cache = StockSnapshotCache()
+
+
+def mark_stock_changed(product_ids=()):
+    """Sinaliza que a transação corrente alterou products (para escrita via Core)."""
+    db.session.info['stock_changed'] = True
+    mark_tables_changed(Product.__tablename__)
+    note_products_changed(product_ids)
+
+
+def _before_flush(session, flush_context, instances):
+    if any(isinstance(obj, Product) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['stock_changed'] = True
+
+
+def _after_commit(session):
+    if session.info.pop('stock_changed', False):
+        stock_cache.invalidate()
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('stock_changed', None)
+
+
+_SESSION_EVENTS = (
+    ('before_flush', _before_flush),
+    ('after_commit', _after_commit),
+    ('after_soft_rollback', _after_soft_rollback),
+)
+
+
+def register_stock_events():
+    """Liga a invalidação do stock_cache na sessão do Flask-SQLAlchemy (idempotente)."""
+    for name, fn in _SESSION_EVENTS:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def deduct_stock_atomic(sale_items):
+    """
+    Baixa o estoque dos itens na transação corrente.
+    Levanta InsufficientStock (com o detalhe por item) se algum produto não tiver saldo;
+    nesse caso o chamador deve fazer rollback — baixas parciais não são confirmadas.
+    """
+    requested = aggregate_quantities(sale_items)
+    if not requested:
+        return
+    if not try_deduct(requested):
+        raise InsufficientStock(find_shortages(requested))
+
+
+def try_deduct(requested):
+    """
+    Baixa quantidades já agregadas (aggregate_quantities) em um SAVEPOINT.
+    Retorna False se algum produto não tiver saldo; nesse caso nada é baixado e o
+    resto da transação continua válido.
+    """
+    if not requested:
+        return True
+    stamp = sync_stamp()  # versão alocada fora do SAVEPOINT (ver app/sync.py)
+    # SAVEPOINT: se faltar algum item, desfaz as baixas já feitas antes de montar o
+    # relatório (senão 'available' sairia descontado) sem perder o resto da transação
+    savepoint = db.session.begin_nested()
+    if _decrement(requested, stamp):
+        savepoint.commit()
+        return True
+    savepoint.rollback()
+    return False
+
+
+def lock_stock_snapshot(product_ids):
+    """
+    {product_id: (nome, quantidade)} em uma única consulta IN (...). Em bancos com
+    SELECT ... FOR UPDATE as linhas ficam bloqueadas (em ordem de id) até o commit;
+    no SQLite o FOR UPDATE é ignorado e a baixa condicional continua sendo a garantia.
+    """
+    ids = sorted({str(pid) for pid in product_ids})
+    if not ids:
+        return {}
+    rows = db.session.execute(
+        select(Product.id, Product.name, Product.quantity)
+        .where(Product.id.in_(ids))
+        .order_by(Product.id)
+        .with_for_update()
+    ).all()
+    return {r.id: (r.name, int(r.quantity or 0)) for r in rows}
+
+
+def restock(items):
+    """Reentrada de estoque (devoluções). items: objetos/dicts com product_id e quantity."""
+    totals = {}
+    for item in items:
+        pid = str(item['productId'] if isinstance(item, dict) else item.product_id)
+        qty = int(item['quantity'] if isinstance(item, dict) else item.quantity)
+        totals[pid] = totals.get(pid, 0) + qty
+    _increment(totals)
+
+
+def reserve_for_quote(sale, sale_items, expires_at):
+    """Separa o estoque dos itens para o orçamento até expires_at (InsufficientStock se faltar)."""
+    requested = aggregate_quantities(sale_items)
+    deduct_stock_atomic(sale_items)
+    expires_at = _utc_naive(expires_at)
+    for pid, req in requested.items():
+        db.session.add(StockReservation(
+            sale_id=sale.id,
+            product_id=pid,
+            quantity=req['quantity'],
+            expires_at=expires_at,
+        ))
+
+
+def has_reservations(sale_id):
+    return db.session.query(StockReservation.id).filter_by(sale_id=sale_id).first() is not None
+
+
+def _claim_reservations(*criteria):
+    """
+    Apaga as reservas que atendem aos critérios e retorna {product_id: quantidade}
+    apenas do que ESTA transação apagou — dois processos liberando a mesma reserva
+    não devolvem o estoque em dobro.
+    """
+    table = StockReservation.__table__
+    conn = db.session.connection()
+    totals = {}
+    if conn.dialect.delete_returning:
+        rows = conn.execute(table.delete().where(*criteria).returning(table.c.product_id, table.c.quantity))
+        for pid, qty in rows:
+            totals[pid] = totals.get(pid, 0) + int(qty)
+        return totals
+
+    candidates = conn.execute(select(table.c.id, table.c.product_id, table.c.quantity).where(*criteria)).all()
+    for rid, pid, qty in candidates:
+        if conn.execute(table.delete().where(table.c.id == rid)).rowcount == 1:
+            totals[pid] = totals.get(pid, 0) + int(qty)
+    return totals
+
+
+def release_reservations(sale_id):
+    """Devolve ao estoque o que estava reservado para o orçamento. Retorna True se havia reserva."""
+    totals = _claim_reservations(StockReservation.__table__.c.sale_id == sale_id)
+    _increment(totals)
+    return bool(totals)
+
+
+def release_expired_reservations(now=None):
+    """Libera todas as reservas vencidas. Retorna a quantidade de produtos afetados."""
+    now = _utc_naive(now) or datetime.utcnow()
+    totals = _claim_reservations(StockReservation.__table__.c.expires_at < now)
+    _increment(totals)
+    return len(totals)
@@ -0,0 +1,196 @@
+# backend/app/sync.py
+# ======================================================================================
+# Delta-sync: versão de alteração por linha + lápides de exclusão.
+#
+# products, customers, sales e financial_entries têm sync_version/updated_at. Cada
+# transação que escreve nelas recebe UMA versão nova do contador em sync_state
+# (UPDATE ... SET version = version + 1) e carimba com ela todas as linhas que
+# alterou. O UPDATE bloqueia a linha do contador até o commit, então as versões
+# ficam em ordem de commit: toda versão <= contador confirmado já está visível, e
+# GET /api/sync?since=<v> nunca perde uma escrita que confirmou depois da leitura.
+#
+# - Escritas pelo ORM são carimbadas em before_flush. Itens e parcelas fazem parte
+#   do JSON da venda: alterá-los carimba a venda (Core, em after_flush).
+# - Exclusões pelo ORM gravam uma lápide em sync_tombstones na mesma transação.
+# - Escritas via Core (baixas de estoque, importação, vendas em lote, varredura de
+#   vencidos) incluem sync_stamp() nos valores do INSERT/UPDATE.
+# - A versão é alocada fora de SAVEPOINTs (rollback parcial desfaria o incremento);
+#   se a transação em que foi alocada for desfeita, a próxima escrita aloca outra.
+#
+# Lápides mais velhas que EASYSTOCK_SYNC_TOMBSTONE_DAYS (padrão 90) são podadas por
+# `flask sync-prune`; clientes com since anterior à poda recebem 410 e refazem a
+# carga completa.
+# ======================================================================================
+import os
+from datetime import datetime, timedelta
+from itertools import chain
+
+from sqlalchemy import event, select, update
+
+from app.models import (
+    db,
+    Product,
+    Customer,
+    Sale,
+    SaleItem,
+    SalePayment,
+    FinancialEntry,
+    SyncState,
+    SyncTombstone,
+)
+
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('EASYSTOCK_SYNC_TOMBSTONE_DAYS', '90'))
+
+SYNC_MODELS = (Product, Customer, Sale, FinancialEntry)
+# filhos serializados dentro do pai: alterar um deles carimba o pai
+CHILD_MODELS = {SaleItem: 'sale_id', SalePayment: 'sale_id'}
+
+
+# --------------------------------------------------------------------------------------
+# Versão da transação
+# --------------------------------------------------------------------------------------
+def _allocated_in(tx, rolled_back):
+    """True se `tx` é `rolled_back` ou está aninhada nela."""
+    while tx is not None:
+        if tx is rolled_back:
+            return True
+        tx = tx.parent
+    return False
+
+
+def transaction_version(session=None):
+    """Versão de sincronização da transação corrente (alocada na primeira chamada)."""
+    # db.session é o scoped_session: db.session() devolve a Session real da thread,
+    # a única com get_nested_transaction()/get_transaction()
+    session = session or db.session()
+    allocated = session.info.get('sync_version')
+    if allocated is not None:
+        return allocated[0]
+
+    conn = session.connection()
+    table = SyncState.__table__
+    bumped = conn.execute(update(table).where(table.c.id == 1).values(version=table.c.version + 1)).rowcount
+    if not bumped:  # banco sem a linha semeada pela migração
+        conn.execute(table.insert().values(id=1, version=1, pruned_version=0))
+    version = conn.execute(select(table.c.version).where(table.c.id == 1)).scalar_one()
+
+    tx = session.get_nested_transaction() or session.get_transaction()
+    session.info['sync_version'] = (version, tx)
+    return version
+
+
+def sync_stamp(session=None):
+    """Valores de sync_version/updated_at para INSERT/UPDATE via Core nas tabelas sincronizáveis."""
+    return {'sync_version': transaction_version(session), 'updated_at': datetime.utcnow()}
+
+
+def current_version():
+    """Maior versão já confirmada (limite superior seguro para uma leitura de sync)."""
+    return db.session.execute(select(SyncState.version).where(SyncState.id == 1)).scalar() or 0
+
+
+def pruned_version():
+    return db.session.execute(select(SyncState.pruned_version).where(SyncState.id == 1)).scalar() or 0
+
+
+def touch_sales(sale_ids_select, session=None):
+    """Carimba as vendas cujos ids vêm do SELECT (ex.: parcelas alteradas via Core)."""
+    session = session or db.session()
+    session.connection().execute(
+        update(Sale.__table__).where(Sale.__table__.c.id.in_(sale_ids_select)).values(**sync_stamp(session))
+    )
+
+
+# --------------------------------------------------------------------------------------
+# Eventos da sessão
+# --------------------------------------------------------------------------------------
+def _before_flush(session, flush_context, instances):
+    stamped = [obj for obj in session.new if isinstance(obj, SYNC_MODELS)]
+    stamped += [obj for obj in session.dirty
+                if isinstance(obj, SYNC_MODELS) and session.is_modified(obj, include_collections=False)]
+    parents = {getattr(obj, CHILD_MODELS[type(obj)])
+               for obj in chain(session.new, session.dirty, session.deleted) if type(obj) in CHILD_MODELS}
+    deleted = [(obj.__tablename__, obj.id) for obj in session.deleted if isinstance(obj, SYNC_MODELS)]
+    if not (stamped or parents or deleted):
+        return
+
+    version = transaction_version(session)
+    now = datetime.utcnow()
+    for obj in stamped:
+        obj.sync_version = version
+        obj.updated_at = now
+
+    parents -= {obj.id for obj in stamped if isinstance(obj, Sale)}
+    parents -= {row_id for table, row_id in deleted if table == Sale.__tablename__}
+    parents.discard(None)
+    pending = session.info.setdefault('sync_pending', {'parents': set(), 'tombstones': []})
+    pending['parents'] |= parents
+    pending['tombstones'] += deleted
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.pop('sync_pending', None)
+    if not pending:
+        return
+    conn = session.connection()
+    stamp = sync_stamp(session)
+    if pending['parents']:
+        table = Sale.__table__
+        conn.execute(update(table).where(table.c.id.in_(sorted(pending['parents']))).values(**stamp))
+    if pending['tombstones']:
+        conn.execute(SyncTombstone.__table__.insert(), [
+            {'table_name': table, 'row_id': row_id, 'sync_version': stamp['sync_version'],
+             'deleted_at': stamp['updated_at']}
+            for table, row_id in pending['tombstones']
+        ])
+
+
+def _after_commit(session):
+    session.info.pop('sync_version', None)
+    session.info.pop('sync_pending', None)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    allocated = session.info.get('sync_version')
+    if allocated is not None and _allocated_in(allocated[1], previous_transaction):
+        session.info.pop('sync_version', None)
+    if not previous_transaction.nested:
+        session.info.pop('sync_pending', None)
+
+
+_SESSION_EVENTS = (
+    ('before_flush', _before_flush),
+    ('after_flush', _after_flush),
+    ('after_commit', _after_commit),
+    ('after_soft_rollback', _after_soft_rollback),
+)
+
+
+def register_sync_events():
+    """Liga o carimbo de versões e as lápides na sessão do Flask-SQLAlchemy (idempotente)."""
+    for name, fn in _SESSION_EVENTS:
+        if not event.contains(db.session, name, fn):
+            event.listen(db.session, name, fn)
+
+
+# --------------------------------------------------------------------------------------
+# Manutenção
+# --------------------------------------------------------------------------------------
+def prune_tombstones(retention_days=None):
+    """
+    Apaga lápides mais velhas que `retention_days` e registra a maior versão apagada
+    em sync_state.pruned_version. Retorna quantas foram apagadas. Faz commit.
+    """
+    retention_days = TOMBSTONE_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    table = SyncTombstone.__table__
+    conn = db.session.connection()
+    horizon = conn.execute(select(db.func.max(table.c.sync_version)).where(table.c.deleted_at < cutoff)).scalar()
+    if horizon is None:
+        return 0
+    deleted = conn.execute(table.delete().where(table.c.sync_version <= horizon)).rowcount
+    state = SyncState.__table__
+    conn.execute(update(state).where(state.c.id == 1, state.c.pruned_version < horizon)
+                 .values(pruned_version=horizon))
+    db.session.commit()
+    return deleted
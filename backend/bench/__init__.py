@@ -0,0 +1,10 @@
+# backend/bench/__init__.py
+# ======================================================================================
+# Benchmark do backend (a partir de backend/):
+#
+#   python -m bench run --sales 10000 --out bench-10k.json
+#   python -m bench run --sales 100000 --scenarios list_sales,generate_report
+#   python -m bench compare bench-antes.json bench-depois.json
+#
+# datagen.py gera o dataset sintético; runner.py executa os cenários e grava o JSON.
+# ======================================================================================
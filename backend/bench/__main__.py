@@ -0,0 +1,58 @@
+# backend/bench/__main__.py
+import argparse
+import json
+import sys
+
+from bench.runner import SCENARIOS, compare_results, run_benchmark, write_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Benchmark do backend EasyStock360')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='gera o dataset e executa os cenários')
+    run.add_argument('--sales', type=int, default=10000, help='nº de vendas do dataset (10k/100k/1M)')
+    run.add_argument('--products', type=int, help='nº de produtos (padrão: vendas/10, até 20k)')
+    run.add_argument('--customers', type=int, help='nº de clientes (padrão: vendas/20)')
+    run.add_argument('--entries', type=int, help='nº de lançamentos financeiros (padrão: vendas/50)')
+    run.add_argument('--iterations', type=int, default=200, help='chamadas medidas por cenário')
+    run.add_argument('--warmup', type=int, default=10, help='chamadas de aquecimento por cenário')
+    run.add_argument('--scenarios', default=','.join(SCENARIOS), help='lista separada por vírgula')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--out', default='bench-results.json', help='arquivo JSON de saída')
+    run.add_argument('--keep-db', action='store_true', help='não apaga o SQLite gerado')
+
+    compare = sub.add_parser('compare', help='compara dois arquivos de resultado')
+    compare.add_argument('before')
+    compare.add_argument('after')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_benchmark(
+            sales=args.sales,
+            iterations=args.iterations,
+            warmup=args.warmup,
+            scenarios=[s.strip() for s in args.scenarios.split(',') if s.strip()],
+            seed=args.seed,
+            keep_db=args.keep_db,
+            customers=args.customers,
+            products=args.products,
+            entries=args.entries,
+        )
+        write_results(results, args.out)
+        print(f'Resultados gravados em {args.out}')
+        return 0
+
+    with open(args.before, encoding='utf-8') as fh:
+        before = json.load(fh)
+    with open(args.after, encoding='utf-8') as fh:
+        after = json.load(fh)
+    print(f'{before.get("commit")} -> {after.get("commit")}')
+    for line in compare_results(before, after):
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,297 @@
+# backend/bench/datagen.py
+# ======================================================================================
+# Gerador de dados sintéticos para o benchmark.
+#
+# Gera clientes (CPF/CNPJ válidos), produtos, vendas (COMPLETED / QUOTE /
+# CANCELLED) com itens e parcelas, devoluções e lançamentos financeiros, espalhados
+# pelos últimos `days` dias. Grava direto via Core em lotes (executemany) — passar
+# pela API levaria horas para 1M de vendas — e recalcula os rollups ao final.
+# Determinístico para o mesmo `seed`.
+# ======================================================================================
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from app.models import (
+    db,
+    Customer,
+    Product,
+    Sale,
+    SaleItem,
+    SalePayment,
+    Return,
+    ReturnItem,
+    FinancialEntry,
+)
+from app.money import to_cents, from_cents, split_cents
+from app.rollups import rebuild_rollups
+
+BATCH_SIZE = 5000
+
+METHODS = ('PIX', 'DINHEIRO', 'CARTAO_CREDITO', 'CARTAO_DEBITO', 'BOLETO')
+SINGLE_PAYMENT_METHODS = ('PIX', 'DINHEIRO', 'CARTAO_DEBITO')
+BRANDS = ('Acme', 'Brasilux', 'Nortec', 'Vitra', 'Solaris', 'Tramontina', 'Atlas')
+TYPES = ('Ferramenta', 'Elétrico', 'Hidráulico', 'Acabamento', 'Jardim', None)
+
+
+# --------------------------------------------------------------------------------------
+# Documentos
+# --------------------------------------------------------------------------------------
+def _check_digit(digits, weights):
+    total = sum(d * w for d, w in zip(digits, weights))
+    rest = total % 11
+    return 0 if rest < 2 else 11 - rest
+
+
+def make_cpf(rng):
+    digits = [rng.randint(0, 9) for _ in range(9)]
+    if len(set(digits)) == 1:
+        digits[0] = (digits[0] + 1) % 10
+    digits.append(_check_digit(digits, range(10, 1, -1)))
+    digits.append(_check_digit(digits, range(11, 1, -1)))
+    return ''.join(map(str, digits))
+
+
+def make_cnpj(rng):
+    digits = [rng.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    weights_1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    digits.append(_check_digit(digits, weights_1))
+    digits.append(_check_digit(digits, [6] + weights_1))
+    return ''.join(map(str, digits))
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _add_months(d, months):
+    month = d.month - 1 + months
+    year = d.year + month // 12
+    month = month % 12 + 1
+    return d.replace(year=year, month=month, day=min(d.day, 28))
+
+
+# --------------------------------------------------------------------------------------
+# Gerador
+# --------------------------------------------------------------------------------------
+class DatasetGenerator:
+    """
+    sales: nº de vendas (todas as demais quantidades derivam daqui se omitidas).
+    customers / products / entries: tamanho das tabelas de clientes, produtos e lançamentos.
+    quote_ratio / cancel_ratio / return_ratio: frações das vendas.
+    """
+
+    def __init__(self, sales, customers=None, products=None, entries=None, days=365, seed=42,
+                 quote_ratio=0.1, cancel_ratio=0.02, return_ratio=0.02, batch_size=BATCH_SIZE):
+        self.sales = sales
+        self.customers = customers or max(50, sales // 20)
+        self.products = products or max(50, min(20000, sales // 10))
+        self.entries = entries or max(10, sales // 50)
+        self.days = days
+        self.quote_ratio = quote_ratio
+        self.cancel_ratio = cancel_ratio
+        self.return_ratio = return_ratio
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.counts = {}
+
+    # ----------------------------------------------------------------------------------
+    def run(self):
+        """Grava o dataset no banco da app corrente. Retorna as contagens por tabela."""
+        customer_ids = self._customers()
+        products = self._products()
+        self._sales(customer_ids, products)
+        self._financial_entries()
+        rebuild_rollups()
+        return dict(self.counts)
+
+    def _insert(self, model, rows):
+        if rows:
+            db.session.execute(model.__table__.insert(), rows)
+            self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + len(rows)
+            rows.clear()
+
+    def _flush(self, buffers, force=False):
+        # a ordem respeita as FKs (venda antes de itens/parcelas/devoluções)
+        if force or any(len(rows) >= self.batch_size for rows in buffers.values()):
+            for model, rows in buffers.items():
+                self._insert(model, rows)
+            db.session.commit()
+
+    def _random_datetime(self):
+        return self.now - timedelta(seconds=self.rng.randint(0, self.days * 86400))
+
+    # ----------------------------------------------------------------------------------
+    def _customers(self):
+        rng, ids, rows, seen = self.rng, [], [], set()
+        while len(ids) < self.customers:
+            doc = make_cpf(rng) if rng.random() < 0.8 else make_cnpj(rng)
+            if doc in seen:
+                continue
+            seen.add(doc)
+            cid = _uuid(rng)
+            ids.append(cid)
+            rows.append({
+                'id': cid,
+                'name': f'Cliente {len(ids)}',
+                'cpf_cnpj': doc,
+                'phone': f'(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}',
+                'address': f'Rua {rng.randint(1, 999)}, {rng.randint(1, 3000)}',
+                'created_at': self._random_datetime(),
+            })
+            if len(rows) >= self.batch_size:
+                self._insert(Customer, rows)
+        self._insert(Customer, rows)
+        db.session.commit()
+        return ids
+
+    def _products(self):
+        rng, products, rows = self.rng, [], []
+        for i in range(self.products):
+            pid = _uuid(rng)
+            cost = round(rng.uniform(2, 500), 2)
+            price = round(cost * rng.uniform(1.2, 2.5), 2)
+            name = f'Produto {i + 1}'
+            products.append((pid, name, price))
+            rows.append({
+                'id': pid,
+                'name': name,
+                'sku': f'BENCH-{i + 1:07d}',
+                'marca': rng.choice(BRANDS),
+                'tipo': rng.choice(TYPES),
+                'price': price,
+                'cost': cost,
+                'quantity': rng.randint(10 ** 6, 10 ** 7),  # vendas do benchmark não esgotam
+                'min_stock': rng.randint(1, 20),
+                'is_active': True,
+                'created_at': self._random_datetime(),
+            })
+            if len(rows) >= self.batch_size:
+                self._insert(Product, rows)
+        self._insert(Product, rows)
+        db.session.commit()
+        return products
+
+    def _sales(self, customer_ids, products):
+        rng = self.rng
+        buffers = {Sale: [], SaleItem: [], SalePayment: [], Return: [], ReturnItem: []}
+
+        for _ in range(self.sales):
+            sale_id = _uuid(rng)
+            created_at = self._random_datetime()
+            customer_id = rng.choice(customer_ids) if rng.random() < 0.85 else None
+
+            roll = rng.random()
+            if roll < self.quote_ratio:
+                status = 'QUOTE'
+            elif roll < self.quote_ratio + self.cancel_ratio:
+                status = 'CANCELLED'
+            else:
+                status = 'COMPLETED'
+
+            items = []
+            for pid, name, price in rng.sample(products, rng.randint(1, min(5, len(products)))):
+                items.append({
+                    'id': _uuid(rng),
+                    'sale_id': sale_id,
+                    'product_id': pid,
+                    'product_name': name,
+                    'quantity': rng.randint(1, 5),
+                    'price': price,
+                })
+            subtotal = from_cents(sum(to_cents(i['price']) * i['quantity'] for i in items))
+
+            method = rng.choice(METHODS)
+            installments = 1 if method in SINGLE_PAYMENT_METHODS else rng.randint(1, 6)
+            buffers[Sale].append({
+                'id': sale_id,
+                'customer_id': customer_id,
+                'customer_name': 'Cliente' if customer_id else 'Consumidor Final',
+                'status': status,
+                'subtotal': subtotal,
+                'discount_type': None,
+                'discount_value': 0.0,
+                'freight': 0.0,
+                'total': subtotal,
+                'payment_method': method if status == 'COMPLETED' else None,
+                'installments': installments if status == 'COMPLETED' else None,
+                # orçamentos: parte ainda válida (para o cenário de conversão)
+                'valid_until': (self.now + timedelta(days=30)) if status == 'QUOTE' else None,
+                'created_at': created_at,
+            })
+            buffers[SaleItem].extend(items)
+
+            if status == 'COMPLETED':
+                self._payments(buffers[SalePayment], sale_id, subtotal, method, installments, created_at)
+                if customer_id and rng.random() < self.return_ratio:
+                    self._return(buffers, sale_id, customer_id, items[0], created_at)
+
+            self._flush(buffers)
+        self._flush(buffers, force=True)
+
+    def _payments(self, rows, sale_id, total, method, installments, created_at):
+        amounts = [from_cents(c) for c in split_cents(to_cents(total), installments)]
+        today = self.now.date()
+        for i, amount in enumerate(amounts):
+            due = created_at.date() if method in SINGLE_PAYMENT_METHODS else _add_months(created_at.date(), i)
+            if installments == 1 and method in SINGLE_PAYMENT_METHODS:
+                status = 'PAGO'
+            else:
+                status = 'PAGO' if due < today and self.rng.random() < 0.9 else 'PENDENTE'
+            rows.append({
+                'id': _uuid(self.rng),
+                'sale_id': sale_id,
+                'due_date': due,
+                'amount': amount,
+                'payment_method': method,
+                'status': status,
+                'created_at': created_at,
+            })
+
+    def _return(self, buffers, sale_id, customer_id, item, sale_created_at):
+        return_id = _uuid(self.rng)
+        total = round(item['price'], 2)
+        buffers[Return].append({
+            'id': return_id,
+            'sale_id': sale_id,
+            'customer_id': customer_id,
+            'reason': 'Defeito',
+            'resolution': 'REEMBOLSO',
+            'status': 'CONCLUIDA',
+            'total': total,
+            'created_at': min(self.now, sale_created_at + timedelta(days=self.rng.randint(1, 15))),
+        })
+        buffers[ReturnItem].append({
+            'id': _uuid(self.rng),
+            'return_id': return_id,
+            'product_id': item['product_id'],
+            'product_name': item['product_name'],
+            'quantity': 1,
+            'price': item['price'],
+        })
+
+    def _financial_entries(self):
+        rng, rows = self.rng, []
+        today = self.now.date()
+        for i in range(self.entries):
+            due = (self._random_datetime() + timedelta(days=60)).date()
+            rows.append({
+                'id': _uuid(rng),
+                'type': 'DESPESA' if rng.random() < 0.7 else 'RECEITA',
+                'description': f'Lançamento {i + 1}',
+                'amount': round(rng.uniform(50, 5000), 2),
+                'due_date': due,
+                'payment_method': rng.choice(METHODS),
+                'status': 'PAGO' if due < today and rng.random() < 0.8 else 'PENDENTE',
+                'created_at': self._random_datetime(),
+            })
+            if len(rows) >= self.batch_size:
+                self._insert(FinancialEntry, rows)
+        self._insert(FinancialEntry, rows)
+        db.session.commit()
+
+
+def generate_dataset(sales, **kwargs):
+    """Atalho: gera o dataset no banco da app corrente (precisa de app_context)."""
+    return DatasetGenerator(sales, **kwargs).run()
@@ -0,0 +1,292 @@
+# backend/bench/runner.py
+# ======================================================================================
+# Executa os cenários de benchmark com o test client do Flask.
+#
+# Cada cenário chama o endpoint `iterations` vezes (após `warmup` chamadas não
+# medidas) e registra a latência de cada chamada. O resultado (JSON) traz, por
+# cenário: p50/p90/p95/p99/max/média em ms, vazão (req/s; vendas/s nos cenários de
+# gravação de vendas), nº de erros e a média de instruções SQL por chamada, além do commit git e do tamanho do dataset —
+# `python -m bench compare antes.json depois.json` mostra as diferenças.
+# ======================================================================================
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models import db, Product, Sale, SaleItem, Return
+from app.query_counter import QueryCounter
+from app.json_provider import json_backend
+from bench.datagen import generate_dataset
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Percentil por posto mais próximo (lista já ordenada)."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))  # ceil
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, elapsed, errors, statements):
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3) if v is not None else None  # noqa: E731
+    summary = {f'p{p}_ms': ms(percentile(values, p)) for p in PERCENTILES}
+    summary.update({
+        'max_ms': ms(values[-1]) if values else None,
+        'mean_ms': ms(sum(values) / len(values)) if values else None,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed > 0 else None,
+        'requests': len(values),
+        'errors': errors,
+        'sql_per_request': round(statements / len(values), 2) if values else None,
+    })
+    return summary
+
+
+# --------------------------------------------------------------------------------------
+# Cenários
+# --------------------------------------------------------------------------------------
+class BenchContext:
+    """Ids do dataset usados pelos cenários (carregados uma vez)."""
+
+    def __init__(self, seed=7, limit=20000):
+        self.rng = random.Random(seed)
+        self.product_ids = [pid for (pid,) in db.session.execute(select(Product.id))]
+        self.quote_ids = [sid for (sid,) in db.session.execute(
+            select(Sale.id).where(Sale.status == 'QUOTE', Sale.valid_until > datetime.utcnow()))]
+
+        # um item por venda concluída (com cliente) ainda sem devolução
+        rows = db.session.execute(
+            select(SaleItem.sale_id, SaleItem.product_id, SaleItem.product_name, SaleItem.price)
+            .join(Sale, Sale.id == SaleItem.sale_id)
+            .where(Sale.status == 'COMPLETED', Sale.customer_id.is_not(None),
+                   Sale.id.not_in(select(Return.sale_id)))
+            .limit(limit)
+        ).all()
+        by_sale = {}
+        for row in rows:
+            by_sale.setdefault(row.sale_id, tuple(row))
+        self.returnable = list(by_sale.values())
+        self.rng.shuffle(self.quote_ids)
+        self.rng.shuffle(self.returnable)
+        self.import_batch = 0
+        db.session.commit()
+
+    def cart(self, size=3):
+        return [{'productId': pid, 'productName': 'Bench', 'quantity': self.rng.randint(1, 3), 'price': 10.0}
+                for pid in self.rng.sample(self.product_ids, min(size, len(self.product_ids)))]
+
+
+def _list_sales(client, ctx):
+    return client.get('/api/sales/?status=ALL&limit=100'), 200
+
+
+def _generate_report(client, ctx):
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=30)
+    return client.get(f'/api/reports/?start={start}&end={end}'), 200
+
+
+# Listagens completas (sem ?limit=): medem a serialização. no-cache ignora o cache de respostas.
+def _list_products_all(client, ctx):
+    return client.get('/api/products/', headers={'Cache-Control': 'no-cache'}), 200
+
+
+def _list_customers_all(client, ctx):
+    return client.get('/api/customers/'), 200
+
+
+def _list_financial_all(client, ctx):
+    return client.get('/api/financial'), 200
+
+
+def _check_stock(client, ctx):
+    items = [{'productId': i['productId'], 'quantity': i['quantity']} for i in ctx.cart(5)]
+    return client.post('/api/sales/check_stock/', json={'items': items}), 200
+
+
+def _add_transaction(client, ctx):
+    return client.post('/api/sales/', json={
+        'items': ctx.cart(3), 'status': 'COMPLETED', 'customerName': 'Consumidor Final',
+        'paymentMethod': 'CARTAO_CREDITO', 'installments': 3,
+    }), 201
+
+
+BULK_SALES_PER_REQUEST = 100
+
+
+def _bulk_sales(client, ctx):
+    sales = [{'items': ctx.cart(3), 'customerName': 'Consumidor Final', 'paymentMethod': 'PIX',
+              'installments': 1} for _ in range(BULK_SALES_PER_REQUEST)]
+    return client.post('/api/sales/bulk', json={'sales': sales}), 200
+
+
+def _convert_quote_to_sale(client, ctx):
+    if not ctx.quote_ids:
+        return None, 200
+    sale_id = ctx.quote_ids.pop()
+    return client.post(f'/api/sales/{sale_id}/convert/', json={'paymentMethod': 'PIX', 'installments': 1}), 200
+
+
+def _create_return(client, ctx):
+    if not ctx.returnable:
+        return None, 201
+    sale_id, product_id, product_name, price = ctx.returnable.pop()
+    return client.post('/api/returns', json={
+        'saleId': sale_id, 'reason': 'Benchmark', 'resolution': 'REEMBOLSO',
+        'items': [{'productId': product_id, 'productName': product_name, 'quantity': 1, 'price': price}],
+    }), 201
+
+
+def _import_products_csv(client, ctx, rows=1000):
+    ctx.import_batch += 1
+    buf = io.StringIO()
+    buf.write('name,sku,marca,tipo,cost,price,quantity,minStock\n')
+    for i in range(rows):
+        buf.write(f'Importado {ctx.import_batch}-{i},IMP-{ctx.import_batch:05d}-{i:05d},Acme,,5.5,9.9,100,2\n')
+    data = {'file': (io.BytesIO(buf.getvalue().encode('utf-8')), 'produtos.csv')}
+    return client.post('/api/products/import_csv', data=data, content_type='multipart/form-data'), 201
+
+
+SCENARIOS = {
+    'list_sales': _list_sales,
+    'list_products_all': _list_products_all,
+    'list_customers_all': _list_customers_all,
+    'list_financial_all': _list_financial_all,
+    'generate_report': _generate_report,
+    'check_stock': _check_stock,
+    'add_transaction': _add_transaction,
+    'bulk_sales': _bulk_sales,
+    'convert_quote_to_sale': _convert_quote_to_sale,
+    'create_return': _create_return,
+    'import_products_csv': _import_products_csv,
+}
+
+# importação é cara: menos iterações
+ITERATION_SCALE = {'import_products_csv': 0.1, 'list_products_all': 0.1,
+                   'list_customers_all': 0.1, 'list_financial_all': 0.1, 'bulk_sales': 0.1}
+
+# vendas gravadas por chamada: o resultado ganha sales_per_second (vazão × vendas)
+SALES_PER_REQUEST = {'add_transaction': 1, 'bulk_sales': BULK_SALES_PER_REQUEST}
+
+
+def run_scenario(client, ctx, name, iterations, warmup):
+    fn = SCENARIOS[name]
+    for _ in range(warmup):
+        fn(client, ctx)
+
+    latencies, errors, statements = [], 0, 0
+    started = time.perf_counter()
+    with QueryCounter(db.engine) as qc:
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            response, expected = fn(client, ctx)
+            if response is None:  # dataset sem itens para o cenário
+                break
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code != expected:
+                errors += 1
+        statements = qc.count
+    elapsed = time.perf_counter() - started
+    summary = summarize(latencies, elapsed, errors, statements)
+    if name in SALES_PER_REQUEST and summary['throughput_rps']:
+        summary['sales_per_second'] = round(summary['throughput_rps'] * SALES_PER_REQUEST[name], 2)
+    return summary
+
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(sales=10000, iterations=200, warmup=10, scenarios=None, seed=42, keep_db=False,
+                  customers=None, products=None, entries=None):
+    """
+    Cria um SQLite temporário (EASYSTOCK_DB_FILE), gera o dataset, roda os cenários
+    e retorna o dicionário de resultados.
+    """
+    from app import create_app
+
+    scenarios = list(scenarios or SCENARIOS)
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        raise ValueError(f'Cenários desconhecidos: {unknown}. Disponíveis: {list(SCENARIOS)}')
+
+    workdir = tempfile.mkdtemp(prefix='easystock-bench-')
+    db_file = os.path.join(workdir, 'bench.db')
+    previous_db = os.environ.get('EASYSTOCK_DB_FILE')
+    os.environ['EASYSTOCK_DB_FILE'] = db_file
+    try:
+        app = create_app()
+        with app.app_context():
+            t0 = time.perf_counter()
+            dataset = generate_dataset(sales, seed=seed, customers=customers, products=products, entries=entries)
+            load_seconds = time.perf_counter() - t0
+            ctx = BenchContext(seed=seed)
+
+        client = app.test_client()
+        results = {}
+        for name in scenarios:
+            n = max(1, int(iterations * ITERATION_SCALE.get(name, 1)))
+            with app.app_context():
+                results[name] = run_scenario(client, ctx, name, n, min(warmup, n))
+            print(f'{name:24s} p50={results[name]["p50_ms"]}ms p95={results[name]["p95_ms"]}ms '
+                  f'{results[name]["throughput_rps"]} req/s')
+
+        return {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'json': json_backend(),
+            'platform': platform.platform(),
+            'sales': sales,
+            'iterations': iterations,
+            'dataset': dataset,
+            'load_seconds': round(load_seconds, 2),
+            'database': db_file if keep_db else None,
+            'scenarios': results,
+        }
+    finally:
+        if previous_db is None:
+            os.environ.pop('EASYSTOCK_DB_FILE', None)
+        else:
+            os.environ['EASYSTOCK_DB_FILE'] = previous_db
+        if not keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_results(before, after, metrics=('p50_ms', 'p95_ms', 'throughput_rps', 'sql_per_request')):
+    """Linhas de texto com a variação (%) de cada métrica por cenário."""
+    lines = [f'{"cenário":24s} ' + ' '.join(f'{m:>28s}' for m in metrics)]
+    for name in sorted(set(before['scenarios']) & set(after['scenarios'])):
+        cells = []
+        for m in metrics:
+            a, b = before['scenarios'][name].get(m), after['scenarios'][name].get(m)
+            if a in (None, 0) or b is None:
+                cells.append(f'{str(a):>12s} -> {str(b):<12s}  ')
+            else:
+                cells.append(f'{a:>10} -> {b:<10} {((b - a) / a) * 100:+6.1f}%')
+        lines.append(f'{name:24s} ' + ' '.join(f'{c:>28s}' for c in cells))
+    return lines
+
+
+def write_results(results, path):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(results, fh, indent=2, ensure_ascii=False)
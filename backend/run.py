@@ -1,10 +1,13 @@
+import os
+
 from app import create_app
 
 
 app = create_app()
 
 if __name__ == '__main__':
-    # Executa localmente na porta 5000 e escuta em todas as interfaces
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Servidor de desenvolvimento: porta 5000, todas as interfaces.
+    # Em produção use wsgi.py (gunicorn/waitress).
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv('EASYSTOCK_DEBUG', '1') == '1')
 
 
@@ -0,0 +1,114 @@
+# backend/tests/conftest.py
+# ======================================================================================
+# Fixtures dos testes: app com um SQLite novo por teste (tmp_path) e helpers para
+# criar clientes, produtos e vendas. Rodar a partir de backend/:  python -m pytest
+# ======================================================================================
+import os
+import random
+
+# Antes de importar o app: configurações lidas na importação dos módulos
+os.environ.setdefault('EASYSTOCK_SWEEP_INTERVAL', '0')   # sem thread de varredura
+
+import pytest  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.models import db, Customer, Product, ReceivablesRollup, SalesHourlyRollup  # noqa: E402
+from app.response_cache import response_cache  # noqa: E402
+from app.stock import stock_cache  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Fábrica de apps, cada uma com o seu banco (ex.: comparar volumes de dados)."""
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    apps = []
+
+    def factory(name='test'):
+        monkeypatch.setenv('EASYSTOCK_DB_FILE', str(tmp_path / f'{name}.db'))
+        # caches são globais do processo: cada banco começa do zero
+        response_cache.clear()
+        stock_cache.invalidate()
+        app = create_app()
+        app.config['TESTING'] = True
+        apps.append(app)
+        return app
+
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+_rng = random.Random(1234)
+
+
+@pytest.fixture
+def make_customer(app):
+    def factory(name='Cliente Teste'):
+        cpf = ''.join(str(_rng.randint(0, 9)) for _ in range(11))
+        customer = Customer(name=name, cpf_cnpj=cpf, phone='11999999999', address='Rua A, 1')
+        db.session.add(customer)
+        db.session.commit()
+        return customer.id
+    return factory
+
+
+@pytest.fixture
+def make_product(app):
+    def factory(name='Produto Teste', quantity=10, price=10.0, cost=5.0, min_stock=1):
+        product = Product(name=name, marca='Acme', price=price, cost=cost, quantity=quantity, min_stock=min_stock)
+        db.session.add(product)
+        db.session.commit()
+        return product.id
+    return factory
+
+
+@pytest.fixture
+def make_sale(client):
+    """Cria uma venda pela API (POST /api/sales/). Retorna o id."""
+    def factory(items, customer_id=None, payment_method='PIX', installments=1, status='COMPLETED', **extra):
+        payload = {
+            'items': [{'productId': pid, 'productName': 'Produto Teste', 'quantity': qty, 'price': price}
+                      for pid, qty, price in items],
+            'status': status,
+            'customerId': customer_id,
+            'customerName': 'Cliente Teste' if customer_id else 'Consumidor Final',
+            'paymentMethod': payment_method,
+            'installments': installments,
+            **extra,
+        }
+        response = client.post('/api/sales/', json=payload)
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['id']
+    return factory
+
+
+def stock_of(product_id):
+    db.session.expire_all()
+    return db.session.get(Product, product_id).quantity
+
+
+def rollup_rows():
+    """Linhas não vazias dos rollups, por tabela (comparar incremental x rebuild_rollups)."""
+    rows = {}
+    for model in (SalesHourlyRollup, ReceivablesRollup):
+        rows[model.__tablename__] = sorted(
+            tuple(r) for r in db.session.execute(select(model.__table__)).all()
+            if any(v for k, v in r._mapping.items() if k.endswith('count'))
+        )
+    return rows
@@ -0,0 +1,36 @@
+# backend/tests/test_bench.py
+import random
+
+from bench.datagen import _check_digit, make_cnpj, make_cpf
+from bench.runner import SCENARIOS, compare_results, percentile, run_benchmark, summarize
+
+
+def test_generated_documents_have_valid_check_digits():
+    rng = random.Random(7)
+    for _ in range(50):
+        cpf = [int(c) for c in make_cpf(rng)]
+        assert cpf[9] == _check_digit(cpf[:9], range(10, 1, -1))
+        assert cpf[10] == _check_digit(cpf[:10], range(11, 1, -1))
+        assert len(make_cnpj(rng)) == 14
+
+
+def test_percentiles_and_summary():
+    values = [0.001 * i for i in range(1, 101)]
+    assert percentile(values, 50) == values[49]
+    assert percentile(values, 99) == values[98]
+    assert percentile([], 50) is None
+
+    summary = summarize(values, elapsed=2.0, errors=1, statements=300)
+    assert (summary['p50_ms'], summary['requests'], summary['errors']) == (50.0, 100, 1)
+    assert (summary['throughput_rps'], summary['sql_per_request']) == (50.0, 3.0)
+
+
+def test_every_scenario_runs_without_errors_on_a_small_dataset():
+    results = run_benchmark(sales=60, iterations=2, warmup=1, seed=3)
+    assert set(results['scenarios']) == set(SCENARIOS)
+    for name, summary in results['scenarios'].items():
+        assert summary['errors'] == 0, name
+    assert results['dataset']['sales'] == 60
+
+    lines = compare_results(results, results)
+    assert len(lines) == len(SCENARIOS) + 1 and '+0.0%' in lines[1]
@@ -0,0 +1,51 @@
+# backend/tests/test_bulk_sales.py
+from app.models import db, Sale, SalePayment
+from app.rollups import rebuild_rollups
+from app.routes import sales as sales_routes
+from tests.conftest import rollup_rows, stock_of
+
+
+def _sale(product_id, quantity, **extra):
+    return {'items': [{'productId': product_id, 'productName': 'Produto Teste',
+                       'quantity': quantity, 'price': 10.0}], **extra}
+
+
+def test_each_sale_gets_its_own_result_in_order(client, make_product, monkeypatch):
+    monkeypatch.setattr(sales_routes, 'BULK_SALES_CHUNK', 2)  # vários blocos
+    product_id = make_product(quantity=5)
+
+    response = client.post('/api/sales/bulk', json={'sales': [
+        _sale(product_id, 3, clientId='pdv-1'),
+        {'items': []},
+        _sale(product_id, 3),
+        _sale(product_id, 10, status='QUOTE'),
+        _sale(product_id, 2, createdAt='2024-03-10T14:00:00-03:00', paymentMethod='BOLETO', installments=2),
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['created'], body['outOfStock'], body['invalid'], body['failed']) == (3, 1, 1, 0)
+    assert [r['result'] for r in body['results']] == ['CREATED', 'INVALID', 'OUT_OF_STOCK', 'CREATED', 'CREATED']
+    assert [r['index'] for r in body['results']] == [0, 1, 2, 3, 4]
+    assert body['results'][0]['clientId'] == 'pdv-1'
+    assert body['results'][2]['items'][0]['available'] == 2
+
+    # orçamento não baixa estoque; as duas vendas sim
+    assert stock_of(product_id) == 0
+    offline = db.session.get(Sale, body['results'][4]['id'])
+    assert offline.created_at.isoformat().startswith('2024-03-10T17:00')  # UTC
+    assert sorted(p.amount for p in SalePayment.query.filter_by(sale_id=offline.id)) == [10.0, 10.0]
+
+
+def test_bulk_rows_feed_the_rollups(client, make_product):
+    product_id = make_product(quantity=50)
+    client.post('/api/sales/bulk', json=[_sale(product_id, 1, paymentMethod='BOLETO', installments=3)
+                                         for _ in range(4)])
+    incremental = rollup_rows()
+    rebuild_rollups()
+    assert rollup_rows() == incremental
+
+
+def test_bad_batches_are_rejected(client, monkeypatch):
+    assert client.post('/api/sales/bulk', json={'sales': []}).status_code == 400
+    monkeypatch.setattr(sales_routes, 'BULK_SALES_MAX', 1)
+    assert client.post('/api/sales/bulk', json=[{}, {}]).status_code == 413
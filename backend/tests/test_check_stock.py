@@ -0,0 +1,42 @@
+# backend/tests/test_check_stock.py
+from app.models import db
+from app.query_counter import QueryCounter
+
+
+def _check(client, cart, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return client.post('/api/sales/check_stock/', headers=headers, json={
+        'items': [{'productId': pid, 'quantity': qty} for pid, qty in cart],
+    })
+
+
+def test_shortages_are_listed(client, make_product):
+    plenty, scarce = make_product(quantity=10), make_product(name='Escasso', quantity=2)
+    assert _check(client, [(plenty, 5), (scarce, 2)]).get_json() == {'ok': True, 'items': []}
+
+    body = _check(client, [(plenty, 5), (scarce, 3)]).get_json()
+    assert body['ok'] is False
+    assert body['items'] == [{'productId': scarce, 'productName': 'Escasso', 'available': 2, 'requested': 3}]
+
+
+def test_unchanged_cart_revalidates_with_304_until_stock_moves(client, make_product, make_sale):
+    product_id = make_product(quantity=10)
+    first = _check(client, [(product_id, 3)])
+    etag = first.headers['ETag']
+
+    assert _check(client, [(product_id, 3)], etag).status_code == 304
+    assert _check(client, [(product_id, 4)], etag).status_code == 200  # outro carrinho
+
+    make_sale([(product_id, 8, 10.0)])  # o commit invalida o snapshot
+    changed = _check(client, [(product_id, 3)], etag)
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['ok'] is False
+
+
+def test_large_cart_is_checked_in_one_query(app, client, make_product):
+    cart = [(make_product(name=f'P{i}', quantity=5), 1) for i in range(30)]
+    _check(client, cart[:1])  # aquece o que for carregado uma vez por processo
+    with QueryCounter(db.engine) as counter:
+        assert _check(client, cart).get_json()['ok'] is True
+    assert counter.count == 1
@@ -0,0 +1,47 @@
+# backend/tests/test_compression.py
+import gzip
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def _products(make_product, n=40):
+    for i in range(n):
+        make_product(name=f'Produto com um nome razoavelmente longo {i}')
+
+
+def test_large_json_is_gzipped_when_accepted(client, make_product):
+    _products(make_product)
+    plain = client.get('/api/products/', headers={'Cache-Control': 'no-cache'})
+    assert 'Content-Encoding' not in plain.headers
+
+    packed = client.get('/api/products/', headers={**GZIP, 'Cache-Control': 'no-cache'})
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in packed.headers['Vary']
+    assert len(packed.data) < len(plain.data)
+    assert gzip.decompress(packed.data) == plain.data
+
+    refused = client.get('/api/products/', headers={'Accept-Encoding': 'gzip;q=0', 'Cache-Control': 'no-cache'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_small_bodies_are_left_alone(client):
+    response = client.get('/api/customers/', headers=GZIP)
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_compressed_etag_is_weak_and_still_revalidates(client, make_product):
+    _products(make_product)
+    first = client.get('/api/products/', headers=GZIP)
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].startswith('W/')
+    again = client.get('/api/products/', headers={**GZIP, 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_streamed_export_is_compressed_chunk_by_chunk(client, make_product):
+    _products(make_product)
+    plain = client.get('/api/products/export?format=ndjson').data
+    packed = client.get('/api/products/export?format=ndjson', headers=GZIP)
+    assert packed.is_streamed and packed.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in packed.headers
+    assert gzip.decompress(packed.data) == plain
@@ -0,0 +1,89 @@
+# backend/tests/test_credits.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.credits import credit_balance, grant_credit, rebuild_credit_balances
+from app.models import db, Customer, CustomerCredit, CustomerCreditMovement
+
+
+def _grant(customer_id, *amounts):
+    """Concede créditos (centavos) com created_at crescente, na ordem dada."""
+    base = datetime.utcnow() - timedelta(days=len(amounts))
+    ids = []
+    for i, amount in enumerate(amounts):
+        credit_id = grant_credit(customer_id, amount)
+        db.session.execute(update(CustomerCredit).where(CustomerCredit.id == credit_id)
+                           .values(created_at=base + timedelta(days=i)))
+        ids.append(credit_id)
+    db.session.commit()
+    return ids
+
+
+def test_liquidation_consumes_oldest_credits_first(client, make_customer):
+    customer_id = make_customer()
+    oldest, middle, newest = _grant(customer_id, 1000, 2000, 500)
+    assert credit_balance(customer_id) == 3500
+
+    response = client.post(f'/api/customers/{customer_id}/credits/liquidate', json={'amount': 25})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['used'] == [{'creditId': oldest, 'used': 10.0}, {'creditId': middle, 'used': 15.0}]
+    assert body['newBalance'] == 10.0
+
+    credits = client.get(f'/api/customers/{customer_id}/credits/').get_json()
+    assert credits['balance'] == 10.0
+    assert [(c['id'], c['balance']) for c in credits['entries']] == [(oldest, 0.0), (middle, 5.0), (newest, 5.0)]
+
+    # o livro explica o saldo: concessões e um abatimento por crédito usado
+    movements = client.get(f'/api/customers/{customer_id}/credits/movements').get_json()
+    liquidations = [m for m in movements if m['kind'] == 'LIQUIDACAO']
+    assert sorted((m['creditId'], m['amount']) for m in liquidations) == sorted([(oldest, -10.0), (middle, -15.0)])
+    assert {m['reference'] for m in liquidations} == {body['liquidationId']}
+    assert sum(m['amount'] for m in movements) == 10.0
+
+
+def test_model_serializers_match_their_columns(client, make_customer):
+    customer_id = make_customer()
+    (credit_id,) = _grant(customer_id, 1000)
+    client.post(f'/api/customers/{customer_id}/credits/liquidate', json={'amount': 4})
+
+    credit = db.session.get(CustomerCredit, credit_id).to_dict()
+    assert (credit['customerId'], credit['returnId'], credit['amount'], credit['balance']) \
+        == (customer_id, None, 10.0, 6.0)
+    # o livro serializado pelo modelo é o mesmo da listagem (MOVEMENT_ROW)
+    listed = {m['id']: m for m in client.get(f'/api/customers/{customer_id}/credits/movements').get_json()}
+    movements = CustomerCreditMovement.query.filter_by(customer_id=customer_id).all()
+    assert len(movements) == len(listed) == 2
+    for movement in movements:
+        assert movement.to_dict() == listed[movement.id]
+
+
+def test_insufficient_credit_changes_nothing(client, make_customer):
+    customer_id = make_customer()
+    _grant(customer_id, 1000, 500)
+
+    response = client.post(f'/api/customers/{customer_id}/credits/liquidate', json={'amount': 15.01})
+    assert response.status_code == 400
+    assert response.get_json()['available'] == 15.0
+    assert credit_balance(customer_id) == 1500
+    assert client.post(f'/api/customers/{customer_id}/credits/liquidate', json={'amount': 0}).status_code == 400
+
+
+def test_balance_out_of_sync_with_credits_is_a_conflict(client, make_customer):
+    customer_id = make_customer()
+    _grant(customer_id, 1000)
+    db.session.execute(update(Customer).where(Customer.id == customer_id).values(credit_balance=50.0))
+    db.session.commit()
+
+    response = client.post(f'/api/customers/{customer_id}/credits/liquidate', json={'amount': 20})
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'CREDIT_CONTENTION'
+    # rollback: nem o saldo mantido nem os créditos mudaram
+    assert credit_balance(customer_id) == 5000
+
+    assert rebuild_credit_balances() == 1
+    assert credit_balance(customer_id) == 1000
+    movements = client.get(f'/api/customers/{customer_id}/credits/movements').get_json()
+    assert [(m['kind'], m['amount'], m['balanceAfter']) for m in movements if m['kind'] == 'SALDO_INICIAL'] \
+        == [('SALDO_INICIAL', -40.0, 10.0)]
@@ -0,0 +1,39 @@
+# backend/tests/test_dashboard.py
+from app.rollups import rebuild_rollups
+from tests.conftest import rollup_rows
+
+
+def test_dashboard_kpis_follow_writes(client, make_customer, make_product, make_sale):
+    product_id = make_product(quantity=20, min_stock=15)
+    customer_id = make_customer()
+    make_sale([(product_id, 2, 10.0)])
+    kept = make_sale([(product_id, 3, 10.0)], customer_id=customer_id, payment_method='BOLETO', installments=3)
+    cancelled = make_sale([(product_id, 1, 10.0)])
+    make_sale([(product_id, 1, 10.0)], status='QUOTE')
+    assert client.put(f'/api/sales/{cancelled}/cancel').status_code == 200
+
+    kpis = client.get('/api/dashboard/').get_json()
+    assert (kpis['salesTodayCount'], kpis['salesTodayValue']) == (2, 50.0)
+    assert kpis['openQuotesCount'] == 1
+    assert kpis['lowStockProductsCount'] == 1
+    assert sum(day['revenue'] for day in kpis['daily']) == 50.0
+    assert sum(hour['salesCount'] for hour in kpis['hourly']) == 2
+    # só a 1ª parcela vence no período padrão (últimos 30 dias)
+    assert kpis['receivablesByMethodStatus']['BOLETO']['PENDENTE'] == 10.0
+    assert {s['id'] for s in kpis['recentSales']} >= {kept}
+
+
+def test_incremental_rollups_match_a_full_rebuild(client, make_customer, make_product, make_sale):
+    product_id = make_product(quantity=20)
+    customer_id = make_customer()
+    sale_id = make_sale([(product_id, 4, 12.5)], customer_id=customer_id, payment_method='BOLETO', installments=2)
+    make_sale([(product_id, 1, 10.0)])
+    response = client.post('/api/returns', json={
+        'saleId': sale_id, 'reason': 'Defeito', 'resolution': 'REEMBOLSO',
+        'items': [{'productId': product_id, 'productName': 'Produto Teste', 'quantity': 1, 'price': 12.5}],
+    })
+    assert response.status_code == 201
+
+    incremental = rollup_rows()
+    rebuild_rollups()
+    assert rollup_rows() == incremental
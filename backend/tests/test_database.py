@@ -0,0 +1,35 @@
+# backend/tests/test_database.py
+from app.database import engine_options
+from app.models import db
+
+
+def _pragma(conn, name):
+    return conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+
+def test_sqlite_connections_get_the_pragmas(app):
+    with db.engine.connect() as conn:
+        assert _pragma(conn, 'journal_mode') == 'wal'
+        assert _pragma(conn, 'synchronous') == 1  # NORMAL
+        assert _pragma(conn, 'busy_timeout') == 5000
+
+
+def test_readers_are_not_blocked_by_an_open_writer(app, make_product):
+    product_id = make_product(quantity=7)
+    with db.engine.connect() as writer, db.engine.connect() as reader:
+        writer.exec_driver_sql('BEGIN IMMEDIATE')
+        writer.exec_driver_sql('UPDATE products SET quantity = 0')
+        # WAL: o leitor vê o último commit sem esperar o lock de escrita
+        assert reader.exec_driver_sql('SELECT quantity FROM products WHERE id = ?', (product_id,)).scalar() == 7
+        writer.rollback()
+
+
+def test_pool_options_come_from_the_environment(monkeypatch):
+    assert engine_options('sqlite:////tmp/x.db') == {'pool_pre_ping': False}
+    assert engine_options('postgresql://db/easystock') == {'pool_pre_ping': True, 'pool_recycle': 1800}
+
+    monkeypatch.setenv('EASYSTOCK_DB_POOL_SIZE', '20')
+    monkeypatch.setenv('EASYSTOCK_DB_POOL_RECYCLE', '600')
+    monkeypatch.setenv('EASYSTOCK_DB_PRE_PING', '0')
+    assert engine_options('postgresql://db/easystock') == {'pool_size': 20, 'pool_recycle': 600,
+                                                            'pool_pre_ping': False}
@@ -0,0 +1,56 @@
+# backend/tests/test_events.py
+import json
+
+import pytest
+
+from app.events import EVENTS_MAX_CLIENTS, SERVER_THREADS, TOPICS, event_bus
+from app.models import db, Product
+
+
+@pytest.fixture
+def subscriber(app):
+    sub, replay = event_bus.subscribe(set(TOPICS))
+    assert replay == []
+    yield sub
+    event_bus.unsubscribe(sub)
+
+
+def _drain(sub):
+    events = []
+    while not sub.queue.empty():
+        ev = sub.queue.get_nowait()
+        events.append((ev.topic, json.loads(ev.data)))
+    return events
+
+
+def test_default_client_cap_leaves_threads_for_other_requests():
+    assert EVENTS_MAX_CLIENTS == SERVER_THREADS // 2 < SERVER_THREADS
+
+
+def test_stock_and_sale_events_are_published_on_commit(client, subscriber, make_product, make_sale):
+    product_id = make_product(quantity=5, min_stock=3)
+    _drain(subscriber)
+
+    sale_id = make_sale([(product_id, 3, 10.0)])
+    events = dict(_drain(subscriber))
+    assert events['stock']['products'][0] == {
+        'id': product_id, 'name': 'Produto Teste', 'quantity': 2, 'minStock': 3, 'lowStock': True, 'isActive': True,
+    }
+    assert events['sales']['action'] == 'created'
+    assert [s['id'] for s in events['sales']['sales']] == [sale_id]
+
+
+def test_rolled_back_changes_publish_nothing(app, subscriber, make_product):
+    product_id = make_product()
+    _drain(subscriber)
+    db.session.get(Product, product_id).quantity = 99
+    db.session.flush()
+    db.session.rollback()
+    assert _drain(subscriber) == []
+
+
+def test_stream_refuses_clients_over_the_cap(client, monkeypatch):
+    monkeypatch.setattr(event_bus, 'max_clients', 0)
+    response = client.get('/api/events')
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
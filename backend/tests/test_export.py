@@ -0,0 +1,51 @@
+# backend/tests/test_export.py
+import csv
+import io
+import json
+from datetime import datetime
+
+from app.models import Product
+from app.product_import import REQUIRED_FIELDS
+
+
+def test_sales_export_streams_ndjson_with_filters(client, make_product, make_sale):
+    product_id = make_product(quantity=10)
+    sold = [make_sale([(product_id, 1, 10.0)]), make_sale([(product_id, 2, 10.0)])]
+    make_sale([(product_id, 1, 10.0)], status='QUOTE')
+
+    today = datetime.utcnow().date().isoformat()  # created_at é gravado em UTC
+    response = client.get(f'/api/sales/export?format=ndjson&start={today}&end={today}')
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(r['id'] for r in rows) == sorted(sold)
+    assert {r['status'] for r in rows} == {'COMPLETED'}
+    assert sorted(r['total'] for r in rows) == [10.0, 20.0]
+
+    assert client.get('/api/sales/export?format=ndjson&start=2000-01-01&end=2000-01-02').get_data() == b''
+    assert client.get('/api/sales/export?format=xml').status_code == 400
+    assert client.get('/api/sales/export?start=ontem').status_code == 400
+
+
+def test_products_csv_export_round_trips_through_import(make_app):
+    source = make_app('origem')
+    with source.app_context():
+        client = source.test_client()
+        for sku, price in (('A-1', 19.9), ('A-2', 0.1)):
+            assert client.post('/api/products/', json={
+                'name': f'Produto {sku}', 'sku': sku, 'marca': 'Acme', 'tipo': 'Aço',
+                'cost': 0.05, 'price': price, 'quantity': 4, 'minStock': 1,
+            }).status_code == 201
+        response = client.get('/api/products/export')
+        exported = response.get_data()
+    assert response.headers['Content-Disposition'] == 'attachment; filename="produtos.csv"'
+    assert set(REQUIRED_FIELDS) <= set(next(csv.reader(io.StringIO(exported.decode()))))
+
+    target = make_app('destino')
+    with target.app_context():
+        report = target.test_client().post('/api/products/import_csv?async=0', data={
+            'file': (io.BytesIO(exported), 'produtos.csv'),
+        }, content_type='multipart/form-data').get_json()
+        assert report['created'] == 2
+        assert sorted((p.sku, p.price, p.cost, p.quantity) for p in Product.query) == \
+            [('A-1', 19.9, 0.05, 4), ('A-2', 0.1, 0.05, 4)]
@@ -0,0 +1,57 @@
+# backend/tests/test_idempotency.py
+from app.idempotency import CLAIMED, claim_key, request_fingerprint
+from app.models import Sale
+from tests.conftest import stock_of
+
+
+def _payload(product_id, quantity=2):
+    return {
+        'items': [{'productId': product_id, 'productName': 'Produto Teste', 'quantity': quantity, 'price': 10.0}],
+        'status': 'COMPLETED', 'paymentMethod': 'PIX',
+    }
+
+
+def test_retry_replays_the_original_response(client, make_product):
+    product_id = make_product(quantity=5)
+    headers = {'Idempotency-Key': 'venda-1'}
+
+    first = client.post('/api/sales/', json=_payload(product_id), headers=headers)
+    again = client.post('/api/sales/', json=_payload(product_id), headers=headers)
+
+    assert first.status_code == again.status_code == 201
+    assert again.get_json() == first.get_json()
+    assert again.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    # executou uma vez só
+    assert Sale.query.count() == 1
+    assert stock_of(product_id) == 3
+
+
+def test_key_reused_with_another_body_is_rejected(client, make_product):
+    product_id = make_product(quantity=5)
+    headers = {'Idempotency-Key': 'venda-2'}
+    assert client.post('/api/sales/', json=_payload(product_id), headers=headers).status_code == 201
+
+    response = client.post('/api/sales/', json=_payload(product_id, quantity=3), headers=headers)
+    assert response.status_code == 422
+    assert response.get_json()['error'] == 'IDEMPOTENCY_KEY_REUSED'
+    assert stock_of(product_id) == 3
+
+
+def test_retry_while_first_request_runs_gets_409(app, client, make_product):
+    product_id = make_product(quantity=5)
+    with app.test_request_context('/api/sales/', method='POST', json=_payload(product_id)):
+        assert claim_key('venda-3', request_fingerprint())[0] == CLAIMED
+
+    response = client.post('/api/sales/', json=_payload(product_id), headers={'Idempotency-Key': 'venda-3'})
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'IDEMPOTENCY_IN_PROGRESS'
+    assert response.headers['Retry-After']
+    assert stock_of(product_id) == 5
+
+
+def test_requests_without_key_are_not_deduplicated(client, make_product):
+    product_id = make_product(quantity=5)
+    for _ in range(2):
+        assert client.post('/api/sales/', json=_payload(product_id)).status_code == 201
+    assert stock_of(product_id) == 1
@@ -0,0 +1,31 @@
+# backend/tests/test_instrumentation.py
+import pytest
+
+
+@pytest.fixture
+def metrics_app(make_app, monkeypatch):
+    monkeypatch.setenv('EASYSTOCK_METRICS', '1')
+
+    def factory(token=''):
+        monkeypatch.setenv('EASYSTOCK_METRICS_TOKEN', token)
+        return make_app(f'metrics{token}')
+    return factory
+
+
+def test_metrics_route_is_off_without_token(metrics_app):
+    client = metrics_app().test_client()
+    response = client.get('/api/customers/')
+    assert 'Server-Timing' in response.headers
+    assert client.get('/api/_metrics').status_code == 404
+
+
+def test_metrics_route_requires_the_token(metrics_app):
+    client = metrics_app('s3cret').test_client()
+    client.get('/api/customers/')
+
+    assert client.get('/api/_metrics').status_code == 401
+    assert client.get('/api/_metrics', headers={'Authorization': 'Bearer errado'}).status_code == 401
+
+    response = client.get('/api/_metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert 'easystock_request_duration_seconds_count{method="GET",endpoint="/api/customers/"} 1' in response.text
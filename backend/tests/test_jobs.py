@@ -0,0 +1,76 @@
+# backend/tests/test_jobs.py
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from app import jobs
+from app.models import db, Job, Product
+
+
+def _wait(client, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # o client reaproveita o app_context do fixture (e a sessão): encerra a
+        # transação de leitura para enxergar o que a thread do job gravou
+        db.session.remove()
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f'job não terminou: {job}')
+
+
+def test_async_import_runs_in_the_background(client):
+    csv_body = b'name,sku,marca,tipo,cost,price,quantity,minStock\nParafuso,SKU-1,Acme,,0.1,0.25,10,1\n'
+    response = client.post('/api/products/import_csv?async=1', data={
+        'file': (io.BytesIO(csv_body), 'produtos.csv'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 202
+    body = response.get_json()
+    assert response.headers['Location'] == body['statusUrl']
+
+    job = _wait(client, body['statusUrl'])
+    assert job['status'] == 'done', job
+    assert job['result']['created'] == 1
+    assert Product.query.filter_by(sku='SKU-1').count() == 1
+    params = json.loads(db.session.get(Job, body['jobId']).params)
+    assert not os.path.exists(params['upload'])  # upload apagado ao fim do job
+
+
+def test_failing_handler_marks_the_job_failed(client, monkeypatch):
+    def explode(params):
+        raise RuntimeError('falhou de propósito')
+
+    monkeypatch.setitem(jobs._HANDLERS, 'test_explode', explode)
+    job = jobs.submit_job('test_explode', {'x': 1})
+    result = _wait(client, f'/api/jobs/{job.id}')
+    assert (result['status'], result['error']) == ('failed', 'falhou de propósito')
+    assert client.get('/api/jobs/nao-existe').status_code == 404
+
+
+def test_cleanup_removes_old_jobs_and_fails_stuck_ones(app):
+    old = datetime.utcnow() - timedelta(days=30)
+    finished = Job(kind='x', status='done', created_at=old, finished_at=old)
+    stuck = Job(kind='x', status='running', created_at=old)
+    db.session.add_all([finished, stuck])
+    db.session.commit()
+    finished_id, stuck_id = finished.id, stuck.id
+
+    assert jobs.cleanup_jobs(retention_days=7) == (1, 1)
+    db.session.expire_all()
+    assert db.session.get(Job, finished_id) is None
+    assert db.session.get(Job, stuck_id).status == 'failed'
+
+
+def test_long_report_period_becomes_a_job_with_the_same_result(client, make_product, make_sale):
+    product_id = make_product(quantity=10)
+    make_sale([(product_id, 2, 10.0)])
+    query = '/api/reports/?start=2000-01-01&end=2100-01-01'
+
+    response = client.get(query)
+    assert response.status_code == 202
+    job = _wait(client, response.get_json()['statusUrl'])
+    assert job['status'] == 'done', job
+    assert job['result'] == client.get(query + '&async=0').get_json()
@@ -0,0 +1,48 @@
+# backend/tests/test_json.py
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.models import Customer
+
+
+def test_fast_provider_matches_the_default_output(app):
+    payload = {
+        'quando': datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        'dia': date(2024, 5, 1),
+        'valor': Decimal('19.90'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'nome': 'Ação São João',
+        'porHora': {10: [1.5, None, True], 9: []},
+    }
+    fast = app.json.dumps(payload)
+    default = DefaultJSONProvider(app).dumps(payload)
+    assert json.loads(fast) == json.loads(default)
+    assert 'São' in fast  # UTF-8 em vez de \uXXXX
+
+    with app.test_request_context():
+        response = app.json.response(payload)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == json.loads(default)
+
+
+def test_listing_rows_serialize_like_to_dict(client, make_customer):
+    ids = {make_customer(name=f'Cliente {i}') for i in range(3)}
+    listed = {c['id']: c for c in client.get('/api/customers/').get_json()}
+    assert set(listed) == ids
+    for customer in Customer.query:
+        assert listed[customer.id] == customer.to_dict()
+
+
+def test_product_rows_keep_the_listing_shape(client, make_product):
+    product_id = make_product(name='Parafuso', quantity=7, price=19.9, cost=0.1)
+    (listed,) = client.get('/api/products/').get_json()
+    created_at = listed.pop('createdAt')
+    assert created_at.endswith('+00:00')
+    assert listed == {
+        'id': product_id, 'name': 'Parafuso', 'sku': listed['sku'], 'marca': 'Acme', 'tipo': None,
+        'price': 19.9, 'cost': 0.1, 'quantity': 7, 'minStock': 1, 'isActive': True,
+    }
@@ -0,0 +1,47 @@
+# backend/tests/test_logo.py
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from app.logo import LOGO_MAX_SIDE, LogoError, normalize_logo
+
+
+def _png_chunk(kind, payload):
+    return (struct.pack('>I', len(payload)) + kind + payload
+            + struct.pack('>I', zlib.crc32(kind + payload) & 0xffffffff))
+
+
+def _bomb_png(side=50_000):
+    """PNG de poucos bytes cujo cabeçalho declara side × side px."""
+    header = struct.pack('>IIBBBBB', side, side, 8, 0, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(b'\x00')) + _png_chunk(b'IEND', b''))
+
+
+def _png(size, mode='RGB'):
+    out = io.BytesIO()
+    Image.new(mode, size).save(out, format='PNG')
+    return out.getvalue()
+
+
+def test_oversized_dimensions_are_rejected_before_decoding():
+    with pytest.raises(LogoError):
+        normalize_logo(_bomb_png())
+
+
+def test_large_logo_is_reduced_on_save():
+    data, mimetype, digest = normalize_logo(_png((LOGO_MAX_SIDE * 2, LOGO_MAX_SIDE)))
+    assert mimetype == 'image/jpeg'
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (LOGO_MAX_SIDE, LOGO_MAX_SIDE // 2)
+
+
+def test_upload_of_bomb_returns_400(client):
+    response = client.post('/api/settings/company', data={
+        'name': 'Loja', 'logo': (io.BytesIO(_bomb_png()), 'logo.png'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'dimensões' in response.get_json()['error']
@@ -0,0 +1,51 @@
+# backend/tests/test_migrations.py
+import sqlite3
+
+from sqlalchemy import inspect, text
+
+from app.migrations import MIGRATIONS, current_version, upgrade_schema
+from app.models import db, Customer, Product
+
+# products/customers como eram antes das migrações: dinheiro em REAL, sem colunas novas
+LEGACY_SCHEMA = """
+CREATE TABLE customers (
+    id VARCHAR(36) PRIMARY KEY, name VARCHAR(100) NOT NULL, cpf_cnpj VARCHAR(20) NOT NULL UNIQUE,
+    phone VARCHAR(20) NOT NULL, address VARCHAR(200) NOT NULL, created_at DATETIME
+);
+CREATE TABLE products (
+    id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, sku VARCHAR NOT NULL UNIQUE, marca VARCHAR NOT NULL,
+    tipo VARCHAR, price FLOAT NOT NULL, cost FLOAT NOT NULL, quantity INTEGER NOT NULL,
+    min_stock INTEGER NOT NULL, created_at DATETIME
+);
+INSERT INTO customers VALUES ('c1', 'Maria', '123', '11', 'Rua A', '2024-01-01 10:00:00');
+INSERT INTO products VALUES ('p1', 'Parafuso', 'SKU-1', 'Acme', NULL, 19.9, 0.1, 7, 1, '2024-01-01 10:00:00');
+"""
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path, make_app):
+    path = tmp_path / 'legacy.db'
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+
+    app = make_app('legacy')
+    with app.app_context():
+        assert current_version() == MIGRATIONS[-1][0]
+
+        inspector = inspect(db.engine)
+        columns = {c['name'] for c in inspector.get_columns('products')}
+        assert {'is_active', 'sync_version', 'updated_at'} <= columns
+        assert 'credit_balance' in {c['name'] for c in inspector.get_columns('customers')}
+        assert 'ix_products_is_active_created_at' in {i['name'] for i in inspector.get_indexes('products')}
+
+        # REAL -> centavos inteiros, lidos de volta em reais
+        raw = db.session.execute(text("SELECT price, cost FROM products WHERE id = 'p1'")).one()
+        assert tuple(raw) == (1990, 10)
+        product = db.session.get(Product, 'p1')
+        assert (product.price, product.cost, product.is_active) == (19.9, 0.1, True)
+        assert db.session.get(Customer, 'c1').credit_balance == 0
+
+        # idempotente: nada a aplicar na segunda vez
+        assert upgrade_schema() == []
+
+        response = app.test_client().get('/api/products/')
+        assert [p['id'] for p in response.get_json()] == ['p1']
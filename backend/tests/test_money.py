@@ -0,0 +1,74 @@
+# backend/tests/test_money.py
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+
+from app.models import db
+from app.money import discount_cents, from_cents, split_cents, to_cents
+
+
+@pytest.mark.parametrize('value, cents', [
+    (0.1, 10), ('19.99', 1999), (Decimal('0.005'), 1), (1.005, 101), (None, 0), ('', 0), (7, 700),
+])
+def test_to_cents_is_exact(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize('value', ['abc', float('nan'), float('inf'), True])
+def test_to_cents_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+def test_split_keeps_every_cent():
+    assert split_cents(1000, 3) == [334, 333, 333]
+    assert sum(split_cents(99_999, 7)) == 99_999
+    assert split_cents(5, 0) == [5]
+
+
+def test_discount_is_exact_and_capped():
+    assert discount_cents(3333, 'PERCENT', 10) == 333
+    assert discount_cents(1000, 'VALUE', 25.5) == 1000
+    assert discount_cents(1000, 'OUTRO', 5) == 0
+
+
+def test_sale_installments_sum_to_the_total(client, make_customer, make_product, make_sale):
+    product_id = make_product(quantity=10, price=33.33)
+    sale_id = make_sale([(product_id, 3, 33.33)], customer_id=make_customer(), payment_method='BOLETO',
+                        installments=3, discountType='PERCENT', discountValue=10, freight=0.1)
+
+    sale = client.get(f'/api/sales/{sale_id}/').get_json()
+    # 99,99 - 10% (10,00) + 0,10 de frete = 90,09
+    assert (sale['subtotal'], sale['total']) == (99.99, 90.09)
+    amounts = [p['amount'] for p in sale['payments']]
+    assert amounts == [30.03, 30.03, 30.03]
+    assert sum(to_cents(a) for a in amounts) == to_cents(sale['total'])
+
+    # no banco, inteiros em centavos
+    stored = db.session.execute(text('SELECT total, subtotal FROM sales WHERE id = :id'), {'id': sale_id}).one()
+    assert tuple(stored) == (9009, 9999)
+
+
+def test_sums_of_many_small_amounts_are_exact(client, make_product, make_sale):
+    product_id = make_product(quantity=100, price=0.1)
+    for _ in range(10):
+        make_sale([(product_id, 1, 0.1)])
+    total = db.session.execute(text('SELECT SUM(total) FROM sales')).scalar()
+    assert total == 100 and from_cents(total) == 1.0
+
+
+def test_credit_used_is_reported_in_reais(client, make_customer, make_product, make_sale):
+    product_id = make_product(quantity=10)
+    quote_id = make_sale([(product_id, 2, 10.0)], customer_id=make_customer(), status='QUOTE')
+    # 15,00 em PIX; os 5,00 restantes saem do crédito do cliente
+    response = client.post(f'/api/sales/{quote_id}/convert/', json={'payments': [
+        {'paymentMethod': 'PIX', 'amount': 15.0, 'status': 'PAGO'},
+        {'paymentMethod': 'CREDITO', 'amount': 5.0},
+    ]})
+    assert response.status_code == 200
+
+    sale = client.get(f'/api/sales/{quote_id}/').get_json()
+    credit_line = next(p for p in sale['payments'] if p.get('isCredit'))
+    assert sale['creditUsedAmount'] == credit_line['amount'] == 5.0
+    assert sale['usedCustomerCredit'] is True
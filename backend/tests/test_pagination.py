@@ -0,0 +1,39 @@
+# backend/tests/test_pagination.py
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.models import db, Customer
+
+
+def _walk(client, url, limit):
+    ids, cursor = [], None
+    while True:
+        query = f'{url}?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(query).get_json()
+        assert len(page['items']) <= limit
+        ids += [item['id'] for item in page['items']]
+        cursor = page['nextCursor']
+        if cursor is None:
+            return ids
+
+
+def test_keyset_pages_cover_every_row_once(client, make_customer):
+    created = [make_customer(name=f'Cliente {i}') for i in range(7)]
+    # valores de ordenação repetidos: o id desempata e nenhuma linha se repete ou some
+    db.session.execute(update(Customer).where(Customer.id.in_(created[:4])).values(created_at=datetime(2024, 1, 1)))
+    db.session.commit()
+
+    full = client.get('/api/customers/').get_json()
+    assert isinstance(full, list) and len(full) == 7
+
+    paged = _walk(client, '/api/customers/', limit=3)
+    assert sorted(paged) == sorted(created)
+    # mais antigos por último, empatados em ordem decrescente de id
+    assert paged[-4:] == sorted(created[:4], reverse=True)
+
+
+def test_bad_page_arguments_are_rejected(client):
+    assert client.get('/api/customers/?limit=0').status_code == 400
+    assert client.get('/api/customers/?limit=abc').status_code == 400
+    assert client.get('/api/customers/?cursor=nao-e-cursor').status_code == 400
@@ -0,0 +1,59 @@
+# backend/tests/test_product_import.py
+import io
+
+from app.models import Product, ProductHistory
+from app.product_import import ProductImporter
+
+HEADER = 'name,sku,marca,tipo,cost,price,quantity,minStock\n'
+
+
+def _upload(client, body, mode='insert'):
+    return client.post(f'/api/products/import_csv?mode={mode}&async=0', data={
+        'file': (io.BytesIO((HEADER + body).encode()), 'produtos.csv'),
+    }, content_type='multipart/form-data')
+
+
+def test_import_reports_bad_rows_without_aborting(client):
+    response = _upload(client, (
+        'Parafuso,SKU-1,Acme,,0.10,0.25,100,10\n'
+        ',SKU-2,Acme,,1,2,3,1\n'            # sem nome
+        'Porca,SKU-3,Acme,,abc,2,3,1\n'     # custo inválido
+        'Arruela,SKU-4,Acme,Aço,0.05,0.15,50,5\n'
+        'Parafuso repetido,SKU-1,Acme,,9,9,9,9\n'
+    ))
+    assert response.status_code == 201
+    report = response.get_json()
+    assert (report['created'], report['skipped'], report['errorCount']) == (2, 1, 2)
+    assert [(e['line'], e['sku']) for e in report['errors']] == [(3, 'SKU-2'), (4, 'SKU-3')]
+
+    # modo insert: a primeira ocorrência do SKU vale
+    product = Product.query.filter_by(sku='SKU-1').one()
+    assert (product.name, product.price, product.quantity) == ('Parafuso', 0.25, 100)
+
+
+def test_upsert_updates_existing_skus_with_history(client):
+    _upload(client, 'Parafuso,SKU-1,Acme,,0.10,0.25,100,10\nPorca,SKU-2,Acme,,1,2,3,1\n')
+
+    report = _upload(client, 'Parafuso,SKU-1,Acme,,0.10,0.30,80,10\nPorca,SKU-2,Acme,,1,2,3,1\n'
+                             'Rebite,SKU-9,Acme,,1,2,3,1\n', mode='upsert').get_json()
+    assert (report['created'], report['updated'], report['skipped']) == (1, 1, 1)
+
+    product = Product.query.filter_by(sku='SKU-1').one()
+    assert (product.price, product.quantity) == (0.3, 80)
+    changes = {(h.changed_field, h.old_value, h.new_value)
+               for h in ProductHistory.query.filter_by(product_id=product.id)}
+    assert changes == {('price', '0.25', '0.3'), ('quantity', '100', '80')}
+
+
+def test_batches_commit_independently(app):
+    rows = ''.join(f'Item {i},SKU-{i},Acme,,1,2,3,1\n' for i in range(5))
+    report = ProductImporter(batch_size=2).run(io.BytesIO((HEADER + rows).encode()))
+    assert report['created'] == 5
+    assert Product.query.count() == 5
+
+
+def test_missing_columns_are_rejected(client):
+    response = client.post('/api/products/import_csv?async=0', data={
+        'file': (io.BytesIO(b'name,sku\nX,1\n'), 'produtos.csv'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+# backend/tests/test_query_counts.py
+# Orçamento de instruções SQL por listagem (perfis de app/query_options.py): o número
+# é fixo e não cresce com o volume de dados.
+from datetime import date
+
+from app.models import db
+from app.query_counter import count_endpoint_queries
+
+BUDGETS = {
+    '/api/sales/?status=ALL': 3,   # vendas + itens + parcelas (selectinload)
+    '/api/sales/quotes/': 3,
+    '/api/customers/': 1,
+    '/api/products/': 2,
+    '/api/financial': 1,
+    '/api/returns': 1,             # cliente e venda via joinedload
+    '/api/dashboard/': 8,          # rollups
+}
+
+
+def _seed(client, make_customer, make_product, make_sale, count):
+    """`count` clientes, cada um com venda parcelada, orçamento, devolução e lançamento."""
+    for i in range(count):
+        product_id = make_product(name=f'Produto {i}', quantity=100)
+        customer_id = make_customer(name=f'Cliente {i}')
+        sale_id = make_sale([(product_id, 2, 10.0)], customer_id=customer_id,
+                            payment_method='BOLETO', installments=2)
+        make_sale([(product_id, 1, 10.0)], customer_id=customer_id, status='QUOTE')
+        assert client.post('/api/returns', json={
+            'saleId': sale_id, 'reason': 'Defeito', 'resolution': 'REEMBOLSO',
+            'items': [{'productId': product_id, 'productName': 'Produto Teste', 'quantity': 1, 'price': 10.0}],
+        }).status_code == 201
+        assert client.post('/api/financial/', json={
+            'type': 'DESPESA', 'description': f'Conta {i}', 'amount': 50.0,
+            'paymentMethod': 'PIX', 'dueDate': date.today().isoformat(),
+        }).status_code == 201
+
+
+def _counts(app):
+    # primeira rodada: efeitos de primeira chamada
+    count_endpoint_queries(app, db.engine, BUDGETS)
+    results = count_endpoint_queries(app, db.engine, BUDGETS)
+    for path, status, _count in results:
+        assert status == 200, path
+    return {path: count for path, _status, count in results}
+
+
+def test_list_endpoints_stay_within_statement_budget(app, client, make_customer, make_product, make_sale):
+    _seed(client, make_customer, make_product, make_sale, 2)
+    small = _counts(app)
+    _seed(client, make_customer, make_product, make_sale, 10)
+    large = _counts(app)
+
+    for path, budget in BUDGETS.items():
+        assert large[path] == small[path], path
+        assert large[path] <= budget, (path, large[path])
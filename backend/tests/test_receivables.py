@@ -0,0 +1,48 @@
+# backend/tests/test_receivables.py
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.localtime import local_today
+from app.models import db, ReceivablesAging, SalePayment
+from app.receivables import AGING_BUCKETS, KINDS, aging_summary, run_sweep
+
+
+def _boleto_sale(make_customer, make_product, make_sale):
+    product_id = make_product(quantity=5)
+    sale_id = make_sale([(product_id, 2, 10.0)], customer_id=make_customer(),
+                        payment_method='BOLETO', installments=2)
+    return SalePayment.query.filter_by(sale_id=sale_id).order_by(SalePayment.due_date).all()
+
+
+def test_aging_is_upserted_in_place(app, make_customer, make_product, make_sale):
+    _boleto_sale(make_customer, make_product, make_sale)
+    run_sweep()
+    assert ReceivablesAging.query.count() == len(KINDS) * len(AGING_BUCKETS)
+    assert aging_summary()['kinds']['PARCELA']['buckets']['A_VENCER'] == {'count': 2, 'amount': 20.0}
+
+    # a segunda varredura atualiza as linhas existentes (antes: DELETE + INSERT)
+    late, _ = _boleto_sale(make_customer, make_product, make_sale)
+    late.due_date = local_today() - timedelta(days=40)
+    db.session.commit()
+    assert run_sweep()['payments'] == 1
+
+    assert ReceivablesAging.query.count() == len(KINDS) * len(AGING_BUCKETS)
+    buckets = aging_summary()['kinds']['PARCELA']['buckets']
+    assert buckets['A_VENCER'] == {'count': 3, 'amount': 30.0}
+    assert buckets['31-60'] == {'count': 1, 'amount': 10.0}
+
+
+def test_sweep_uses_the_store_timezone(app, monkeypatch, make_customer, make_product, make_sale):
+    # UTC-12: na maior parte do dia o "hoje" da loja ainda é ontem em UTC
+    monkeypatch.setenv('EASYSTOCK_TIMEZONE', 'Etc/GMT+12')
+    today = local_today()
+    assert today == datetime.now(ZoneInfo('Etc/GMT+12')).date()
+
+    due_today, overdue = _boleto_sale(make_customer, make_product, make_sale)
+    due_today.due_date, overdue.due_date = today, today - timedelta(days=1)
+    db.session.commit()
+
+    assert run_sweep()['payments'] == 1
+    db.session.expire_all()
+    assert (due_today.status, overdue.status) == ('PENDENTE', 'VENCIDO')
+    assert aging_summary()['asOf'] == today.isoformat()
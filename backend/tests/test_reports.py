@@ -0,0 +1,62 @@
+# backend/tests/test_reports.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.models import db
+
+
+def _report_statements(client, path):
+    """Instruções SQL de um GET do relatório (depois de uma chamada de aquecimento)."""
+    client.get(path)
+    statements = []
+
+    def count(*_args):
+        statements.append(1)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return len(statements), response.get_json()['summary']['salesCount']
+
+
+def test_report_query_count_is_independent_of_sales(client, make_product, make_sale):
+    products = [make_product(name=f'Produto {i}', quantity=1000) for i in range(5)]
+    today = datetime.utcnow().date()  # created_at é gravado em UTC
+    path = f'/api/reports/?start={today - timedelta(days=30)}&end={today}'
+    for product_id in products[:2]:
+        make_sale([(product_id, 1, 10.0)])
+    small_count, small_sales = _report_statements(client, path)
+
+    for i in range(20):
+        make_sale([(products[i % 5], 2, 10.0), (products[(i + 1) % 5], 1, 10.0)])
+    large_count, large_sales = _report_statements(client, path)
+
+    assert large_sales > small_sales
+    assert large_count == small_count
+
+
+def test_report_aggregates_match_the_sales(client, make_product, make_sale):
+    screw = make_product(name='Parafuso', quantity=100, price=0.5, cost=0.2)
+    drill = make_product(name='Furadeira', quantity=10, price=200.0, cost=120.0)
+    idle = make_product(name='Parado', quantity=3)
+    make_sale([(screw, 10, 0.5), (drill, 1, 200.0)])
+    make_sale([(screw, 30, 0.5)])
+    make_sale([(drill, 2, 200.0)], status='QUOTE')  # orçamento não entra
+
+    today = datetime.utcnow().date()  # created_at é gravado em UTC
+    report = client.get(f'/api/reports/?start={today}&end={today}').get_json()
+    assert report['summary'] == {
+        'totalRevenue': 220.0, 'totalCost': 128.0, 'totalProfit': 92.0,
+        'salesCount': 2, 'averageTicket': 110.0,
+    }
+    by_product = {p['productId']: p for p in report['profitByProduct']}
+    assert by_product[screw] == {'productId': screw, 'productName': 'Produto Teste',
+                                 'quantitySold': 40, 'totalRevenue': 20.0, 'totalProfit': 12.0}
+    assert by_product[drill]['totalProfit'] == 80.0
+    assert [p['productId'] for p in report['bestSellersByValue']] == [drill, screw]
+    assert [p['productId'] for p in report['bestSellersByQuantity']] == [screw, drill]
+    assert [p['productId'] for p in report['stockEfficiency']] == [idle]
@@ -0,0 +1,66 @@
+# backend/tests/test_response_cache.py
+from datetime import timedelta
+
+from app.localtime import local_today
+from app.models import db, FinancialEntry, ReceivablesAging, ReportGoals
+from app.query_counter import QueryCounter
+from app.response_cache import CACHE_BACKEND, CACHE_TTL
+from app.routes.reports import _closed_period
+
+
+def test_memory_backend_defaults_to_short_ttl():
+    if CACHE_BACKEND == 'memory':
+        assert CACHE_TTL <= 10
+
+
+def test_product_list_is_invalidated_by_writes(client, make_product):
+    product_id = make_product(name='Antes')
+    first = client.get('/api/products/')
+    etag = first.headers['ETag']
+    assert client.get('/api/products/', headers={'If-None-Match': etag}).status_code == 304
+
+    client.put(f'/api/products/{product_id}/', json={'name': 'Depois'})
+    after = client.get('/api/products/', headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.get_json()[0]['name'] == 'Depois'
+
+
+def test_cached_report_still_runs_the_overdue_sweep(app, client):
+    yesterday = local_today() - timedelta(days=1)
+    path = f'/api/reports/?start={yesterday - timedelta(days=30)}&end={yesterday}'
+    client.get(path)  # varredura do dia
+    assert client.get(path).get_json()['defaultingCustomers'] == []  # agora em cache
+
+    # a virada do dia, sem commit pela sessão (o cache não fica sabendo): um lançamento
+    # PENDENTE já vencido e a tabela de aging de ontem
+    entries, aging = FinancialEntry.__table__, ReceivablesAging.__table__
+    with db.engine.begin() as conn:
+        conn.execute(entries.insert().values(
+            id='atrasado', type='RECEITA', description='Cliente atrasado', amount=50.0,
+            due_date=yesterday - timedelta(days=5), payment_method='BOLETO', status='PENDENTE'))
+        conn.execute(aging.update().values(as_of=yesterday))
+
+    report = client.get(path).get_json()
+    assert [c['customerName'] for c in report['defaultingCustomers']] == ['Cliente atrasado']
+    assert db.session.get(FinancialEntry, 'atrasado').status == 'VENCIDO'
+
+
+def test_reading_goals_writes_nothing_and_stays_cached(client):
+    assert client.get('/api/reports/goals/').get_json() == {'monthlyRevenue': 0.0, 'monthlyProfit': 0.0}
+    assert ReportGoals.query.count() == 0
+    with QueryCounter(db.engine) as counter:
+        assert client.get('/api/reports/goals/').status_code == 200
+    assert counter.count == 0  # servido do cache
+
+    client.post('/api/reports/goals/', json={'monthlyRevenue': 1000})
+    assert client.get('/api/reports/goals/').get_json()['monthlyRevenue'] == 1000.0
+
+
+def test_store_day_still_open_is_not_a_closed_period(app, monkeypatch):
+    # fuso bem atrás do servidor: o "hoje" da loja costuma ser o "ontem" do servidor
+    monkeypatch.setenv('EASYSTOCK_TIMEZONE', 'Etc/GMT+12')
+    today = local_today()
+    with app.test_request_context(f'/api/reports/?end={today}'):
+        assert not _closed_period()
+    with app.test_request_context(f'/api/reports/?end={today - timedelta(days=1)}'):
+        assert _closed_period()
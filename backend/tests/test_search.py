@@ -0,0 +1,64 @@
+# backend/tests/test_search.py
+import pytest
+
+from app.models import db, Customer, Product
+from app.search import SPECS, MemoryIndex, parse_terms
+
+
+@pytest.fixture
+def catalog(make_product):
+    ids = {
+        'furadeira': make_product(name='Furadeira de Impacto Bosch'),
+        'broca': make_product(name='Broca para Concreto 8mm'),
+        'parafusadeira': make_product(name='Parafusadeira Elétrica'),
+        'inativo': make_product(name='Furadeira Antiga'),
+    }
+    db.session.get(Product, ids['inativo']).is_active = False
+    db.session.commit()
+    return ids
+
+
+def _search(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return [item['id'] for item in response.get_json()['items']]
+
+
+def test_prefix_search_ignores_case_and_accents(client, catalog):
+    assert _search(client, '/api/products/search?q=FURAD') == [catalog['furadeira']]
+    assert _search(client, '/api/products/search?q=eletrica') == [catalog['parafusadeira']]
+    assert _search(client, '/api/products/search?q=broca concr') == [catalog['broca']]
+    assert set(_search(client, '/api/products/search?q=furad&include_inactive=1')) == \
+        {catalog['furadeira'], catalog['inativo']}
+
+
+def test_typos_fall_back_to_trigram_matches(client, catalog):
+    assert _search(client, '/api/products/search?q=parafuzadeira') == [catalog['parafusadeira']]
+    assert _search(client, '/api/products/search?q=xyzw') == []
+
+
+def test_new_rows_are_searchable_and_pages_chain(client, make_product):
+    ids = {make_product(name=f'Martelo {i}') for i in range(5)}
+    first = client.get('/api/products/search?q=martelo&limit=3').get_json()
+    second = client.get(f"/api/products/search?q=martelo&limit=3&cursor={first['nextCursor']}").get_json()
+    assert second['nextCursor'] is None
+    assert {i['id'] for i in first['items'] + second['items']} == ids
+
+
+def test_customer_documents_match_with_or_without_punctuation(client, make_customer):
+    customer_id = make_customer(name='João da Silva')
+    cpf = db.session.get(Customer, customer_id).cpf_cnpj
+    digits = ''.join(ch for ch in cpf if ch.isdigit())
+    formatted = f'{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}'
+    assert _search(client, f'/api/customers/search?q={formatted}') == [customer_id]
+    assert _search(client, f'/api/customers/search?q={digits[:6]}') == [customer_id]
+    assert _search(client, '/api/customers/search?q=joao silva') == [customer_id]
+
+
+def test_memory_index_for_other_databases(app, catalog):
+    index = MemoryIndex(SPECS['products'])
+    index.load()
+    assert index.search(parse_terms('furad'), 20, 0, active_only=True) == [catalog['furadeira']]
+    assert index.search(parse_terms('parafuzadeira'), 20, 0, active_only=True) == [catalog['parafusadeira']]
+    index.remove(catalog['furadeira'])
+    assert index.search(parse_terms('furad'), 20, 0, active_only=False) == [catalog['inativo']]
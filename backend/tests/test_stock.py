@@ -0,0 +1,64 @@
+# backend/tests/test_stock.py
+import threading
+from datetime import datetime, timedelta
+
+from app.models import Sale
+from app.stock import release_expired_reservations
+from tests.conftest import stock_of
+
+
+def _sale(client, lines, **extra):
+    return client.post('/api/sales/', json={
+        'items': [{'productId': pid, 'productName': 'Produto Teste', 'quantity': qty, 'price': 10.0}
+                  for pid, qty in lines],
+        'status': 'COMPLETED', 'paymentMethod': 'PIX', **extra,
+    })
+
+
+def test_shortage_rejects_the_whole_sale(client, make_product):
+    plenty, scarce = make_product(quantity=10), make_product(name='Escasso', quantity=3)
+
+    # o mesmo produto em duas linhas conta junto: 2 + 2 > 3
+    response = _sale(client, [(plenty, 1), (scarce, 2), (scarce, 2)])
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body['error'] == 'OUT_OF_STOCK'
+    assert body['items'] == [{'productId': scarce, 'productName': 'Produto Teste', 'available': 3, 'requested': 4}]
+
+    # nada foi baixado nem gravado
+    assert (stock_of(plenty), stock_of(scarce)) == (10, 3)
+    assert Sale.query.count() == 0
+
+
+def test_concurrent_checkouts_never_oversell(app, make_product):
+    product_id = make_product(quantity=5)
+    barrier = threading.Barrier(4)
+    statuses = []
+
+    def checkout():
+        with app.test_client() as client:
+            barrier.wait()
+            statuses.append(_sale(client, [(product_id, 2)]).status_code)
+
+    threads = [threading.Thread(target=checkout) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(statuses) == [201, 201, 409, 409]
+    assert stock_of(product_id) == 1
+
+
+def test_quote_reservation_holds_and_releases_stock(client, make_product):
+    product_id = make_product(quantity=5)
+    response = client.post('/api/sales/', json={
+        'items': [{'productId': product_id, 'productName': 'Produto Teste', 'quantity': 4, 'price': 10.0}],
+        'status': 'QUOTE', 'holdStock': True,
+    })
+    assert response.status_code == 201
+    assert stock_of(product_id) == 1
+    assert _sale(client, [(product_id, 2)]).status_code == 409
+
+    assert release_expired_reservations(datetime.utcnow() + timedelta(days=11)) == 1
+    assert stock_of(product_id) == 5
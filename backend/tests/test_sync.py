@@ -0,0 +1,54 @@
+# backend/tests/test_sync.py
+from datetime import date, timedelta
+
+from app.models import db, SalePayment
+from app.receivables import run_sweep
+from app.sync import current_version, sync_stamp
+
+
+def test_core_writers_resolve_the_scoped_session(app, client, make_customer, make_product, make_sale):
+    # regressão: sync_stamp() sem sessão chamava get_nested_transaction() no scoped_session
+    customer_id = make_customer()
+    product_id = make_product(quantity=5)
+    sale_id = make_sale([(product_id, 2, 10.0)], customer_id=customer_id,
+                        payment_method='BOLETO', installments=2)
+
+    response = client.post('/api/returns', json={
+        'saleId': sale_id, 'reason': 'Defeito', 'resolution': 'REEMBOLSO',
+        'items': [{'productId': product_id, 'productName': 'Produto Teste', 'quantity': 1, 'price': 10.0}],
+    })
+    assert response.status_code == 201, response.get_json()
+
+    # parcelas vencidas: a varredura carimba as vendas via touch_sales()
+    SalePayment.query.filter_by(sale_id=sale_id).update({'due_date': date.today() - timedelta(days=3)})
+    db.session.commit()
+    result = run_sweep()
+    assert result['payments'] == 2
+    assert client.get(f'/api/reports/?start={date.today()}&end={date.today()}').status_code == 200
+
+    assert isinstance(sync_stamp()['sync_version'], int)
+    db.session.rollback()
+
+
+def test_delta_returns_only_changes_and_deletions(app, client, make_customer, make_product):
+    changed = make_product(name='Alterado')
+    untouched = make_product(name='Intocado')
+    gone = make_customer()
+
+    full = client.get('/api/sync').get_json()
+    assert {p['id'] for p in full['changes']['products']} == {changed, untouched}
+    assert [c['id'] for c in full['changes']['customers']] == [gone]
+    since = full['version']
+    assert since == current_version()
+
+    assert client.put(f'/api/products/{changed}/', json={'name': 'Alterado 2'}).status_code == 200
+    assert client.delete(f'/api/customers/{gone}').status_code == 200
+
+    delta = client.get(f'/api/sync?since={since}').get_json()
+    assert [p['id'] for p in delta['changes']['products']] == [changed]
+    assert delta['changes']['customers'] == []
+    assert delta['deleted']['customers'] == [gone]
+    assert delta['version'] > since
+
+    again = client.get(f"/api/sync?since={delta['version']}").get_json()
+    assert again['changes']['products'] == [] and again['deleted']['customers'] == []
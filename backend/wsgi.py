@@ -0,0 +1,42 @@
+# backend/wsgi.py
+# ======================================================================================
+# Entrada WSGI para produção (sem debug, sem reloader).
+#
+#   gunicorn (Linux/macOS), a partir de backend/:
+#       EASYSTOCK_RESPONSE_CACHE=sqlite gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+#   (com vários workers o cache de respostas precisa ser o compartilhado: no memory
+#    um commit só invalida o worker que o fez — ver app/response_cache.py)
+#
+#   Canal SSE (/api/events): cada terminal conectado prende uma thread. Com workers
+#   sync do gunicorn (1 thread) o canal recusa conexões; use threads e informe quantas:
+#       EASYSTOCK_THREADS=16 EASYSTOCK_EVENTS=sqlite gunicorn -w 4 --worker-class gthread \
+#           --threads 16 -b 0.0.0.0:5000 wsgi:app
+#   No máximo EASYSTOCK_THREADS // 2 clientes SSE por worker (EASYSTOCK_EVENTS_MAX_CLIENTS).
+#   waitress (Windows/Linux):
+#       waitress-serve --listen=0.0.0.0:5000 wsgi:app
+#       python wsgi.py          (usa EASYSTOCK_HOST / EASYSTOCK_PORT / EASYSTOCK_THREADS)
+# ======================================================================================
+import os
+
+from app import create_app
+from app.models import db
+
+app = create_app()
+
+# create_app já abriu conexões (create_all/migrações). Descarta o pool para que cada
+# worker (inclusive com gunicorn --preload, após o fork) abra as próprias conexões.
+with app.app_context():
+    db.engine.dispose()
+
+if __name__ == '__main__':
+    try:
+        from waitress import serve
+    except ImportError:
+        raise SystemExit('waitress não instalado: pip install waitress (ou use gunicorn wsgi:app)')
+
+    serve(
+        app,
+        host=os.getenv('EASYSTOCK_HOST', '0.0.0.0'),
+        port=int(os.getenv('EASYSTOCK_PORT', '5000')),
+        threads=int(os.getenv('EASYSTOCK_THREADS', '8')),
+    )
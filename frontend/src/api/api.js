@@ -9,6 +9,36 @@ const apiClient = axios.create({
   headers: { 'Content-Type': 'application/json' },
 });
 
+// Idempotency-Key: toda escrita leva uma chave única. Reenvios automáticos (queda de
+// rede/timeout, 409 IDEMPOTENCY_IN_PROGRESS, 502/503/504) reutilizam a mesma chave e
+// o servidor devolve a resposta original, sem registrar a venda/devolução duas vezes.
+const MUTATING_METHODS = ['post', 'put', 'patch', 'delete'];
+const IDEMPOTENT_RETRIES = 3;
+
+function newIdempotencyKey() {
+  if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+}
+
+apiClient.interceptors.request.use((config) => {
+  if (MUTATING_METHODS.includes((config.method || '').toLowerCase()) && !config.headers['Idempotency-Key']) {
+    config.headers['Idempotency-Key'] = newIdempotencyKey();
+  }
+  return config;
+});
+
+apiClient.interceptors.response.use(undefined, async (error) => {
+  const config = error.config;
+  const status = error.response?.status;
+  const retriable = !error.response || [502, 503, 504].includes(status)
+    || (status === 409 && error.response.data?.error === 'IDEMPOTENCY_IN_PROGRESS');
+  if (!config?.headers?.['Idempotency-Key'] || !retriable) throw error;
+  config.idempotentRetries = (config.idempotentRetries || 0) + 1;
+  if (config.idempotentRetries > IDEMPOTENT_RETRIES) throw error;
+  await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** (config.idempotentRetries - 1)));
+  return apiClient(config);
+});
+
 // Helper: normaliza erro de conversão de orçamento expirado (422)
 function normalizeConvertError(err) {
   const status = err?.response?.status;
@@ -21,6 +51,23 @@ function normalizeConvertError(err) {
   throw err;
 }
 
+// Helper: respostas 202 (job em segundo plano) -> acompanha /jobs/:id até terminar
+// e devolve o resultado como se a chamada tivesse sido síncrona.
+async function waitForJob(jobId, { interval = 1000, timeout = 10 * 60 * 1000 } = {}) {
+  const started = Date.now();
+  for (;;) {
+    const { data } = await apiClient.get(`/jobs/${jobId}`);
+    if (data.status === 'done') return data.result;
+    if (data.status === 'failed') throw new Error(data.error || 'Falha no processamento');
+    if (Date.now() - started > timeout) throw new Error('Tempo esgotado aguardando o processamento');
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+}
+
+function resolveJob(res) {
+  return res.status === 202 && res.data?.jobId ? waitForJob(res.data.jobId) : res.data;
+}
+
 // ---------- Update compatível para /financial ----------
 async function updateFinancialCompat(id, payload) {
   // 1) PATCH /financial/:id
@@ -56,6 +103,9 @@ export const api = {
   // Customers
   // -------------------------
   getCustomers: () => apiClient.get(`/customers/`).then(res => res.data),
+  // Busca no servidor (nome, CPF/CNPJ, telefone) -> { items, nextCursor }
+  searchCustomers: (q, { limit = 20, cursor } = {}) =>
+    apiClient.get(`/customers/search`, { params: { q, limit, cursor } }).then(res => res.data),
   addCustomer: (data) => apiClient.post(`/customers/`, data),
   updateCustomer: (id, data) => apiClient.put(`/customers/${id}`, data),
   deleteCustomer: (id) => apiClient.delete(`/customers/${id}`),
@@ -81,6 +131,13 @@ export const api = {
     else if (opts.includeInactive) params.include_inactive = 1;
     return apiClient.get(`/products/`, { params }).then(res => res.data);
   },
+  // Busca no servidor (nome, SKU, marca, tipo) -> { items, nextCursor }
+  // opts: { limit?, cursor?, includeInactive? }
+  searchProducts: (q, { limit = 20, cursor, includeInactive } = {}) => {
+    const params = { q, limit, cursor };
+    if (includeInactive) params.include_inactive = 1;
+    return apiClient.get(`/products/search`, { params }).then(res => res.data);
+  },
   addProduct: (data) => apiClient.post(`/products/`, data),
   updateProduct: (id, data) => apiClient.put(`/products/${id}/`, data),
 
@@ -156,45 +213,73 @@ export const api = {
   // Reports
   // -------------------------
   getReportsData: (start, end) =>
-    apiClient.get(`/reports/`, { params: { start, end } }).then(res => res.data),
+    apiClient.get(`/reports/`, { params: { start, end } }).then(resolveJob),
   setGoals: (data) => apiClient.post(`/reports/goals/`, data),
   getGoals: () => apiClient.get(`/reports/goals/`).then(res => res.data),
 
+  // -------------------------
+  // Delta-sync
+  // -------------------------
+  // Sem `since`: carga completa. Com `since` (o `version` da sincronização anterior):
+  // só o que mudou. Percorre as páginas e devolve
+  // { version, changes: { products, customers, sales, financialEntries }, deleted: {...} }.
+  // Erro 410 (SYNC_RESET_REQUIRED): chamar de novo sem `since`.
+  syncChanges: async (since, { limit = 1000 } = {}) => {
+    const merged = { version: null, changes: {}, deleted: {} };
+    let params = since == null ? { limit } : { since, limit };
+    for (;;) {
+      const { data } = await apiClient.get(`/sync`, { params });
+      merged.version = data.version;
+      for (const [key, items] of Object.entries(data.changes)) {
+        merged.changes[key] = (merged.changes[key] || []).concat(items);
+      }
+      for (const [key, ids] of Object.entries(data.deleted)) {
+        merged.deleted[key] = (merged.deleted[key] || []).concat(ids);
+      }
+      if (!data.nextCursor) return merged;
+      params = { cursor: data.nextCursor, limit };
+    }
+  },
+
+  // Canal SSE (/api/events): handlers por tópico, ex.
+  //   { stock: (data) => ..., sales: (data) => ..., reset: () => api.syncChanges(version) }
+  // O EventSource reconecta sozinho (com Last-Event-ID). Retorna a função que fecha o canal.
+  subscribeEvents: (handlers, { topics } = {}) => {
+    const names = topics || Object.keys(handlers).filter((name) => name !== 'reset');
+    const query = names.length ? `?topics=${encodeURIComponent(names.join(','))}` : '';
+    const source = new EventSource(`${BASE_URL}/events${query}`);
+    for (const [name, handler] of Object.entries(handlers)) {
+      source.addEventListener(name, (ev) => handler(ev.data ? JSON.parse(ev.data) : {}));
+    }
+    return () => source.close();
+  },
+
   // -------------------------
   // Dashboard
   // -------------------------
-  getDashboardStats: () =>
-    Promise.all([
-      api.getSales(),
-      api.getQuotes(),
-      api.getFinancialEntries(),
-      api.getProducts()
-    ]).then(([sales, quotes, entries, products]) => {
-      const today = new Date().toISOString().slice(0, 10);
-      const salesToday = sales.filter(s => (s.createdAt || '').startsWith(today));
-      const openQuotes = quotes;
-      const receivable = entries.filter(e => e.type === 'RECEITA' && e.status !== 'PAGO');
-      const payable = entries.filter(e => e.type === 'DESPESA' && e.status !== 'PAGO');
-      const overduePayable = payable.filter(e => e.status === 'VENCIDO');
-      const lowStock = products.filter(p => p.quantity <= p.minStock);
-
-      return {
-        salesTodayCount: salesToday.length,
-        salesTodayValue: salesToday.reduce((sum, s) => sum + (s.total || 0), 0),
-        openQuotesCount: openQuotes.length,
-        totalReceivable: receivable.reduce((sum, e) => sum + (e.amount || 0), 0),
-        totalPayable: payable.reduce((sum, e) => sum + (e.amount || 0), 0),
-        overduePayableCount: overduePayable.length,
-        lowStockProductsCount: lowStock.length,
-        recentSales: sales.slice(0, 5)
-      };
-    }),
+  // KPIs agregados no servidor (rollups diários/horários)
+  // params: { start?: 'YYYY-MM-DD', end?: 'YYYY-MM-DD', day?: 'YYYY-MM-DD' }
+  getDashboardStats: (params = {}) =>
+    apiClient.get(`/dashboard/`, { params }).then(res => res.data),
 
   // -------------------------
   // Settings
   // -------------------------
-  getCompanyInfo: () => apiClient.get(`/settings/company`).then(res => res.data),
-  saveCompanyInfo: (data) => apiClient.post(`/settings/company`, data),
+  // logoUrl vem relativo ao servidor (/api/settings/company/logo?v=<hash>)
+  getCompanyInfo: () => apiClient.get(`/settings/company`).then(res => ({
+    ...res.data,
+    logoUrl: res.data?.logoUrl ? `${BASE_URL.replace(/\/api$/, '')}${res.data.logoUrl}` : '',
+  })),
+  // Com logoFile (File) envia multipart; removeLogo: true apaga o logo atual
+  saveCompanyInfo: ({ logoFile, logoUrl, ...data }) => {
+    if (!logoFile) return apiClient.post(`/settings/company`, data);
+    const form = new FormData();
+    Object.entries(data).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && typeof value !== 'object') form.append(key, value);
+    });
+    form.append('logo', logoFile);
+    return apiClient.post(`/settings/company`, form, { headers: { 'Content-Type': 'multipart/form-data' } });
+  },
 };
 
 // Importar CSV
@@ -220,7 +305,9 @@ export async function importProductsFromCSV(file) {
       }
     }
 
-    return await response.json();
+    const data = await response.json();
+    // arquivos grandes são importados em segundo plano (202 + jobId)
+    return response.status === 202 && data.jobId ? await waitForJob(data.jobId) : data;
   } catch (err) {
     console.error('[IMPORT ERROR]', err);
     throw new Error(`Falha na requisição: ${err.message}`);
@@ -6,7 +6,7 @@ export const getCompanyInfo = async () => {
     address: "Rua das Startups, 123 - São Paulo, SP",
     phone: "(11) 98765-4321",
     email: "contato@easydata360.com",
-    logoBase64: ""
+    logoUrl: ""
   };
 };
 
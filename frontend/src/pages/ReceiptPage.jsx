@@ -161,8 +161,8 @@ const ReceiptPage = ({ transactionId, onBack }) => {
         {/* Empresa */}
         {companyInfo && (
           <div className="flex items-start gap-4">
-            {companyInfo.logoBase64 && (
-              <img src={companyInfo.logoBase64} alt="Logo da empresa" className="w-24 h-auto object-contain" />
+            {companyInfo.logoUrl && (
+              <img src={companyInfo.logoUrl} alt="Logo da empresa" className="w-24 h-auto object-contain" />
             )}
             <div className="text-sm text-gray-700">
               <p className="font-semibold">{companyInfo.name}</p>
@@ -156,7 +156,7 @@ const ReportsPage = () => {
   const [financial, setFinancial] = useState([]);
   const [customers, setCustomers] = useState([]);
   const [returnsList, setReturnsList] = useState([]);
-  const [logoBase64, setLogoBase64] = useState('');
+  const [logoUrl, setLogoUrl] = useState('');
 
   // metas
   const [goalsModalOpen, setGoalsModalOpen] = useState(false);
@@ -188,7 +188,7 @@ const ReportsPage = () => {
         if (cancelled) return;
 
         setCompanyInfo(company || null);               // <-- necessário pro Header
-        setLogoBase64(company?.logoBase64 || '');
+        setLogoUrl(company?.logoUrl || '');
 
         setSales(s || []);
         setQuotes(q || []);
@@ -447,9 +447,9 @@ const ReportsPage = () => {
       <h1 className="text-3xl font-bold text-base-900 print:text-black">Relatórios</h1>
 
       <div className="flex items-start gap-4">
-        {(companyInfo?.logoBase64 || logoBase64) && (
+        {(companyInfo?.logoUrl || logoUrl) && (
           <img
-            src={companyInfo?.logoBase64 || logoBase64}
+            src={companyInfo?.logoUrl || logoUrl}
             alt="Logo da empresa"
             className="w-24 h-auto object-contain"
           />
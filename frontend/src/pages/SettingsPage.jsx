@@ -78,16 +78,13 @@ const SettingsPage = () => {
     const file = e.target.files?.[0];
     if (!file) return;
 
-    if (file.size > 1024 * 1024) {
-      alert('O arquivo é muito grande. O limite é de 1MB.');
+    if (file.size > 5 * 1024 * 1024) {
+      alert('O arquivo é muito grande. O limite é de 5MB.');
       return;
     }
 
-    const reader = new FileReader();
-    reader.onloadend = () => {
-      setCompanyInfo({ ...companyInfo, logoBase64: reader.result });
-    };
-    reader.readAsDataURL(file);
+    // Enviado como arquivo (multipart); o servidor reduz imagens grandes
+    setCompanyInfo({ ...companyInfo, logoFile: file, logoUrl: URL.createObjectURL(file), removeLogo: false });
   };
 
   // ------ Phones ------
@@ -183,8 +180,8 @@ const SettingsPage = () => {
               <label className="block text-sm font-medium">Logo da Empresa</label>
               <div className="mt-1 flex justify-center px-6 pt-5 pb-6 border-2 border-base-200 border-dashed rounded-md">
                 <div className="space-y-1 text-center">
-                  {companyInfo.logoBase64 ? (
-                    <img src={companyInfo.logoBase64} alt="Logo preview" className="mx-auto h-24 w-auto object-contain" />
+                  {companyInfo.logoUrl ? (
+                    <img src={companyInfo.logoUrl} alt="Logo preview" className="mx-auto h-24 w-auto object-contain" />
                   ) : (
                     <svg className="mx-auto h-12 w-12 " stroke="currentColor" fill="none" viewBox="0 0 48 48" aria-hidden="true">
                       <path d="M28 8H12a4 4 0 00-4 4v20m32-12v8m0 0v8a4 4 0 01-4 4H12a4 4 0 01-4-4v-4m32-4l-3.172-3.172a4 4 0 00-5.656 0L28 28M8 32l9.172-9.172a4 4 0 015.656 0L28 28" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round" />
@@ -196,13 +193,13 @@ const SettingsPage = () => {
                       <input id="file-upload" name="file-upload" type="file" className="sr-only" onChange={handleFileChange} accept="image/png, image/jpeg" />
                     </label>
                   </div>
-                  <p className="text-xs">PNG, JPG até 1MB</p>
+                  <p className="text-xs">PNG, JPG até 5MB</p>
                 </div>
               </div>
-              {companyInfo.logoBase64 && (
+              {companyInfo.logoUrl && (
                 <button
                   type="button"
-                  onClick={() => setCompanyInfo({ ...companyInfo, logoBase64: '' })}
+                  onClick={() => setCompanyInfo({ ...companyInfo, logoFile: null, logoUrl: '', removeLogo: true })}
                   className="w-full px-4 py-2 rounded text-white"
                   style={{ backgroundColor: 'rgb(var(--color-primary-400))' }}
                 >